@@ -0,0 +1,37 @@
+import io
+import time
+
+from benchmarks.generator import dump_documents, generate_manifests
+from yaml2dot.data_loader import available_parsers, parse_yaml
+from yaml2dot.event_builder import iter_event_documents
+from yaml2dot.renderer import render
+
+
+def best_of(function, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(counts):
+    for parser in available_parsers()["yaml"]:
+        for count in counts:
+            text = dump_documents(
+                generate_manifests(count, kinds=("Deployment", )), "yaml")
+            load = best_of(lambda: parse_yaml(io.StringIO(text), parser))
+            events = best_of(lambda: list(iter_event_documents(text, parser)))
+            documents = parse_yaml(io.StringIO(text), parser)[0]
+            rendering = best_of(lambda: render(documents, compact=True))
+            print(
+                f"{parser:>7} documents={count:>5} size={len(text) // 1024:>6} KB  "
+                f"constructor={load * 1000:8.1f} ms  events={events * 1000:8.1f} ms  "
+                f"render={rendering * 1000:8.1f} ms  "
+                f"end to end speedup={(load + rendering) / (events + rendering):.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    run([500, 2000, 4000])
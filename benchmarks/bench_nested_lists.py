@@ -0,0 +1,67 @@
+import math
+import time
+
+from benchmarks.suite import scaling_exponent
+from yaml2dot.renderer import render
+
+
+def generate_wide_lists(count, nesting=3):
+    """
+    Builds a list of `count` objects, each holding `nesting` levels of nested lists of dicts.
+    """
+
+    def item(index, level):
+        if level == 0:
+            return {"name": f"leaf{index}", "value": index}
+        return {
+            "name": f"item{index}",
+            "children": [item(index, level - 1),
+                         item(index + 1, level - 1)]
+        }
+
+    return {"root": [item(index, nesting) for index in range(count)]}
+
+
+def generate_deep_lists(depth, width=2):
+    """
+    Builds a list-of-dicts chain `depth` levels deep where every level holds `width` items.
+    Only the first item of each level nests further, so the input grows linearly with depth.
+    """
+    node = [{"name": f"leaf{index}", "value": index} for index in range(width)]
+    for level in range(depth):
+        items = [{"name": f"level{level}", "children": node}]
+        items.extend({
+            "name": f"level{level}_{index}",
+            "value": index
+        } for index in range(1, width))
+        node = items
+    return {"root": node}
+
+
+def time_render(data, repeat=3):
+    best = math.inf
+    graph = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        graph = render(data, compact=True)
+        best = min(best, time.perf_counter() - start)
+    return best, graph
+
+
+def run(name, generator, parameters):
+    node_counts, id_lengths, timings = [], [], []
+    for parameter in parameters:
+        timing, graph = time_render(generator(parameter))
+        node_counts.append(graph.number_of_nodes())
+        # Node ids are full paths, so their total length is a lower bound on the work done
+        id_lengths.append(sum(len(node) for node in graph.nodes()))
+        timings.append(timing)
+        print(f"{name}={parameter:>6}  nodes={node_counts[-1]:>7}  "
+              f"id_chars={id_lengths[-1]:>9}  render={timing * 1000:8.2f} ms")
+    print(f"{name}: scaling exponent vs nodes {scaling_exponent(node_counts, timings):.2f}, "
+          f"vs id characters {scaling_exponent(id_lengths, timings):.2f}")
+
+
+if __name__ == "__main__":
+    run("count", generate_wide_lists, [1000, 2000, 4000, 8000, 16000])
+    run("depth", generate_deep_lists, [250, 500, 1000, 2000, 4000])
@@ -0,0 +1,212 @@
+import json
+import random
+import string
+from typing import Any, Dict, Final, List
+
+import yaml
+
+# Formats dump_documents writes, as named by data_loader.file_format
+DATA_FORMATS: Final = ("yaml", "json", "jsonl")
+KINDS: Final = ("Deployment", "Service", "ConfigMap")
+
+
+def _scalar(rng: random.Random, scalar_size: int) -> Any:
+    choice = rng.random()
+    if choice < 0.15:
+        return rng.randrange(1 << 16)
+    if choice < 0.2:
+        return rng.random() < 0.5
+    return "".join(rng.choices(string.ascii_lowercase + string.digits + "-",
+                               k=scalar_size))
+
+
+def generate_tree(depth: int = 3,
+                  breadth: int = 4,
+                  list_length: int = 3,
+                  scalar_size: int = 8,
+                  seed: int = 0) -> Dict[str, Any]:
+    """
+    Builds one configuration-like document.
+
+    Every mapping has `breadth` keys. Above the last level, a key holds a mapping three times out
+    of four and otherwise a list of `list_length` items. The items alternate between lists of
+    scalars and lists of mappings. On the last level, keys hold scalars: mostly strings of
+    `scalar_size` characters, with some integers and booleans. The same arguments always build
+    the same document.
+
+    Parameters:
+    - depth (int, optional): Levels of nested mappings below the root.
+    - breadth (int, optional): Keys per mapping.
+    - list_length (int, optional): Items per list.
+    - scalar_size (int, optional): Characters per string value.
+    - seed (int, optional): Seed of the random choices.
+
+    Returns:
+    - Dict[str, Any]: The document.
+    """
+    rng = random.Random(seed)
+
+    def mapping(level: int) -> Dict[str, Any]:
+        node: Dict[str, Any] = {}
+        for index in range(breadth):
+            key = f"key{level}_{index}"
+            if level >= depth:
+                node[key] = _scalar(rng, scalar_size)
+            elif rng.random() < 0.75:
+                node[key] = mapping(level + 1)
+            elif index % 2:
+                node[key] = [
+                    _scalar(rng, scalar_size) for _ in range(list_length)
+                ]
+            else:
+                node[key] = [mapping(level + 1) for _ in range(list_length)]
+        return node
+
+    return mapping(1)
+
+
+def _manifest(index: int, kind: str, containers: int, env_vars: int,
+              rng: random.Random) -> Dict[str, Any]:
+    name = f"app{index}"
+    metadata = {
+        "name": name,
+        "namespace": f"team{index % 7}",
+        "labels": {
+            "app": name,
+            "tier": rng.choice(("frontend", "backend", "worker"))
+        },
+    }
+    if kind == "Service":
+        return {
+            "apiVersion": "v1",
+            "kind": kind,
+            "metadata": metadata,
+            "spec": {
+                "selector": {
+                    "app": name
+                },
+                "ports": [{
+                    "port": 80,
+                    "targetPort": 8080,
+                    "protocol": "TCP"
+                }],
+            },
+        }
+    if kind == "ConfigMap":
+        return {
+            "apiVersion": "v1",
+            "kind": kind,
+            "metadata": metadata,
+            "data": {
+                f"SETTING_{var}": f"value-{rng.randrange(1000)}"
+                for var in range(env_vars * 2)
+            },
+        }
+    return {
+        "apiVersion": "apps/v1",
+        "kind": kind,
+        "metadata": metadata,
+        "spec": {
+            "replicas": index % 5 + 1,
+            "selector": {
+                "matchLabels": {
+                    "app": name
+                }
+            },
+            "template": {
+                "metadata": {
+                    "labels": {
+                        "app": name
+                    }
+                },
+                "spec": {
+                    "containers": [{
+                        "name": f"{name}-{container}",
+                        "image": f"registry/{name}:1.{index % 10}.{container}",
+                        "ports": [{
+                            "containerPort": 8080 + container,
+                            "protocol": "TCP"
+                        }],
+                        "env": [{
+                            "name": f"VAR{var}",
+                            "value": str(var)
+                        } for var in range(env_vars)],
+                        # Shared by most containers, as in real manifests
+                        "resources": {
+                            "limits": {
+                                "cpu": "500m",
+                                "memory": "256Mi"
+                            },
+                            "requests": {
+                                "cpu": "100m",
+                                "memory": "128Mi"
+                            },
+                        },
+                    } for container in range(containers)]
+                }
+            },
+        },
+    }
+
+
+def generate_manifests(count: int,
+                       containers: int = 1,
+                       env_vars: int = 5,
+                       kinds: tuple = KINDS,
+                       seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Builds `count` Kubernetes-like manifests. The kinds are used in turn: Deployments with
+    `containers` containers of `env_vars` variables each, Services, and ConfigMaps.
+
+    Parameters:
+    - count (int): Number of manifests.
+    - containers (int, optional): Containers per Deployment.
+    - env_vars (int, optional): Environment variables per container.
+    - kinds (tuple, optional): Kinds to use in turn, out of KINDS.
+    - seed (int, optional): Seed of the random choices.
+
+    Returns:
+    - List[Dict[str, Any]]: The manifests.
+    """
+    rng = random.Random(seed)
+    return [
+        _manifest(index, kinds[index % len(kinds)], containers, env_vars, rng)
+        for index in range(count)
+    ]
+
+
+def generate_documents(count: int, seed: int = 0,
+                       **tree_options: Any) -> List[Dict[str, Any]]:
+    """
+    Builds `count` documents with generate_tree, each with its own seed.
+    """
+    return [
+        generate_tree(seed=seed + index, **tree_options)
+        for index in range(count)
+    ]
+
+
+def dump_documents(documents: List[Any], data_format: str) -> str:
+    """
+    Writes documents as a YAML stream, a JSON array, or JSON Lines.
+
+    Parameters:
+    - documents (List[Any]): The documents.
+    - data_format (str): 'yaml', 'json' or 'jsonl'.
+
+    Returns:
+    - str: The text of the input file.
+    """
+    if data_format == "yaml":
+        return yaml.dump_all(documents,
+                             Dumper=getattr(yaml, "CSafeDumper",
+                                            yaml.SafeDumper),
+                             sort_keys=False)
+    if data_format == "json":
+        return json.dumps(documents[0] if len(documents) == 1 else documents,
+                          indent=2)
+    if data_format == "jsonl":
+        return "".join(json.dumps(document) + "\n" for document in documents)
+    raise ValueError(
+        f"Unknown format: {data_format}. Supported formats: {', '.join(DATA_FORMATS)}"
+    )
@@ -0,0 +1,362 @@
+"""
+Timed benchmarks of each stage of the pipeline, on generated inputs of growing size.
+
+Run with `python -m benchmarks.suite --output report.json`, and compare two commits with
+`python -m benchmarks.suite --compare baseline.json`. See README.md for the report format.
+"""
+import argparse
+import gc
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import (Any, Callable, Dict, Final, List, NamedTuple, Optional,
+                    Sequence)
+
+from benchmarks.generator import (dump_documents, generate_documents,
+                                  generate_manifests, generate_tree)
+from yaml2dot.converter import convert_yaml_or_json_to_format
+from yaml2dot.data_loader import parse_yaml_or_json_bytes
+from yaml2dot.dot_writer import to_dot_string
+from yaml2dot.json_writer import to_json_string
+from yaml2dot.renderer import iter_render_records, render
+
+REPORT_FORMAT: Final = 1
+DEFAULT_REPEAT: Final = 5
+# Slowdown of a scenario against the baseline, at the same size, reported as a regression
+DEFAULT_TOLERANCE: Final = 1.25
+# Every stage is expected to scale linearly with the number of nodes; the fit of a few timed
+# sizes is noisy, hence the margin
+DEFAULT_MAX_EXPONENT: Final = 1.25
+# --quick divides the sizes by this factor
+QUICK_FACTOR: Final = 10
+
+
+class Input(NamedTuple):
+    """A family of generated inputs, built at a given size."""
+    name: str
+    sizes: Sequence[int]
+    build: Callable[[int], List[Any]]
+
+
+class Stage(NamedTuple):
+    """
+    One step of the pipeline. prepare builds what the step reads from the documents, outside of
+    the timing, and run performs the step.
+    """
+    name: str
+    prepare: Callable[[List[Any]], Any]
+    run: Callable[[Any], Any]
+    # Sizes are multiplied by this for stages much slower than the others
+    scale: float = 1.0
+
+
+class Scenario(NamedTuple):
+    input: Input
+    stage: Stage
+    max_exponent: float = DEFAULT_MAX_EXPONENT
+
+    @property
+    def name(self) -> str:
+        return f"{self.input.name}/{self.stage.name}"
+
+
+class Regression(NamedTuple):
+    """A scenario that got slower than the baseline at one size."""
+    scenario: str
+    size: int
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+INPUTS: Final = {
+    # Multi-document streams of Deployments, Services and ConfigMaps
+    "manifests":
+    Input("manifests", (250, 500, 1000, 2000),
+          lambda size: generate_manifests(size, containers=2)),
+    # Deeply nested configuration documents
+    "tree":
+    Input("tree", (25, 50, 100, 200),
+          lambda size: generate_documents(size, depth=4, breadth=4)),
+    # One document of long lists of scalars and of mappings
+    "lists":
+    Input("lists", (2500, 5000, 10000, 20000),
+          lambda size: [generate_tree(depth=2, breadth=4, list_length=size)]),
+}
+
+
+def _encode(documents: List[Any], data_format: str) -> bytes:
+    return dump_documents(documents, data_format).encode()
+
+
+STAGES: Final = {
+    "load_yaml":
+    Stage("load_yaml", lambda documents: _encode(documents, "yaml"),
+          lambda text: parse_yaml_or_json_bytes(text, "yaml"), 0.25),
+    "load_jsonl":
+    Stage("load_jsonl", lambda documents: _encode(documents, "jsonl"),
+          lambda text: parse_yaml_or_json_bytes(text, "jsonl")),
+    "traverse":
+    Stage("traverse", lambda documents: documents,
+          lambda documents: sum(1 for _ in iter_render_records(documents))),
+    "render_compact":
+    Stage("render_compact", lambda documents: documents,
+          lambda documents: render(documents, compact=True)),
+    "render_networkx":
+    Stage("render_networkx", lambda documents: documents, render),
+    "dot_native":
+    Stage("dot_native", lambda documents: render(documents, compact=True),
+          to_dot_string),
+    "dot_pydot":
+    Stage("dot_pydot", render,
+          lambda graph: to_dot_string(graph, backend="pydot"), 0.25),
+    "json":
+    Stage("json", lambda documents: render(documents, compact=True),
+          to_json_string),
+    "end_to_end":
+    Stage(
+        "end_to_end", lambda documents: _encode(documents, "yaml"),
+        lambda text: convert_yaml_or_json_to_format(
+            parse_yaml_or_json_bytes(text, "yaml")[0]), 0.25),
+}
+
+SCENARIOS: Final = [
+    *(Scenario(INPUTS["manifests"], stage) for stage in STAGES.values()),
+    *(Scenario(INPUTS[name], STAGES[stage]) for name in ("tree", "lists")
+      for stage in ("load_jsonl", "traverse", "render_compact",
+                    "dot_native", "json")),
+]
+
+
+def time_call(function: Callable[[], Any],
+              repeat: int = DEFAULT_REPEAT) -> List[float]:
+    """
+    Times a call `repeat` times with the garbage collector disabled, as timeit does.
+
+    Returns:
+    - List[float]: The duration of each call in seconds.
+    """
+    timings = []
+    enabled = gc.isenabled()
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        finally:
+            if enabled:
+                gc.enable()
+    return timings
+
+
+def scaling_exponent(sizes: Sequence[float], timings: Sequence[float]) -> float:
+    """
+    Least squares slope of log(time) against log(size). 1.0 means linear scaling.
+    """
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(timing) for timing in timings]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    variance = sum((x - mean_x)**2 for x in xs)
+    return covariance / variance
+
+
+def run_scenario(scenario: Scenario,
+                 repeat: int = DEFAULT_REPEAT,
+                 quick: bool = False) -> Dict[str, Any]:
+    """
+    Times a scenario at each size of its input.
+
+    Returns:
+    - Dict[str, Any]: The report entry of the scenario: its input, stage, the timings at each
+      size and the scaling exponent of the fastest timings against the number of nodes.
+    """
+    results = []
+    for size in scenario.input.sizes:
+        size = max(1, round(size * scenario.stage.scale /
+                            (QUICK_FACTOR if quick else 1)))
+        documents = scenario.input.build(size)
+        state = scenario.stage.prepare(documents)
+        timings = time_call(lambda: scenario.stage.run(state), repeat)
+        results.append({
+            "size": size,
+            "nodes": render(documents, compact=True).number_of_nodes(),
+            "min": min(timings),
+            "median": statistics.median(timings),
+        })
+    return {
+        "input": scenario.input.name,
+        "stage": scenario.stage.name,
+        "results": results,
+        "exponent": scaling_exponent([result["nodes"] for result in results],
+                                     [result["min"] for result in results]),
+        "max_exponent": scenario.max_exponent,
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"],
+                              cwd=Path(__file__).parent,
+                              capture_output=True,
+                              text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(scenarios: Sequence[Scenario] = SCENARIOS,
+              repeat: int = DEFAULT_REPEAT,
+              quick: bool = False,
+              on_scenario: Optional[Callable[[str, Dict[str, Any]],
+                                             None]] = None) -> Dict[str, Any]:
+    """
+    Runs scenarios and collects their results into a report that json.dump can write.
+
+    Parameters:
+    - scenarios (Sequence[Scenario], optional): The scenarios to run. Defaults to SCENARIOS.
+    - repeat (int, optional): Timed calls per size.
+    - quick (bool, optional): Run at a tenth of the sizes, e.g. to check the suite works.
+    - on_scenario (Callable[[str, Dict[str, Any]], None], optional): Called with the name and
+      report entry of each scenario when it is done.
+
+    Returns:
+    - Dict[str, Any]: The report.
+    """
+    report: Dict[str, Any] = {
+        "format": REPORT_FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "quick": quick,
+        "scenarios": {},
+    }
+    for scenario in scenarios:
+        entry = run_scenario(scenario, repeat, quick)
+        report["scenarios"][scenario.name] = entry
+        if on_scenario is not None:
+            on_scenario(scenario.name, entry)
+    return report
+
+
+def exponent_failures(report: Dict[str, Any]) -> List[str]:
+    """
+    Returns the names of the scenarios whose scaling exponent exceeds their maximum.
+    """
+    return [
+        name for name, entry in report["scenarios"].items()
+        if entry["exponent"] > entry["max_exponent"]
+    ]
+
+
+def compare_reports(baseline: Dict[str, Any],
+                    current: Dict[str, Any],
+                    tolerance: float = DEFAULT_TOLERANCE) -> List[Regression]:
+    """
+    Compares the fastest timings of two reports, scenario by scenario and size by size.
+    Scenarios and sizes found in only one of the reports are skipped.
+
+    Parameters:
+    - baseline (Dict[str, Any]): The report to compare against.
+    - current (Dict[str, Any]): The new report.
+    - tolerance (float, optional): Slowdown ratio above which a timing is a regression.
+
+    Returns:
+    - List[Regression]: The timings that got slower by more than the tolerance.
+    """
+    regressions = []
+    for name, entry in current["scenarios"].items():
+        baseline_entry = baseline["scenarios"].get(name)
+        if baseline_entry is None:
+            continue
+        baseline_timings = {
+            result["size"]: result["min"]
+            for result in baseline_entry["results"]
+        }
+        for result in entry["results"]:
+            before = baseline_timings.get(result["size"])
+            if before is not None and result["min"] > before * tolerance:
+                regressions.append(
+                    Regression(name, result["size"], before, result["min"]))
+    return regressions
+
+
+def _print_entry(name: str, entry: Dict[str, Any]) -> None:
+    for result in entry["results"]:
+        print(f"{name:<28} size={result['size']:>6}  nodes={result['nodes']:>8}  "
+              f"min={result['min'] * 1000:9.2f} ms  median={result['median'] * 1000:9.2f} ms",
+              file=sys.stderr)
+    print(f"{name:<28} scaling exponent {entry['exponent']:.2f} "
+          f"(max {entry['max_exponent']:.2f})",
+          file=sys.stderr)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite",
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        default=[],
+        help="Run only the scenarios whose name contains this, e.g. 'manifests/' or 'dot_'. "
+        "Can be repeated.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="Timed calls per size.")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"Run at 1/{QUICK_FACTOR} of the sizes.")
+    parser.add_argument("--output", type=Path,
+                        help="Write the JSON report to this file.")
+    parser.add_argument("--compare", type=Path, metavar="BASELINE",
+                        help="Report timings slower than this earlier report.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Slowdown ratio against the baseline that fails the run.")
+    parser.add_argument("--no-exponent-check", action="store_true",
+                        help="Do not fail on scaling exponents above their maximum.")
+    args = parser.parse_args(argv)
+
+    scenarios = [
+        scenario for scenario in SCENARIOS
+        if not args.scenario or any(pattern in scenario.name
+                                    for pattern in args.scenario)
+    ]
+    if not scenarios:
+        parser.error("No scenario matches.")
+    report = run_suite(scenarios, args.repeat, args.quick, _print_entry)
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    failed = False
+    if not args.no_exponent_check:
+        for name in exponent_failures(report):
+            print(f"FAIL {name}: scaling exponent "
+                  f"{report['scenarios'][name]['exponent']:.2f} is above "
+                  f"{report['scenarios'][name]['max_exponent']:.2f}",
+                  file=sys.stderr)
+            failed = True
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text())
+        for regression in compare_reports(baseline, report, args.tolerance):
+            print(f"FAIL {regression.scenario} at size {regression.size}: "
+                  f"{regression.baseline * 1000:.2f} ms -> {regression.current * 1000:.2f} ms "
+                  f"({regression.ratio:.2f}x)",
+                  file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from yaml2dot import batch
+from yaml2dot.__main__ import cli
+from yaml2dot.batch import (MANIFEST_NAME, BatchInput, collect_inputs,
+                            read_manifest, render_file, run_batch)
+
+OPTIONS = {"output_format": "dot", "rankdir": "LR", "shape": "rounded"}
+
+
+@pytest.fixture
+def inputs_dir(temp_dir):
+    inputs = temp_dir / "inputs"
+    (inputs / "nested").mkdir(parents=True)
+    (inputs / "a.yaml").write_text("key: value\n")
+    (inputs / "b.json").write_text('{"list": [1, 2]}')
+    (inputs / "nested" / "c.yml").write_text("- x\n- y\n")
+    (inputs / "notes.txt").write_text("not an input")
+    return inputs
+
+
+def test_collect_inputs_from_directory(inputs_dir, temp_dir):
+    output_dir = temp_dir / "out"
+    inputs = collect_inputs([str(inputs_dir)], output_dir)
+
+    assert inputs == [
+        BatchInput(inputs_dir / "a.yaml", output_dir / "a.dot"),
+        BatchInput(inputs_dir / "b.json", output_dir / "b.dot"),
+        BatchInput(inputs_dir / "nested" / "c.yml",
+                   output_dir / "nested" / "c.dot"),
+    ]
+
+
+def test_collect_inputs_from_glob_and_file(inputs_dir, temp_dir):
+    output_dir = temp_dir / "out"
+    inputs = collect_inputs(
+        [str(inputs_dir / "**" / "*.yml"),
+         str(inputs_dir / "notes.txt")], output_dir, "json")
+
+    assert inputs == [
+        BatchInput(inputs_dir / "nested" / "c.yml", output_dir / "c.json"),
+        BatchInput(inputs_dir / "notes.txt", output_dir / "notes.json"),
+    ]
+
+
+def test_collect_inputs_errors(inputs_dir, temp_dir):
+    with pytest.raises(ValueError, match="Input not found"):
+        collect_inputs([str(inputs_dir / "missing.yaml")], temp_dir)
+
+    (inputs_dir / "a.json").write_text("{}")
+    with pytest.raises(ValueError, match="would both be written"):
+        collect_inputs([str(inputs_dir)], temp_dir)
+
+
+def test_render_file_reports_errors(temp_dir):
+    bad_file = temp_dir / "bad.yaml"
+    bad_file.write_text("a: [1\n")
+
+    result = render_file(str(bad_file), str(temp_dir / "bad.dot"), **OPTIONS)
+
+    assert not result.ok
+    assert result.error.startswith("ParserError")
+    assert not (temp_dir / "bad.dot").exists()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch(inputs_dir, temp_dir, workers):
+    output_dir = temp_dir / "out"
+    inputs = collect_inputs([str(inputs_dir)], output_dir)
+    manifest_path = output_dir / MANIFEST_NAME
+    results = []
+
+    summary = run_batch(inputs,
+                        OPTIONS,
+                        manifest_path,
+                        workers=workers,
+                        on_result=results.append)
+
+    assert (summary.rendered, summary.skipped, summary.failures) == (3, 0, [])
+    assert len(results) == 3
+    assert "key -> " in (output_dir / "a.dot").read_text().replace('"', "")
+    assert (output_dir / "nested" / "c.dot").exists()
+    assert set(read_manifest(manifest_path)) == {
+        str(batch_input.input)
+        for batch_input in inputs
+    }
+
+
+def _render_or_crash(input_path, output_path):
+    # Runs in a worker process: the worker rendering 03.yaml dies
+    if input_path.endswith("03.yaml"):
+        os._exit(1)
+    return render_file(input_path, output_path, **batch._worker_options)
+
+
+def test_run_batch_survives_a_crashed_worker(monkeypatch, temp_dir):
+    inputs_dir = temp_dir / "inputs"
+    inputs_dir.mkdir()
+    for number in range(20):
+        (inputs_dir / f"{number:02}.yaml").write_text(f"key: {number}\n")
+    inputs = collect_inputs([str(inputs_dir)], temp_dir / "out")
+    monkeypatch.setattr(batch, "_render_in_worker", _render_or_crash)
+
+    summary = run_batch(inputs, OPTIONS, temp_dir / "out" / MANIFEST_NAME,
+                        workers=4)
+
+    assert summary.rendered == 19
+    assert [failure.input for failure in summary.failures
+            ] == [str(inputs_dir / "03.yaml")]
+    assert summary.failures[0].error.startswith("BrokenProcessPool")
+
+
+def test_run_batch_resumes(inputs_dir, temp_dir):
+    output_dir = temp_dir / "out"
+    inputs = collect_inputs([str(inputs_dir)], output_dir)
+    manifest_path = output_dir / MANIFEST_NAME
+    run_batch(inputs, OPTIONS, manifest_path, workers=1)
+
+    # A changed input, a removed output and changed options are rendered again
+    (inputs_dir / "a.yaml").write_text("key: other value\n")
+    (output_dir / "b.dot").unlink()
+    summary = run_batch(inputs, OPTIONS, manifest_path, workers=1)
+    assert (summary.rendered, summary.skipped) == (2, 1)
+
+    summary = run_batch(inputs, OPTIONS, manifest_path, workers=1)
+    assert (summary.rendered, summary.skipped) == (0, 3)
+
+    summary = run_batch(inputs, {
+        **OPTIONS, "rankdir": "TB"
+    },
+                        manifest_path,
+                        workers=1)
+    assert (summary.rendered, summary.skipped) == (3, 0)
+
+    summary = run_batch(inputs,
+                        OPTIONS,
+                        manifest_path,
+                        workers=1,
+                        resume=False)
+    assert (summary.rendered, summary.skipped) == (3, 0)
+    assert len(manifest_path.read_text().splitlines()) == 3
+
+
+def test_read_manifest_skips_truncated_line(temp_dir):
+    manifest_path = temp_dir / MANIFEST_NAME
+    manifest_path.write_text(
+        json.dumps({
+            "input": "a.yaml",
+            "ok": True
+        }) + '\n{"input": "b.ya')
+
+    assert list(read_manifest(manifest_path)) == ["a.yaml"]
+
+
+def test_batch_command(inputs_dir, temp_dir):
+    (inputs_dir / "bad.yaml").write_text("a: [1\n")
+    output_dir = temp_dir / "out"
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli,
+        ["batch", str(inputs_dir), "--output-dir",
+         str(output_dir), "--workers", "2"])
+    assert result.exit_code == 1
+    assert f"Failed {inputs_dir / 'bad.yaml'}: ParserError" in result.output
+    assert "Rendered 3, skipped 0 already rendered, failed 1." in result.output
+
+    (inputs_dir / "bad.yaml").unlink()
+    result = runner.invoke(
+        cli,
+        ["batch", str(inputs_dir), "--output-dir",
+         str(output_dir), "--workers", "2"])
+    assert result.exit_code == 0
+    assert "Rendered 0, skipped 3 already rendered, failed 0." in result.output
+
+
+def test_batch_command_usage_errors(temp_dir):
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["batch", "--output-dir", str(temp_dir)])
+    assert result.exit_code == 2
+    assert "No inputs given" in result.output
+
+    result = runner.invoke(
+        cli,
+        ["batch",
+         str(temp_dir / "missing.yaml"), "--output-dir",
+         str(temp_dir)])
+    assert result.exit_code == 2
+    assert "Input not found" in result.output
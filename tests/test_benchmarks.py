@@ -0,0 +1,99 @@
+import json
+
+import pytest
+import yaml
+
+from benchmarks.generator import (dump_documents, generate_documents,
+                                  generate_manifests, generate_tree)
+from benchmarks.suite import (STAGES, Input, Scenario, compare_reports,
+                              exponent_failures, run_scenario,
+                              scaling_exponent)
+
+
+def _depth(data):
+    if isinstance(data, dict):
+        return 1 + max((_depth(value) for value in data.values()), default=0)
+    if isinstance(data, list):
+        return max((_depth(item) for item in data), default=0)
+    return 0
+
+
+def test_generate_tree_shape_and_determinism():
+    tree = generate_tree(depth=3, breadth=5, list_length=4, scalar_size=12, seed=1)
+
+    assert tree == generate_tree(depth=3, breadth=5, list_length=4, scalar_size=12, seed=1)
+    assert tree != generate_tree(depth=3, breadth=5, list_length=4, scalar_size=12, seed=2)
+    assert len(tree) == 5
+    assert _depth(tree) == 3
+    lists = [value for value in tree.values() if isinstance(value, list)]
+    assert all(len(value) == 4 for value in lists)
+    strings = [value for value in tree.values() if isinstance(value, str)]
+    assert all(len(value) == 12 for value in strings)
+
+
+def test_generate_manifests_uses_kinds_in_turn():
+    manifests = generate_manifests(6, containers=3, env_vars=2)
+
+    assert [manifest["kind"] for manifest in manifests] == [
+        "Deployment", "Service", "ConfigMap"
+    ] * 2
+    containers = manifests[0]["spec"]["template"]["spec"]["containers"]
+    assert len(containers) == 3
+    assert len(containers[0]["env"]) == 2
+
+
+@pytest.mark.parametrize("data_format", ["yaml", "json", "jsonl"])
+def test_dump_documents_round_trips(data_format):
+    documents = generate_documents(3, depth=2, breadth=3)
+    text = dump_documents(documents, data_format)
+
+    if data_format == "yaml":
+        assert list(yaml.safe_load_all(text)) == documents
+    elif data_format == "json":
+        assert json.loads(text) == documents
+    else:
+        assert [json.loads(line) for line in text.splitlines()] == documents
+
+
+def test_scaling_exponent():
+    assert scaling_exponent([1, 2, 4], [3, 6, 12]) == pytest.approx(1.0)
+    assert scaling_exponent([1, 2, 4], [1, 4, 16]) == pytest.approx(2.0)
+
+
+def test_run_scenario_reports_each_size():
+    scenario = Scenario(
+        Input("small", (1, 2), lambda size: generate_documents(size, depth=2)),
+        STAGES["render_compact"])
+
+    entry = run_scenario(scenario, repeat=2)
+
+    assert [result["size"] for result in entry["results"]] == [1, 2]
+    assert entry["results"][0]["nodes"] < entry["results"][1]["nodes"]
+    assert all(0 < result["min"] <= result["median"] for result in entry["results"])
+    assert entry["stage"] == "render_compact"
+
+
+def test_compare_reports_and_exponent_failures():
+
+    def report(timings, exponent=1.0):
+        return {
+            "scenarios": {
+                "small/render_compact": {
+                    "results": [{
+                        "size": size,
+                        "min": timing
+                    } for size, timing in timings],
+                    "exponent": exponent,
+                    "max_exponent": 1.25
+                }
+            }
+        }
+
+    baseline = report([(1, 0.010), (2, 0.020)])
+    current = report([(1, 0.011), (2, 0.030), (4, 0.100)], exponent=1.5)
+
+    regressions = compare_reports(baseline, current, tolerance=1.25)
+    assert [(regression.size, regression.ratio)
+            for regression in regressions] == [(2, pytest.approx(1.5))]
+    assert exponent_failures(current) == ["small/render_compact"]
+    assert exponent_failures(baseline) == []
@@ -0,0 +1,210 @@
+import os
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from yaml2dot.__main__ import render_yaml
+from yaml2dot.cache import (CacheTier, RenderCache, TierStats,
+                            code_fingerprint, decode_documents,
+                            encode_documents)
+from yaml2dot.converter import convert_yaml_or_json_to_format
+
+
+@pytest.fixture
+def yaml_file(temp_dir):
+    path = temp_dir / "input.yaml"
+    path.write_text("a: b\n---\nc: [d, e]\n")
+    return path
+
+
+def test_cache_tier_evicts_least_recently_used(temp_dir):
+    tier = CacheTier(temp_dir / "tier", max_bytes=10, suffix=".out")
+    tier.put("first", b"1234")
+    tier.put("second", b"1234")
+    # Reading an entry makes it the most recently used one
+    os.utime(temp_dir / "tier" / "first.out", ns=(1, 1))
+    os.utime(temp_dir / "tier" / "second.out", ns=(2, 2))
+    assert tier.get("first") == b"1234"
+
+    tier.put("third", b"1234")
+
+    assert tier.get("second") is None
+    assert tier.get("first") == b"1234"
+    assert tier.get("third") == b"1234"
+    assert tier.stats() == TierStats(hits=3, misses=1, stores=3, evictions=1)
+
+    tier.put("too-large", b"12345678901")
+    assert tier.get("too-large") is None
+
+
+def test_cache_tier_scans_only_over_the_limit(monkeypatch, temp_dir):
+    (temp_dir / "tier").mkdir()
+    (temp_dir / "tier" / "old.out").write_bytes(b"1234")
+    scans = []
+    scandir = os.scandir
+
+    def counting_scandir(path):
+        scans.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr("yaml2dot.cache.os.scandir", counting_scandir)
+    tier = CacheTier(temp_dir / "tier", max_bytes=10, suffix=".out")
+    assert len(scans) == 1
+
+    tier.put("first", b"1234")
+    assert len(scans) == 1
+
+    tier.put("second", b"1234")
+    assert len(scans) == 2
+    assert tier.get("old") is None
+    assert tier.stats().evictions == 1
+
+    tier.put("third", b"12")
+    assert len(scans) == 2
+
+
+def test_render_cache_tiers(temp_dir, yaml_file):
+    cache = RenderCache(temp_dir / "cache")
+    expected = convert_yaml_or_json_to_format(
+        list(yaml.safe_load_all(yaml_file.read_text())), rankdir="TB")
+
+    output, backend = cache.convert(yaml_file, "pyyaml", rankdir="TB")
+    assert output == expected
+    assert backend == "pyyaml"
+    assert cache.stats() == {
+        "documents": TierStats(0, 1, 1, 0),
+        "outputs": TierStats(0, 1, 1, 0)
+    }
+
+    # Same options: served from the output tier without parsing
+    assert cache.convert(yaml_file, "pyyaml", rankdir="TB",
+                         workers=2)[0] == expected
+    assert cache.stats()["outputs"].hits == 1
+    assert cache.stats()["documents"] == TierStats(0, 1, 1, 0)
+
+    # Other options: the parsed documents are reused
+    output, _ = cache.convert(yaml_file, "pyyaml", rankdir="LR")
+    assert output == convert_yaml_or_json_to_format(
+        list(yaml.safe_load_all(yaml_file.read_text())))
+    assert cache.stats()["documents"].hits == 1
+
+
+def test_render_cache_keys_on_content(temp_dir, yaml_file):
+    cache = RenderCache(temp_dir / "cache")
+    cache.convert(yaml_file, "pyyaml")
+
+    yaml_file.write_text("x: y\n")
+    output, _ = cache.convert(yaml_file, "pyyaml")
+
+    assert '"0__x" -> "0__x__y"' in output
+    assert cache.stats()["outputs"].hits == 0
+
+
+def test_render_cache_does_not_store_errors(temp_dir):
+    bad_file = temp_dir / "bad.yaml"
+    bad_file.write_text("a: [1\n")
+    cache = RenderCache(temp_dir / "cache")
+
+    with pytest.raises(yaml.YAMLError):
+        cache.convert(bad_file, "pyyaml")
+    assert cache.stats()["documents"].stores == 0
+
+
+def test_render_yaml_with_cache(temp_dir, yaml_file):
+    runner = CliRunner()
+    outputs = []
+    for cache_args in ([], [f"--cache-dir={temp_dir / 'cache'}"],
+                       [f"--cache-dir={temp_dir / 'cache'}"]):
+        dot_file = temp_dir / "output.dot"
+        result = runner.invoke(render_yaml, [
+            f"--input-file={yaml_file}", f"--output-file={dot_file}",
+            "--cache-stats"
+        ] + cache_args)
+        assert result.exit_code == 0
+        outputs.append(dot_file.read_text())
+
+    assert outputs[0] == outputs[1] == outputs[2]
+    assert "Cache outputs: 1 hits, 0 misses" in result.output
+
+    result = runner.invoke(render_yaml, [
+        f"--input-file={yaml_file}", "--output-file=-", "--stream",
+        f"--cache-dir={temp_dir / 'cache'}", "--cache-stats"
+    ])
+    assert result.exit_code == 0
+    assert "Cache documents: 1 hits" in result.output
+
+
+def test_render_cache_auto_parser_reads_what_json_accepts(temp_dir):
+    json_file = temp_dir / "input.json"
+    json_file.write_text('{"a": NaN, "b": 1e400}')
+    cache = RenderCache(temp_dir / "cache")
+
+    data, _ = cache.load(json_file, "auto")
+    assert data["a"] != data["a"]
+    assert data["b"] == float("inf")
+    assert cache.load(json_file, "auto")[0]["b"] == float("inf")
+
+
+def test_encode_documents_round_trips_safe_load_values():
+    documents = list(
+        yaml.safe_load_all(r"""
+timestamp: 2001-12-14t21:59:43.10-05:00
+naive: 2001-12-14 21:59:43.10
+date: 2002-12-14
+binary: !!binary R0lGODlhDAAMAIQAAP//9/X1
+set: !!set {x, y}
+omap: !!omap [{k: 1}, {j: 2}]
+1: integer key
+null: null key
+2002-12-14: date key
+float: 1.5
+nan: .nan
+large: 123456789012345678901234567890
+surrogate: "\ud800"
+"\0yaml2dot": looks like a tag
+---
+["\0yaml2dot", {"\0yaml2dot": [map, []]}]
+"""))
+
+    decoded = decode_documents(encode_documents(documents))
+
+    assert decoded[0].pop("nan") != decoded[0]["float"]
+    documents[0].pop("nan")
+    assert decoded == documents
+    assert type(decoded[0]["omap"][0]) is tuple
+    assert type(decoded[0]["naive"]) is type(documents[0]["naive"])
+
+
+def test_encode_documents_rejects_other_types():
+    with pytest.raises(TypeError):
+        encode_documents({"a": object()})
+
+
+def test_render_cache_documents_are_json(temp_dir, yaml_file):
+    cache = RenderCache(temp_dir / "cache")
+    data, _ = cache.load(yaml_file, "pyyaml")
+
+    entries = list((temp_dir / "cache" / "documents").iterdir())
+    assert [entry.suffix for entry in entries] == [".json"]
+    assert decode_documents(entries[0].read_bytes()) == data
+
+
+def test_code_fingerprint_changes_with_the_source(monkeypatch, temp_dir):
+    fingerprint = code_fingerprint()
+    assert fingerprint == code_fingerprint()
+
+    package_dir = temp_dir / "yaml2dot"
+    package_dir.mkdir()
+    (package_dir / "cache.py").write_text("a = 1\n")
+    monkeypatch.setattr("yaml2dot.cache.__file__", str(package_dir / "cache.py"))
+    code_fingerprint.cache_clear()
+    try:
+        edited = code_fingerprint()
+        (package_dir / "cache.py").write_text("a = 2\n")
+        code_fingerprint.cache_clear()
+        assert code_fingerprint() not in (fingerprint, edited)
+    finally:
+        monkeypatch.undo()
+        code_fingerprint.cache_clear()
+    assert code_fingerprint() == fingerprint
@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+from networkx.readwrite import json_graph
+
+from yaml2dot.compact_graph import CompactGraph
+from yaml2dot.dot_writer import to_dot_string
+from yaml2dot.renderer import render
+
+
+@pytest.fixture(params=[
+    "complex.yaml", "duplicate_names_deployment.yaml", "k8-deployment.yaml",
+    "large_graph.yaml", "list.yaml", "mixed.yaml", "nested.yaml",
+    "sample_json.json", "simple.yaml", "small_graph.yaml"
+])
+def sample_data(request):
+    examples_dir = Path(__file__).resolve().parent.parent / "examples"
+    with open(examples_dir / request.param, "r") as data_file:
+        if request.param.endswith(".json"):
+            return json.load(data_file)
+        return list(yaml.safe_load_all(data_file))
+
+
+@pytest.mark.parametrize("multi_view", [False, True])
+def test_compact_render_matches_networkx(sample_data, multi_view):
+    nx_graph = render(sample_data, multi_view=multi_view)
+    compact_graph = render(sample_data, multi_view=multi_view, compact=True)
+
+    assert isinstance(compact_graph, CompactGraph)
+    assert to_dot_string(compact_graph) == to_dot_string(nx_graph)
+    assert json_graph.node_link_data(
+        compact_graph.to_networkx()) == json_graph.node_link_data(nx_graph)
+
+
+def test_attribute_sets_are_interned():
+    graph = CompactGraph()
+    attrs = {"shape": "box"}
+    graph.add_node("a", "a", attrs)
+    graph.add_node("b", "b", attrs)
+    graph.add_node("c", "c", {"shape": "box"})
+    graph.add_edge("a", "b", {"penwidth": "2.0"})
+    graph.add_edge("a", "c", {"penwidth": "2.0"})
+
+    assert len(graph._attr_sets) == 2
+    assert list(graph.nodes(data=True))[2] == ("c", {
+        "label": "c",
+        "shape": "box"
+    })
+
+
+def test_parallel_edges_follow_networkx_order():
+    graph = CompactGraph()
+    graph.add_edge("a", "b")
+    graph.add_edge("a", "c")
+    graph.add_edge("a", "b")
+    graph.add_edge("c", "a")
+
+    assert list(graph.edges(keys=True)) == list(
+        graph.to_networkx().edges(keys=True))
+    assert graph.number_of_edges() == 4
@@ -1,9 +1,13 @@
+import io
 import json
 
 import networkx as nx
 import pytest
 
-from yaml2dot.converter import convert_yaml_or_json_to_format
+from yaml2dot.converter import (convert_yaml_or_json_to_format,
+                                export_yaml_or_json,
+                                stream_yaml_or_json_to_dot)
+from yaml2dot.profiling import Profiler
 
 # Define sample YAML and JSON data for testing
 sample_yaml_data = {
@@ -116,4 +120,52 @@ def test_convert_with_specific_shape():
 
 def test_read_list_inputs():
     raw_list = [{'apiVersion': 'v1', 'kind': 'Namespace', 'metadata': {'name': 'example-namespace'}}, {'apiVersion': 'v1', 'kind': 'ConfigMap', 'metadata': {'name': 'example-config', 'namespace': 'example-namespace'}, 'data': {'application.properties': 'property1=value1\nproperty2=value2\n'}}, {'apiVersion': 'apps/v1', 'kind': 'Deployment', 'metadata': {'name': 'example-deployment', 'namespace': 'example-namespace'}, 'spec': {'replicas': 3, 'selector': {'matchLabels': {'app': 'example'}}, 'template': {'metadata': {'labels': {'app': 'example'}}, 'spec': {'containers': [{'name': 'example-container', 'image': 'example-image:latest', 'ports': [{'containerPort': 8080}], 'envFrom': [{'configMapRef': {'name': 'example-config'}}]}]}}}}, {'apiVersion': 'v1', 'kind': 'Service', 'metadata': {'name': 'example-service', 'namespace': 'example-namespace'}, 'spec': {'selector': {'app': 'example'}, 'ports': [{'protocol': 'TCP', 'port': 80, 'targetPort': 8080}], 'type': 'LoadBalancer'}}]
-    assert convert_yaml_or_json_to_format(raw_list)
\ No newline at end of file
+    assert convert_yaml_or_json_to_format(raw_list)
+
+def test_stream_yaml_to_dot():
+    stream = io.StringIO()
+    assert stream_yaml_or_json_to_dot(sample_yaml_data, stream)
+    assert "digraph" in stream.getvalue()
+    assert '"0__key2" -> "0__key2__nested_key"' in stream.getvalue()
+    assert not stream_yaml_or_json_to_dot("key1: value1", io.StringIO())
+
+
+@pytest.mark.parametrize("output_format, stages", [
+    ("dot", ["render", "serialize"]),
+    ("json", ["render", "serialize"]),
+    ("tsv", ["export"]),
+])
+def test_convert_with_profiler(output_format, stages):
+    profiler = Profiler()
+    output = convert_yaml_or_json_to_format(sample_yaml_data,
+                                            output_format=output_format,
+                                            profiler=profiler)
+    assert list(profiler.stages) == stages
+    assert profiler.counters["documents"] == 1
+    assert profiler.counters["bytes_written"] == len(output.encode())
+    assert profiler.counters["nodes"] == 9
+    assert profiler.counters["edges"] == 6
+
+
+def test_stream_yaml_to_dot_with_profiler():
+    profiler = Profiler()
+    stream_yaml_or_json_to_dot(sample_yaml_data, io.StringIO(), profiler=profiler)
+    assert list(profiler.stages) == ["stream"]
+    assert profiler.counters == {
+        "documents": 1,
+        "duplicate_paths": 0,
+        "nodes": 9,
+        "edges": 6
+    }
+
+
+@pytest.mark.parametrize("output_format", ["tsv", "graphml"])
+def test_export_yaml_or_json_with_profiler(output_format):
+    profiler = Profiler()
+    export_yaml_or_json(sample_yaml_data,
+                        io.StringIO(),
+                        output_format,
+                        profiler=profiler)
+    assert list(profiler.stages) == ["export"]
+    assert profiler.counters["nodes"] == 9
+    assert profiler.counters["edges"] == 6
@@ -6,7 +6,12 @@ import tempfile
 import pytest
 import yaml
 
-from yaml2dot.data_loader import load_yaml_or_json, parse_yaml
+from yaml2dot.data_loader import (AUTO_JSON_PARSERS, JSONStreamError,
+                                  available_parsers, iter_json_array,
+                                  iter_json_lines, iter_yaml_documents,
+                                  load_yaml_or_json,
+                                  load_yaml_or_json_with_parser, parse_yaml,
+                                  parse_yaml_or_json_bytes, resolve_parser)
 
 
 @pytest.fixture
@@ -117,3 +122,195 @@ def test_load_yaml_or_json_invalid_file_extension():
     data = load_yaml_or_json(invalid_file_path)
     assert data is None
     os.remove(invalid_file_path)
+
+
+def test_available_parsers_always_include_pure_python_backends():
+    parsers = available_parsers()
+    assert parsers["yaml"][-1] == "pyyaml"
+    assert parsers["json"][-1] == "json"
+
+
+def test_resolve_parser():
+    assert resolve_parser("yaml", "auto") == available_parsers()["yaml"][0]
+    assert resolve_parser("json", "auto") == [
+        parser for parser in available_parsers()["json"]
+        if parser in AUTO_JSON_PARSERS
+    ][0]
+    assert resolve_parser("json", "json") == "json"
+    with pytest.raises(ValueError):
+        resolve_parser("yaml", "json")
+    with pytest.raises(ValueError):
+        resolve_parser("json", "simdjson")
+
+
+@pytest.mark.parametrize("parser", available_parsers()["yaml"])
+def test_yaml_parsers_agree(temp_yaml_file, parser):
+    data, backend = load_yaml_or_json_with_parser(temp_yaml_file, parser)
+    assert backend == parser
+    assert data == [{'key1': 'value1', 'key2': 'value2'}]
+
+
+@pytest.mark.parametrize("parser", available_parsers()["json"])
+def test_json_parsers_agree(temp_json_file, parser):
+    data, backend = load_yaml_or_json_with_parser(temp_json_file, parser)
+    assert backend == parser
+    assert data == {'key1': 'value1', 'key2': 'value2'}
+
+
+@pytest.mark.parametrize("parser", available_parsers()["json"])
+def test_json_parsers_report_errors(parser):
+    with tempfile.NamedTemporaryFile(delete=False, mode='w',
+                                     suffix=".json") as file:
+        file.write('{"key1": }')
+        temp_json_file = file.name
+
+    assert load_yaml_or_json(temp_json_file, parser) is None
+    os.remove(temp_json_file)
+
+
+def test_iter_yaml_documents_is_lazy():
+    with tempfile.NamedTemporaryFile(delete=False, mode='w',
+                                     suffix=".yaml") as file:
+        file.write("a: 1\n---\nb: 2\n---\nc: d: e\n")
+        temp_yaml_file = file.name
+
+    documents = iter_yaml_documents(temp_yaml_file)
+    assert next(documents) == {'a': 1}
+    assert next(documents) == {'b': 2}
+    with pytest.raises(yaml.YAMLError):
+        next(documents)
+    os.remove(temp_yaml_file)
+
+
+def test_load_yaml_or_json_lazy(temp_yaml_file, temp_json_file):
+    documents, _ = load_yaml_or_json_with_parser(temp_yaml_file, lazy=True)
+    assert not isinstance(documents, list)
+    assert list(documents) == [{'key1': 'value1', 'key2': 'value2'}]
+
+    data, _ = load_yaml_or_json_with_parser(temp_json_file, lazy=True)
+    assert data == {'key1': 'value1', 'key2': 'value2'}
+
+
+def test_iter_json_array_matches_json_load():
+    data = [{"a": [1, 2.5, None]}, "text with ] and ,", 123456789, True, [],
+            {"nested": {"b": "é"}}, -0.5e10]
+    text = json.dumps(data, indent=1)
+    for chunk_size in (1, 3, 7, 64, 1 << 16):
+        assert list(iter_json_array(io.StringIO(text), chunk_size)) == data
+    assert list(iter_json_array(io.StringIO(" [ ] "))) == []
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 9))
+@pytest.mark.parametrize("text", ['[12.75]', '[-2.5e10]', '[1e5]', '[1.5, 2]',
+                                  '[-0.125E-3, 7, true, null]', '[ 3.0 ,-1e+2 ]'])
+def test_iter_json_array_numbers_cut_at_chunk_boundary(text, chunk_size):
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ['{"a": 1}', '[1, 2', '[1 2]', '[1,]', '[1] x'])
+def test_iter_json_array_errors(text):
+    with pytest.raises(JSONStreamError):
+        list(iter_json_array(io.StringIO(text), chunk_size=2))
+
+
+@pytest.fixture
+def temp_jsonl_file():
+    content = '{"key1": "value1"}\n\n{"key2": [1, 2]}\n'
+    with tempfile.NamedTemporaryFile(delete=False, mode='w',
+                                     suffix=".ndjson") as file:
+        file.write(content)
+        file_path = file.name
+    yield file_path
+    os.remove(file_path)
+
+
+@pytest.mark.parametrize("parser", available_parsers()["json"])
+def test_load_json_lines(temp_jsonl_file, parser):
+    expected = [{"key1": "value1"}, {"key2": [1, 2]}]
+    assert load_yaml_or_json(temp_jsonl_file, parser) == expected
+    documents, backend = load_yaml_or_json_with_parser(temp_jsonl_file,
+                                                       parser,
+                                                       lazy=True)
+    assert backend == parser
+    assert list(documents) == expected
+
+
+def test_load_json_lines_invalid_line():
+    with tempfile.NamedTemporaryFile(delete=False, mode='w',
+                                     suffix=".jsonl") as file:
+        file.write('{"a": 1}\n{"b": }\n')
+        temp_jsonl_file = file.name
+
+    assert load_yaml_or_json(temp_jsonl_file) is None
+    documents = iter_json_lines(temp_jsonl_file)
+    assert next(documents) == {"a": 1}
+    with pytest.raises(JSONStreamError, match="line 2"):
+        next(documents)
+    os.remove(temp_jsonl_file)
+
+
+def test_load_json_array_lazy():
+    with tempfile.NamedTemporaryFile(delete=False, mode='w',
+                                     suffix=".json") as file:
+        file.write('\n [{"a": 1}, {"b": 2}]')
+        temp_json_file = file.name
+
+    documents, backend = load_yaml_or_json_with_parser(temp_json_file,
+                                                       lazy=True)
+    assert backend == "json"
+    assert not isinstance(documents, list)
+    assert list(documents) == [{"a": 1}, {"b": 2}]
+    os.remove(temp_json_file)
+
+
+# Accepted by the standard json module but not by orjson
+STDLIB_ONLY_JSON = '{"nan": NaN, "inf": -Infinity, "big": 1e400, "int": 18446744073709551616}'
+
+
+def _assert_stdlib_only_values(document):
+    assert document["nan"] != document["nan"]
+    assert document["inf"] == float("-inf")
+    assert document["big"] == float("inf")
+    assert document["int"] == 2**64
+
+
+@pytest.mark.parametrize("suffix, lazy", [(".json", False), (".jsonl", False),
+                                          (".jsonl", True)])
+def test_auto_parser_reads_what_json_accepts(suffix, lazy):
+    with tempfile.NamedTemporaryFile(delete=False, mode='w',
+                                     suffix=suffix) as file:
+        file.write(STDLIB_ONLY_JSON + "\n")
+        temp_json_file = file.name
+
+    data, backend = load_yaml_or_json_with_parser(temp_json_file, "auto", lazy)
+    documents = list(data) if suffix == ".jsonl" else [data]
+    _assert_stdlib_only_values(documents[0])
+    if not lazy:
+        assert backend == "json"
+    os.remove(temp_json_file)
+
+
+def test_auto_parser_reads_what_json_accepts_from_bytes():
+    content = STDLIB_ONLY_JSON.encode()
+    data, backend = parse_yaml_or_json_bytes(content, "json")
+    _assert_stdlib_only_values(data)
+    assert backend == "json"
+    data, backend = parse_yaml_or_json_bytes(content + b"\n" + content, "jsonl")
+    _assert_stdlib_only_values(data[1])
+    assert backend == "json"
+
+
+@pytest.mark.parametrize("parser", available_parsers()["json"])
+def test_load_json_array_lazy_reports_the_parser(parser):
+    with tempfile.NamedTemporaryFile(delete=False, mode='w',
+                                     suffix=".json") as file:
+        file.write('[{"a": 1}, {"b": 2}]')
+        temp_json_file = file.name
+
+    documents, backend = load_yaml_or_json_with_parser(temp_json_file,
+                                                       parser,
+                                                       lazy=True)
+    # The lazy array reader is the stdlib decoder, so other parsers read the file eagerly
+    assert backend == parser
+    assert list(documents) == [{"a": 1}, {"b": 2}]
+    os.remove(temp_json_file)
@@ -0,0 +1,160 @@
+
+import pytest
+from click.testing import CliRunner
+
+from yaml2dot.__main__ import cli
+from yaml2dot.diff import (ADDED, MODIFIED, NODE_STYLES, REMOVED, DiffSummary,
+                           compare)
+from yaml2dot.renderer import render
+
+
+def statuses(graph):
+    return {
+        node: data.get("color")
+        for node, data in graph.nodes(data=True)
+    }
+
+
+OLD = [{
+    "kind": "Deployment",
+    "spec": {
+        "replicas": 3,
+        "template": {
+            "containers": [{"name": "app", "image": "app:1"},
+                           {"name": "sidecar", "image": "proxy:1"}]
+        },
+        "selector": {"app": "web"},
+    },
+}, {
+    "kind": "Service"
+}]
+
+
+def test_compare_identical_inputs():
+    graph, summary = compare(OLD, [dict(document) for document in OLD])
+
+    assert summary == DiffSummary(0, 0, 0)
+    assert graph.number_of_nodes() == 0
+
+
+def test_compare_reports_changed_paths_and_ancestors():
+    new = [{
+        "kind": "Deployment",
+        "spec": {
+            "replicas": 5,
+            "template": {
+                "containers": [{"name": "app", "image": "app:2"},
+                               {"name": "sidecar", "image": "proxy:1"}]
+            },
+            "selector": {"app": "web"},
+            "paused": True,
+        },
+    }, {
+        "kind": "Service"
+    }]
+
+    graph, summary = compare(OLD, new, document_order="forward")
+    colors = statuses(graph)
+
+    added, removed, modified = "#2e7d32", "#c62828", "#ef6c00"
+    assert colors == {
+        "0__spec": modified,
+        "0__spec__replicas": modified,
+        "0__spec__replicas__5": added,
+        "0__spec__replicas__3": removed,
+        "0__spec__template": modified,
+        "0__spec__template__containers": modified,
+        "0__spec__template__containers__image": modified,
+        "0__spec__template__containers__image__app---2": added,
+        "0__spec__template__containers__image__app---1": removed,
+        "0__spec__paused": added,
+        "0__spec__paused__True": added,
+    }
+    assert summary == DiffSummary(added=4, removed=2, modified=5)
+    # Node ids are the ones render() gives the new input
+    assert set(graph.nodes()) - {
+        "0__spec__replicas__3", "0__spec__template__containers__image__app---1"
+    } <= set(render(new, document_order="forward").nodes)
+    assert ("0__spec", "0__spec__replicas") in set(graph.edges())
+
+
+def test_compare_added_and_removed_documents():
+    graph, summary = compare(OLD[:1], [OLD[0], {"kind": "ConfigMap"}],
+                             document_order="forward")
+    assert set(graph.nodes()) == {"1__kind", "1__kind__ConfigMap"}
+    assert summary == DiffSummary(2, 0, 0)
+
+    graph, summary = compare(OLD, OLD[:1], document_order="forward")
+    assert set(graph.nodes()) == {"1__kind", "1__kind__Service"}
+    assert summary == DiffSummary(0, 2, 0)
+
+    # Reversed numbering pairs the documents from the end of the files
+    graph, summary = compare([{"kind": "ConfigMap"}, OLD[0]], OLD[:1])
+    assert set(graph.nodes()) == {"1__kind", "1__kind__ConfigMap"}
+    assert summary == DiffSummary(0, 2, 0)
+
+
+@pytest.mark.parametrize("old, new, root_status, summary", [
+    ([[1, 2]], [[]], REMOVED, DiffSummary(0, 3, 0)),
+    ([[1, 2]], [], REMOVED, DiffSummary(0, 3, 0)),
+    ([], [[1, 2]], ADDED, DiffSummary(3, 0, 0)),
+    ([{"a": 1}], [[1]], ADDED, DiffSummary(2, 2, 0)),
+    ([[1]], [[2]], MODIFIED, DiffSummary(1, 1, 1)),
+])
+def test_compare_list_document_root_status(old, new, root_status, summary):
+    graph, result = compare(old, new)
+
+    assert statuses(graph)["0"] == NODE_STYLES[root_status]["color"]
+    assert result == summary
+
+
+def test_compare_uses_the_render_document_numbers():
+    new = [dict(OLD[0], kind="StatefulSet"), {"kind": "Service", "type": "LB"}]
+
+    graph, _ = compare(OLD, new)
+    assert set(graph.nodes()) == {
+        "0__type", "0__type__LB", "1__kind", "1__kind__StatefulSet",
+        "1__kind__Deployment"
+    }
+    assert set(graph.nodes()) - {"1__kind__Deployment"} <= set(render(new).nodes)
+    assert "1__kind__Deployment" in set(render(OLD).nodes)
+
+
+def test_compare_value_type_change():
+    graph, summary = compare({"a": {"b": "c"}}, {"a": ["b", "c"]})
+
+    assert "0__a__b__c" in graph
+    assert "0__a__c" in graph
+    assert summary.added and summary.removed
+
+
+def test_compare_command(temp_dir):
+    old_file = temp_dir / "old.yaml"
+    new_file = temp_dir / "new.yaml"
+    old_file.write_text("a: 1\nb: [x, y]\n")
+    new_file.write_text("a: 1\nb: [x, z]\n")
+    dot_file = temp_dir / "diff.dot"
+
+    result = CliRunner().invoke(cli, [
+        "compare",
+        str(old_file),
+        str(new_file), "--output-file",
+        str(dot_file)
+    ])
+
+    assert result.exit_code == 0
+    assert "1 added, 1 removed, 1 modified" in result.output
+    dot_text = dot_file.read_text()
+    assert '"0__b__z" [color="#2e7d32"' in dot_text
+    assert 'style="rounded, filled"' in dot_text
+    assert "0__a" not in dot_text
+
+    new_file.write_text("a: [1\n")
+    result = CliRunner().invoke(cli, [
+        "compare",
+        str(old_file),
+        str(new_file), "--output-file",
+        str(dot_file)
+    ])
+    assert result.exit_code == 1
+    assert "Error parsing YAML" in result.output
@@ -0,0 +1,116 @@
+import io
+import json
+from pathlib import Path
+
+import networkx as nx
+import pytest
+import yaml
+
+from yaml2dot.dot_writer import (quote_id, to_dot_string, write_dot,
+                                 write_dot_records)
+from yaml2dot.renderer import graph_defaults, iter_render_records, render
+
+
+@pytest.fixture(params=[
+    "complex.yaml", "duplicate_names_deployment.yaml", "k8-deployment.yaml",
+    "large_graph.yaml", "list.yaml", "mixed.yaml", "nested.yaml",
+    "sample_json.json", "simple.yaml", "small_graph.yaml"
+])
+def sample_data_file(request):
+    examples_dir = Path(__file__).resolve().parent.parent / "examples"
+    return examples_dir / request.param
+
+
+def load_example(sample_data_file):
+    with open(sample_data_file, "r") as data_file:
+        if sample_data_file.suffix == ".json":
+            return json.load(data_file)
+        return list(yaml.safe_load_all(data_file))
+
+
+def test_native_writer_matches_expected_files(sample_data_file):
+    data = load_example(sample_data_file)
+    graph = render(data, round_robin=sample_data_file.stem == "k8-deployment")
+
+    expected_dot_file = (Path(__file__).resolve().parent /
+                         "expected-dot-files" / f"{sample_data_file.stem}.dot")
+    assert to_dot_string(graph) == expected_dot_file.read_text()
+
+
+def test_native_writer_matches_pydot_quoting():
+    data = {
+        "unicode é": "ü",
+        "node": "",
+        "quote": 'a"b',
+        "numbers": "1,2",
+        "float": 1.5,
+        "newline": "a\nb",
+        "<b>": "<i>html</i>",
+        "nested": {
+            "flags": [True, None]
+        }
+    }
+    graph = render(data)
+    assert to_dot_string(graph) == to_dot_string(graph, backend="pydot")
+
+
+def test_native_writer_graph_defaults():
+    graph = nx.DiGraph()
+    graph.graph['graph'] = {'rankdir': 'LR'}
+    graph.graph['node'] = {'penwidth': 2.0, 'fontname': 'Fira Mono'}
+    graph.add_edge('a', 'b', weight=1)
+    assert to_dot_string(graph) == to_dot_string(graph, backend="pydot")
+
+
+def test_write_dot_to_stream():
+    graph = render({"key": "value"})
+    stream = io.StringIO()
+    write_dot(graph, stream)
+    assert stream.getvalue() == to_dot_string(graph)
+
+
+def test_quote_id():
+    assert quote_id("plain_id") == "plain_id"
+    assert quote_id("10") == "10"
+    assert quote_id("2.0") == '"2.0"'
+    assert quote_id("") == '""'
+    assert quote_id('say "hi"') == r'"say \"hi\""'
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        to_dot_string(render({"key": "value"}), backend="graphviz")
+
+
+def test_record_stream_describes_rendered_graph(sample_data_file):
+    data = load_example(sample_data_file)
+    graph_lines = to_dot_string(render(data)).splitlines()
+    stream = io.StringIO()
+    write_dot_records(iter_render_records(data), stream)
+    stream_lines = stream.getvalue().splitlines()
+
+    assert stream_lines[:2] == graph_lines[:2]
+    node_lines = {line for line in stream_lines if "->" not in line}
+    assert node_lines <= set(graph_lines)
+    assert sum("->" in line for line in stream_lines) == sum(
+        "->" in line for line in graph_lines)
+
+
+def test_shared_defaults_are_written_once(sample_data_file):
+    data = load_example(sample_data_file)
+    graph = render(data, round_robin=True, shared_defaults=True)
+    dot_output = to_dot_string(graph)
+
+    assert dot_output == to_dot_string(graph, backend="pydot")
+    assert dot_output.count("fontname") == 1
+    assert dot_output.count("arrowhead") == 1
+    assert len(dot_output) < len(to_dot_string(render(data, round_robin=True)))
+
+    stream = io.StringIO()
+    defaults = graph_defaults(data, round_robin=True)
+    write_dot_records(iter_render_records(data,
+                                          round_robin=True,
+                                          defaults=defaults),
+                      stream,
+                      defaults=defaults)
+    assert stream.getvalue().count("fontname") == 1
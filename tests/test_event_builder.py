@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import pytest
+import yaml
+
+from yaml2dot.data_loader import available_parsers
+from yaml2dot.dot_writer import to_dot_string
+from yaml2dot.event_builder import iter_event_documents
+from yaml2dot.renderer import render
+
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent / "examples"
+EXPECTED_DIR = Path(__file__).resolve().parent / "expected-dot-files"
+
+LOADERS = {
+    "pyyaml": yaml.SafeLoader,
+    "libyaml": getattr(yaml, "CSafeLoader", None)
+}
+
+TRICKY_YAML = """\
+base: &base
+  a: 1
+  b: [x, y]
+other: &other {a: 10, z: true}
+merged:
+  <<: *base
+  b: override
+multi:
+  own: 1
+  <<: [*base, *other]
+  a: own-a
+dup: {k: 1, k: 2, j: 3}
+nums: [0x1F, 010, 1_000, 1e3, .inf, 12:30:00, 2002-12-14, ~]
+keys: {1: int, 1.0: float, true: bool, null: none, "a:b": c}
+set: !!set {a, b}
+omap: !!omap [x: 1, y: *base]
+pairs: !!pairs [x: 1, x: 2]
+binary: !!binary aGVsbG8=
+str: !!str 123
+again: *base
+---
+- &item {name: one}
+- *item
+- [nested, [list]]
+--- plain scalar
+---
+"""
+
+
+@pytest.mark.parametrize("parser", available_parsers()["yaml"])
+@pytest.mark.parametrize("text", [
+    TRICKY_YAML, "", "a: &x 1\nb: *x\n", "r: &r [1, *r]\n",
+    *(path.read_text() for path in sorted(EXAMPLES_DIR.glob("*.yaml")))
+])
+def test_event_documents_match_safe_load(text, parser):
+    expected = list(yaml.load_all(text, Loader=LOADERS[parser]))
+    assert repr(list(iter_event_documents(text, parser))) == repr(expected)
+
+
+@pytest.mark.parametrize("text", [
+    "{[1]: 2}", "a: *missing", "<<: 1", "a: {<<: [1]}", "a: !custom x",
+    "a: [1, 2"
+])
+def test_event_documents_raise_yaml_errors(text):
+    with pytest.raises(yaml.YAMLError):
+        list(yaml.safe_load_all(text))
+    with pytest.raises(yaml.YAMLError):
+        list(iter_event_documents(text))
+
+
+@pytest.mark.parametrize("example", [
+    path.name for path in sorted(EXAMPLES_DIR.glob("*.yaml"))
+    if (EXPECTED_DIR / f"{path.stem}.dot").exists()
+])
+def test_event_documents_render_like_loader(example):
+    with open(EXAMPLES_DIR / example) as file:
+        documents = list(iter_event_documents(file))
+    expected = (EXPECTED_DIR / f"{Path(example).stem}.dot").read_text()
+    # The golden k8-deployment graph is rendered with round robin shapes
+    round_robin = example == "k8-deployment.yaml"
+    assert to_dot_string(render(documents,
+                                round_robin=round_robin)) == expected
@@ -0,0 +1,136 @@
+import io
+import xml.dom.minidom
+
+import pytest
+
+from yaml2dot.export import (EXPORT_FORMATS, columnar_graph, export_records,
+                             iter_graphml_lines, iter_tsv_lines, read_npz,
+                             write_export, write_npz)
+from yaml2dot.converter import convert_yaml_or_json_to_format
+from yaml2dot.renderer import NodeRecord, iter_render_records, render
+
+DATA = {"a": {"b": [1, 2], "c": "x\ty"}, "d": "b"}
+
+
+def _graph_edges(graph):
+    return sorted((source, target) for source, target, *_ in graph.edges())
+
+
+def test_columnar_graph_holds_topology_and_labels():
+    records = list(iter_render_records(DATA))
+    node_ids = [record.id for record in records if isinstance(record, NodeRecord)]
+
+    columns = columnar_graph(records)
+
+    graph = render(DATA)
+    assert len(columns.indptr) == graph.number_of_nodes() + 1
+    edges = sorted((node_ids[source], node_ids[columns.indices[position]])
+                   for source in range(len(node_ids))
+                   for position in range(columns.indptr[source],
+                                         columns.indptr[source + 1]))
+    assert edges == _graph_edges(graph)
+    assert [columns.label(node) for node in range(len(node_ids))] == [
+        graph.nodes[node_id]["label"] for node_id in node_ids
+    ]
+    # "b" labels both a key and a value but is stored once
+    assert len(columns.label_offsets) - 1 == len(
+        {label for _, label in graph.nodes(data="label")})
+
+
+def test_npz_round_trip(tmp_path):
+    columns = columnar_graph(iter_render_records(DATA))
+
+    write_npz(columns, tmp_path / "graph.npz")
+
+    assert read_npz(tmp_path / "graph.npz") == columns
+
+
+def test_npz_loads_with_numpy():
+    numpy = pytest.importorskip("numpy")
+    columns = columnar_graph(iter_render_records(DATA))
+    buffer = io.BytesIO()
+
+    write_npz(columns, buffer)
+
+    buffer.seek(0)
+    arrays = numpy.load(buffer)
+    assert arrays["indptr"].dtype == numpy.int32
+    assert arrays["indices"].tolist() == columns.indices.tolist()
+    assert arrays["label_data"].tobytes() == columns.label_data.tobytes()
+
+
+def test_tsv_edge_list_escapes_fields():
+    lines = list(iter_tsv_lines(iter_render_records(DATA)))
+
+    assert lines[0] == "source\ttarget\tsource_label\ttarget_label\n"
+    assert "0__a__c\t0__a__c__x\\ty\tc\tx\\ty\n" in lines
+    assert sorted(tuple(line.split("\t")[:2])
+                  for line in lines[1:]) == sorted(
+                      (source, target.replace("\t", "\\t"))
+                      for source, target in _graph_edges(render(DATA)))
+
+
+def test_graphml_is_well_formed():
+    text = "".join(iter_graphml_lines(iter_render_records(DATA)))
+
+    document = xml.dom.minidom.parseString(text)
+    assert len(document.getElementsByTagName("node")) == render(
+        DATA).number_of_nodes()
+    assert len(document.getElementsByTagName("edge")) == render(
+        DATA).number_of_edges()
+
+
+@pytest.mark.parametrize("output_format", EXPORT_FORMATS)
+def test_export_records_matches_write_export(tmp_path, output_format):
+    output = export_records(iter_render_records(DATA), output_format)
+
+    write_export(iter_render_records(DATA), tmp_path / "graph", output_format)
+
+    if isinstance(output, bytes):
+        assert read_npz(io.BytesIO(output)) == read_npz(tmp_path / "graph")
+    else:
+        assert output == (tmp_path / "graph").read_text()
+
+
+@pytest.mark.parametrize("output_format", ["tsv", "graphml"])
+def test_text_exports_are_utf8(tmp_path, output_format):
+    # Labels outside every legacy code page, so a locale encoding other than UTF-8 cannot write them
+    data = {"名前": "値 ✓", "emoji": ["🚀"]}
+    path = tmp_path / f"graph.{output_format}"
+
+    write_export(iter_render_records(data), path, output_format)
+
+    text = path.read_bytes().decode("utf-8")
+    for label in ("名前", "値 ✓", "🚀"):
+        assert label in text
+    if output_format == "graphml":
+        xml.dom.minidom.parse(str(path))
+
+
+def test_unknown_export_format():
+    with pytest.raises(ValueError):
+        write_export([], io.StringIO(), "csv")
+
+
+def test_exports_keep_keys_and_values_unescaped():
+    data = {"image": "example-image:latest", "a:b": "a---b"}
+
+    tsv = convert_yaml_or_json_to_format(data, output_format="tsv")
+    assert "0__image\t0__image__example-image:latest\timage\texample-image:latest\n" in tsv
+    # A colon and a literal "---" stay apart
+    assert "0__a:b\t0__a:b__a---b\ta:b\ta---b\n" in tsv
+
+    graphml = xml.dom.minidom.parseString(
+        convert_yaml_or_json_to_format(data, output_format="graphml"))
+    labels = {
+        node.getAttribute("id"): node.firstChild.firstChild.data
+        for node in graphml.getElementsByTagName("node")
+    }
+    assert labels["0__image__example-image:latest"] == "example-image:latest"
+    assert labels["0__a:b"] == "a:b"
+
+    columns = read_npz(
+        io.BytesIO(convert_yaml_or_json_to_format(data, output_format="npz")))
+    assert "example-image:latest" in {
+        columns.label(node) for node in range(len(columns.label_index))
+    }
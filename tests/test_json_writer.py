@@ -0,0 +1,84 @@
+import io
+import json
+from pathlib import Path
+
+import networkx as nx
+import pytest
+import yaml
+from networkx.readwrite import json_graph
+
+from yaml2dot.json_writer import iter_json_chunks, to_json_string, write_json
+from yaml2dot.renderer import render
+
+
+@pytest.fixture(params=[
+    "complex.yaml", "duplicate_names_deployment.yaml", "k8-deployment.yaml",
+    "list.yaml", "mixed.yaml", "nested.yaml", "sample_json.json",
+    "simple.yaml"
+])
+def sample_data_file(request):
+    examples_dir = Path(__file__).resolve().parent.parent / "examples"
+    return examples_dir / request.param
+
+
+def load_example(sample_data_file):
+    with open(sample_data_file, "r") as data_file:
+        if sample_data_file.suffix == ".json":
+            return json.load(data_file)
+        return list(yaml.safe_load_all(data_file))
+
+
+@pytest.mark.parametrize("options", [{}, {
+    "shared_defaults": True
+}, {
+    "multi_view": True
+}])
+def test_pretty_output_matches_node_link_data(sample_data_file, options):
+    graph = render(load_example(sample_data_file), **options)
+
+    assert to_json_string(graph) == json.dumps(
+        json_graph.node_link_data(graph), indent=2)
+
+
+def test_compact_graph_matches_networkx_graph(sample_data_file):
+    data = load_example(sample_data_file)
+
+    assert to_json_string(render(data, compact=True)) == to_json_string(
+        render(data))
+
+
+def test_compact_output(sample_data_file):
+    graph = render(load_example(sample_data_file))
+
+    compact = to_json_string(graph, indent=None)
+
+    assert compact == json.dumps(json_graph.node_link_data(graph),
+                                 separators=(",", ":"))
+
+
+@pytest.mark.parametrize("graph", [nx.MultiDiGraph(), nx.DiGraph([(1, 2)])])
+def test_empty_and_simple_graphs(graph):
+    expected = json_graph.node_link_data(graph)
+
+    assert to_json_string(graph) == json.dumps(expected, indent=2)
+    assert json.loads(to_json_string(graph, indent=None)) == expected
+
+
+def test_chunks_are_one_node_or_link_each():
+    graph = render({"a": {"b": 1}})
+
+    chunks = list(iter_json_chunks(graph, indent=None))
+
+    assert sum('"id":' in chunk for chunk in chunks) == graph.number_of_nodes()
+    assert all(chunk.count('"id":') <= 1 for chunk in chunks)
+
+
+def test_write_json_to_stream_and_path(tmp_path):
+    graph = render({"a": "b"})
+    stream = io.StringIO()
+
+    write_json(graph, stream)
+    write_json(graph, tmp_path / "graph.json")
+
+    assert stream.getvalue() == to_json_string(graph)
+    assert (tmp_path / "graph.json").read_text() == to_json_string(graph)
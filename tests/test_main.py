@@ -1,18 +1,17 @@
 import json
-import tempfile
+import os
+import subprocess
+import sys
+import warnings
 from pathlib import Path
 
 import pytest
 import yaml
 from click.testing import CliRunner
 
-from yaml2dot.__main__ import render_yaml
-
-
-@pytest.fixture
-def temp_dir():
-    with tempfile.TemporaryDirectory() as temp_dir:
-        yield Path(temp_dir)
+from yaml2dot.__main__ import cli, render_yaml
+from yaml2dot import server
+from yaml2dot.export import read_npz
 
 
 def test_render_yaml(temp_dir, capfd):
@@ -462,3 +461,465 @@ def test_render_yaml_with_shape(temp_dir):
     with open(dot_file, "r") as f:
         dot_contents = f.read()
         assert shape in dot_contents
+
+
+def test_render_yaml_dot_backends(temp_dir):
+    yaml_data = {"key1": "value1", "key2": {"nested_key": "nested_value"}}
+    yaml_file = temp_dir / "test.yaml"
+    with open(yaml_file, "w") as f:
+        yaml.dump(yaml_data, f)
+
+    runner = CliRunner()
+    outputs = []
+    for backend in ("native", "pydot"):
+        dot_file = temp_dir / f"test_{backend}.dot"
+        runner.invoke(render_yaml, [
+            f"--input-file={yaml_file}", f"--output-file={dot_file}",
+            f"--dot-backend={backend}"
+        ])
+        outputs.append(dot_file.read_text())
+
+    assert outputs[0] == outputs[1]
+
+
+def test_render_yaml_stream_dot(temp_dir):
+    yaml_data = {"key1": "value1", "key2": {"nested_key": "nested_value"}}
+    yaml_file = temp_dir / "test.yaml"
+    dot_file = temp_dir / "test_stream.dot"
+    with open(yaml_file, "w") as f:
+        yaml.dump(yaml_data, f)
+
+    runner = CliRunner()
+    result = runner.invoke(render_yaml, [
+        f"--input-file={yaml_file}", f"--output-file={dot_file}", "--stream"
+    ])
+    assert result.exit_code == 0
+    assert '"0__key1" -> "0__key1__value1"' in dot_file.read_text()
+
+    result = runner.invoke(render_yaml, [
+        f"--input-file={yaml_file}", f"--output-file={dot_file}", "--stream",
+        "--output-format=json"
+    ])
+    assert result.exit_code != 0
+
+
+def test_render_yaml_parser_option(temp_dir):
+    yaml_data = {"key1": "value1", "key2": {"nested_key": "nested_value"}}
+    yaml_file = temp_dir / "test.yaml"
+    with open(yaml_file, "w") as f:
+        yaml.dump(yaml_data, f)
+
+    runner = CliRunner()
+    outputs = []
+    for parser in ("auto", "pyyaml"):
+        dot_file = temp_dir / f"test_{parser}.dot"
+        result = runner.invoke(render_yaml, [
+            f"--input-file={yaml_file}", f"--output-file={dot_file}",
+            f"--parser={parser}", "--show-parser"
+        ])
+        assert result.exit_code == 0
+        assert "Parser: " in result.output
+        outputs.append(dot_file.read_text())
+    assert outputs[0] == outputs[1]
+
+    result = runner.invoke(render_yaml, [
+        f"--input-file={yaml_file}", f"--output-file={temp_dir / 'x.dot'}",
+        "--parser=json"
+    ])
+    assert result.exit_code != 0
+
+
+def test_render_yaml_forward_document_order(temp_dir):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a: b\n---\nc: d\n")
+
+    runner = CliRunner()
+    for stream in ([], ["--stream"]):
+        dot_file = temp_dir / "test.dot"
+        result = runner.invoke(render_yaml, [
+            f"--input-file={yaml_file}", f"--output-file={dot_file}",
+            "--document-order=forward"
+        ] + stream)
+        assert result.exit_code == 0
+        dot_text = dot_file.read_text()
+        assert '"0__a" -> "0__a__b"' in dot_text
+        assert '"1__c" -> "1__c__d"' in dot_text
+
+
+def test_render_yaml_document_workers(temp_dir):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a: b\n---\nc: d\n---\n- e\n")
+
+    runner = CliRunner()
+    outputs = []
+    for workers in ("1", "2"):
+        dot_file = temp_dir / f"test{workers}.dot"
+        result = runner.invoke(render_yaml, [
+            f"--input-file={yaml_file}", f"--output-file={dot_file}",
+            f"--document-workers={workers}"
+        ])
+        assert result.exit_code == 0
+        outputs.append(dot_file.read_text())
+    assert outputs[0] == outputs[1]
+
+
+def test_render_yaml_forward_document_order_invalid_document(temp_dir):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a: b\n---\nc: d: e\n")
+    dot_file = temp_dir / "test.dot"
+
+    runner = CliRunner()
+    result = runner.invoke(render_yaml, [
+        f"--input-file={yaml_file}", f"--output-file={dot_file}",
+        "--document-order=forward", "--stream"
+    ])
+    assert result.exit_code == 0
+    assert "Error parsing YAML" in result.output
+    assert not dot_file.exists()
+
+
+def test_render_yaml_event_engine(temp_dir):
+    yaml_file = Path(__file__).resolve().parent.parent / "examples" / "k8-deployment.yaml"
+    runner = CliRunner()
+    outputs = []
+    for engine in ("constructor", "events"):
+        dot_file = temp_dir / f"test_{engine}.dot"
+        result = runner.invoke(render_yaml, [
+            f"--input-file={yaml_file}", f"--output-file={dot_file}",
+            f"--yaml-engine={engine}"
+        ])
+        assert result.exit_code == 0
+        outputs.append(dot_file.read_text())
+    assert outputs[0] == outputs[1]
+
+
+def test_render_json_lines(temp_dir):
+    jsonl_file = temp_dir / "test.jsonl"
+    jsonl_file.write_text('{"a": "b"}\n{"c": "d"}\n')
+
+    runner = CliRunner()
+    for order, first_key in (("reversed", "c"), ("forward", "a")):
+        dot_file = temp_dir / f"test_{order}.dot"
+        result = runner.invoke(render_yaml, [
+            f"--input-file={jsonl_file}", f"--output-file={dot_file}",
+            f"--document-order={order}"
+        ])
+        assert result.exit_code == 0
+        assert f'"0__{first_key}";' in dot_file.read_text() or \
+            f'"0__{first_key}" [' in dot_file.read_text()
+
+    jsonl_file.write_text('{"a": "b"}\n{"c": }\n')
+    dot_file = temp_dir / "invalid.dot"
+    result = runner.invoke(render_yaml, [
+        f"--input-file={jsonl_file}", f"--output-file={dot_file}",
+        "--document-order=forward", "--stream"
+    ])
+    assert result.exit_code == 0
+    assert "Error parsing JSON: line 2" in result.output
+    assert not dot_file.exists()
+
+
+def test_cli_renders_without_subcommand(temp_dir):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("key: value\n")
+    runner = CliRunner()
+
+    for args in (["render"], []):
+        dot_file = temp_dir / f"test{len(args)}.dot"
+        result = runner.invoke(cli, args + [
+            "--input-file",
+            str(yaml_file), "--output-file",
+            str(dot_file)
+        ])
+        assert result.exit_code == 0
+        assert dot_file.read_text().startswith("digraph")
+
+
+def test_render_yaml_max_depth(temp_dir):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a:\n  b:\n    c: d\n")
+    dot_file = temp_dir / "test.dot"
+
+    runner = CliRunner()
+    result = runner.invoke(render_yaml, [
+        f"--input-file={yaml_file}", f"--output-file={dot_file}",
+        "--max-depth=1"
+    ])
+    assert result.exit_code == 0
+    dot_text = dot_file.read_text()
+    assert '"0__a" -> "0__a__+"' in dot_text
+    assert 'label="+3 nodes"' in dot_text
+    assert "0__a__b" not in dot_text
+
+
+def test_render_yaml_max_list_items(temp_dir):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("ids: [1, 2, 3, 4, 5, 6]\n")
+    dot_file = temp_dir / "test.dot"
+
+    runner = CliRunner()
+    result = runner.invoke(render_yaml, [
+        f"--input-file={yaml_file}", f"--output-file={dot_file}",
+        "--max-list-items=2"
+    ])
+    assert result.exit_code == 0
+    dot_text = dot_file.read_text()
+    assert '"0__ids" -> "0__ids__..."' in dot_text
+    assert 'label="… 4 more"' in dot_text
+    assert "0__ids__3" not in dot_text
+
+
+def test_render_yaml_compact_json(temp_dir):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a:\n  b: c\n")
+    pretty_file = temp_dir / "pretty.json"
+    compact_file = temp_dir / "compact.json"
+
+    runner = CliRunner()
+    for output_file, extra in ((pretty_file, []), (compact_file,
+                                                   ["--compact-json"])):
+        result = runner.invoke(render_yaml, [
+            f"--input-file={yaml_file}", f"--output-file={output_file}",
+            "--output-format=json"
+        ] + extra)
+        assert result.exit_code == 0
+
+    pretty = pretty_file.read_text()
+    compact = compact_file.read_text()
+    assert pretty.startswith('{\n  "directed": true,')
+    assert compact == json.dumps(json.loads(pretty), separators=(",", ":"))
+
+
+@pytest.mark.parametrize("output_format", ["npz", "tsv", "graphml"])
+def test_render_yaml_export_formats(temp_dir, output_format):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a:\n  b: c\n")
+    output_file = temp_dir / f"test.{output_format}"
+
+    runner = CliRunner()
+    result = runner.invoke(render_yaml, [
+        f"--input-file={yaml_file}", f"--output-file={output_file}",
+        f"--output-format={output_format}"
+    ])
+    assert result.exit_code == 0
+    if output_format == "npz":
+        assert read_npz(output_file).indices.tolist() == [1, 2]
+    else:
+        assert "0__a__b__c" in output_file.read_text()
+
+
+# Import time of the CLI module on top of click, relative to importing click itself in the
+# same interpreter, as reported by python -X importtime. With networkx imported eagerly it
+# was about six times as long.
+CLI_IMPORT_RATIO = 3
+# Imported on demand only: by the pydot backend, --document-workers, batch and serve
+DEFERRED_MODULES = ("networkx", "pydot", "asyncio", "concurrent.futures",
+                    "urllib.request", "importlib.metadata")
+
+
+def _run_python(*args):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(Path(__file__).parents[1]),
+                      env.get("PYTHONPATH")]))
+    return subprocess.run([sys.executable, *args],
+                          env=env,
+                          capture_output=True,
+                          text=True,
+                          check=True)
+
+
+def test_default_render_does_not_import_heavy_modules(temp_dir):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a:\n  b: [c, d]\n")
+    script = (
+        "import sys\n"
+        "from yaml2dot.__main__ import cli\n"
+        f"cli.main(['--input-file', {str(yaml_file)!r}, '--output-file', "
+        f"{str(temp_dir / 'test.dot')!r}], standalone_mode=False)\n"
+        f"print([name for name in {DEFERRED_MODULES!r} if name in sys.modules])\n"
+    )
+
+    assert _run_python("-c", script).stdout.strip() == "[]"
+    assert (temp_dir / "test.dot").read_text().startswith("digraph")
+
+
+def test_cli_import_time_budget():
+    # The fastest of a few runs, so that a busy machine does not fail the test. Click is
+    # imported first, so the CLI module's cumulative time leaves out what it costs.
+    timings = {"click": [], "yaml2dot.__main__": []}
+    for _ in range(3):
+        report = _run_python("-X", "importtime", "-c",
+                             "import click; import yaml2dot.__main__").stderr
+        for line in report.splitlines():
+            _, cumulative, module = line.split("|")
+            if module.strip() in timings:
+                timings[module.strip()].append(int(cumulative))
+
+    assert min(timings["yaml2dot.__main__"]) < CLI_IMPORT_RATIO * min(timings["click"])
+
+
+def test_serve_defaults_match_server():
+    defaults = {
+        param.name: param.default
+        for param in cli.commands["serve"].params
+    }
+
+    assert defaults["host"] == server.DEFAULT_HOST
+    assert defaults["port"] == server.DEFAULT_PORT
+    assert defaults["timeout"] == server.DEFAULT_TIMEOUT
+    assert defaults["cache_size"] * 1024 * 1024 == server.DEFAULT_RESULT_CACHE_SIZE
+    assert defaults["max_body_size"] * 1024 * 1024 == server.DEFAULT_MAX_BODY_SIZE
+
+
+def test_render_yaml_profile(temp_dir):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a: [x, x]\n---\nb: 1\n")
+    dot_file = temp_dir / "test.dot"
+    profile_file = temp_dir / "profile.json"
+
+    runner = CliRunner()
+    result = runner.invoke(render_yaml, [
+        f"--input-file={yaml_file}", f"--output-file={dot_file}",
+        f"--profile={profile_file}"
+    ])
+    assert result.exit_code == 0
+    report = json.loads(profile_file.read_text())
+    assert list(report["stages"]) == ["parse", "render", "write"]
+    assert report["counters"] == {
+        "documents": 2,
+        "duplicate_paths": 1,
+        "nodes": 4,
+        "edges": 2,
+        "bytes_written": dot_file.stat().st_size,
+    }
+
+    result = runner.invoke(render_yaml, [
+        f"--input-file={yaml_file}", "--output-file=-", "--dot-backend=pydot",
+        "--profile"
+    ])
+    assert result.exit_code == 0
+    report = json.loads(result.stderr)
+    assert list(report["stages"]) == ["parse", "render", "serialize", "write"]
+    assert report["counters"]["bytes_written"] == len(
+        result.stdout.encode())
+
+
+def test_render_yaml_profile_stream(temp_dir):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a: b\n")
+
+    result = CliRunner().invoke(render_yaml, [
+        f"--input-file={yaml_file}", "--output-file=-", "--stream", "--profile"
+    ])
+    assert result.exit_code == 0
+    report = json.loads(result.stderr)
+    assert list(report["stages"]) == ["parse", "stream"]
+    assert report["counters"]["nodes"] == 2
+    assert report["counters"]["edges"] == 1
+    assert report["counters"]["bytes_written"] == len(result.stdout.encode())
+
+
+def test_render_yaml_profile_rejects_watch(temp_dir):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a: b\n")
+
+    result = CliRunner().invoke(render_yaml, [
+        f"--input-file={yaml_file}", f"--output-file={temp_dir / 'test.dot'}",
+        "--watch", "--profile"
+    ])
+    assert result.exit_code == 2
+    assert "cannot be combined with --watch" in result.output
+
+
+def test_render_yaml_profile_memory(temp_dir):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a: {b: [1, 2, 3]}\n")
+
+    result = CliRunner().invoke(render_yaml, [
+        f"--input-file={yaml_file}", f"--output-file={temp_dir / 'test.dot'}",
+        "--profile-memory"
+    ])
+    assert result.exit_code == 0
+    report = json.loads(result.stderr)
+    for stage in ("parse", "render", "write"):
+        assert report["stages"][stage]["peak_bytes"] > 0
+        assert "retained_bytes" in report["stages"][stage]
+    assert report["total"]["peak_bytes"] > 0
+
+
+@pytest.mark.parametrize("failing, stage", [
+    ("render", "render"),
+    ("write_dot", "write"),
+])
+def test_render_yaml_max_memory_exceeded(temp_dir, monkeypatch, failing,
+                                         stage):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a: b\n")
+    dot_file = temp_dir / "test.dot"
+    profile_file = temp_dir / "profile.json"
+
+    def out_of_memory(*args, **kwargs):
+        if failing == "write_dot":
+            dot_file.write_text("digraph {")
+        raise MemoryError
+
+    # The limit itself is tested apart, as it would stay on for the test process
+    monkeypatch.setattr("yaml2dot.__main__.limit_memory", lambda max_bytes: None)
+    monkeypatch.setattr(f"yaml2dot.__main__.{failing}", out_of_memory)
+    result = CliRunner().invoke(render_yaml, [
+        f"--input-file={yaml_file}", f"--output-file={dot_file}",
+        "--max-memory=100", f"--profile={profile_file}"
+    ])
+    assert result.exit_code == 1
+    assert f"Memory limit of 100 MB exceeded during the {stage} stage" in result.output
+    assert not dot_file.exists()
+    assert stage in json.loads(profile_file.read_text())["stages"]
+
+
+@pytest.mark.parametrize("error", [OSError("disk failure"), SystemError()])
+def test_render_yaml_max_memory_only_catches_memory_errors(temp_dir, monkeypatch,
+                                                          error):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a: b\n")
+
+    def broken(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr("yaml2dot.__main__.limit_memory", lambda max_bytes: None)
+    monkeypatch.setattr("yaml2dot.__main__.write_dot", broken)
+    result = CliRunner().invoke(render_yaml, [
+        f"--input-file={yaml_file}", f"--output-file={temp_dir / 'test.dot'}",
+        "--max-memory=100"
+    ])
+    assert result.exception is error
+
+
+@pytest.mark.skipif(sys.platform != "linux",
+                    reason="--max-memory is only supported on Linux")
+def test_render_yaml_max_memory_guard(temp_dir):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a: {b: [1, 2, 3]}\n")
+    dot_file = temp_dir / "test.dot"
+
+    _run_python("-m", "yaml2dot", "--input-file", str(yaml_file),
+                "--output-file", str(dot_file), "--max-memory", "4096")
+    assert '"0__a" -> "0__a__b"' in dot_file.read_text()
+
+
+@pytest.mark.parametrize("options", [[], ["--stream"], ["--output-format=tsv"],
+                                     ["--output-format=npz"],
+                                     ["--dot-backend=pydot", "--profile"]])
+def test_render_to_stdout_uses_no_deprecated_click_api(temp_dir, options):
+    yaml_file = temp_dir / "test.yaml"
+    yaml_file.write_text("a: b\n")
+
+    with warnings.catch_warnings():
+        # Click attributes its deprecations to the caller, so match them by message
+        warnings.filterwarnings("error", message=".* will be removed in Click",
+                                category=DeprecationWarning)
+        result = CliRunner().invoke(
+            render_yaml,
+            [f"--input-file={yaml_file}", "--output-file=-"] + options)
+    assert result.exit_code == 0, result.exception
+    assert result.stdout_bytes
@@ -0,0 +1,177 @@
+import io
+import json
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from yaml2dot.profiling import (CountingWriter, Profiler, StageTiming,
+                                limit_memory, profile_stage)
+
+
+def test_stage_accumulates_runs():
+    profiler = Profiler()
+    for _ in range(3):
+        with profiler.stage("render"):
+            pass
+    with profiler.stage("write"):
+        pass
+
+    assert list(profiler.stages) == ["render", "write"]
+    assert profiler.stages["render"].calls == 3
+    assert profiler.stages["render"].wall_seconds >= 0
+    assert profiler.stages["write"].calls == 1
+
+
+def test_stage_is_recorded_when_the_body_raises():
+    profiler = Profiler()
+    try:
+        with profiler.stage("parse"):
+            raise ValueError
+    except ValueError:
+        pass
+    assert profiler.stages["parse"].calls == 1
+
+
+def test_counters():
+    profiler = Profiler()
+    profiler.count("documents")
+    profiler.count("documents", 2)
+    profiler.count("nodes", 4)
+    assert profiler.counters == {"documents": 3, "nodes": 4}
+
+
+def test_report_totals_the_stages():
+    profiler = Profiler()
+    profiler.stages["parse"] = StageTiming(1.0, 0.5, 1)
+    profiler.stages["render"] = StageTiming(2.0, 1.5, 2)
+    profiler.count("nodes", 7)
+
+    assert profiler.report() == {
+        "stages": {
+            "parse": {
+                "wall_seconds": 1.0,
+                "cpu_seconds": 0.5,
+                "calls": 1
+            },
+            "render": {
+                "wall_seconds": 2.0,
+                "cpu_seconds": 1.5,
+                "calls": 2
+            },
+        },
+        "total": {
+            "wall_seconds": 3.0,
+            "cpu_seconds": 2.0
+        },
+        "counters": {
+            "nodes": 7
+        },
+    }
+
+
+def test_write_report(tmp_path, capsys):
+    profiler = Profiler()
+    with profiler.stage("render"):
+        pass
+
+    profiler.write_report()
+    assert json.loads(capsys.readouterr().err)["stages"]["render"]["calls"] == 1
+
+    report_file = tmp_path / "profile.json"
+    profiler.write_report(str(report_file))
+    assert json.loads(report_file.read_text()) == json.loads(
+        json.dumps(profiler.report()))
+
+    stream = io.StringIO()
+    profiler.write_report(stream)
+    assert stream.getvalue().count("\n") == 1
+
+
+def test_trace_memory():
+    profiler = Profiler(trace_memory=True)
+    with profiler.stage("build"):
+        data = bytearray(4 * 1024 * 1024)
+    with profiler.stage("free"):
+        del data
+    with profiler.stage("build"):
+        data = bytearray(1024 * 1024)
+    profiler.close()
+    assert not tracemalloc.is_tracing()
+    assert len(data) == 1024 * 1024
+
+    build = profiler.memory["build"]
+    assert build.peak_bytes >= 4 * 1024 * 1024
+    assert build.retained_bytes >= 5 * 1024 * 1024
+    assert profiler.memory["free"].retained_bytes < -3 * 1024 * 1024
+
+    report = profiler.report()
+    assert report["stages"]["build"]["peak_bytes"] == build.peak_bytes
+    assert report["stages"]["free"]["retained_bytes"] < 0
+    assert report["total"]["peak_bytes"] == max(
+        memory.peak_bytes for memory in profiler.memory.values())
+
+
+def test_memory_is_not_traced_by_default():
+    profiler = Profiler()
+    with profiler.stage("build"):
+        pass
+    assert profiler.memory == {}
+    assert "peak_bytes" not in profiler.report()["total"]
+
+
+def test_current_stage_is_kept_when_the_stage_raises():
+    profiler = Profiler()
+    with profiler.stage("parse"):
+        assert profiler.current_stage == "parse"
+    assert profiler.current_stage is None
+    with pytest.raises(MemoryError):
+        with profiler.stage("render"):
+            raise MemoryError
+    assert profiler.current_stage == "render"
+
+
+@pytest.mark.skipif(sys.platform != "linux",
+                    reason="the address space limit is enforced on Linux")
+def test_limit_memory_raises_memory_error():
+    # Run apart, as the limit cannot be lifted again
+    script = ("from yaml2dot.profiling import limit_memory\n"
+              "limit_memory(256 * 1024 * 1024)\n"
+              "try:\n"
+              "    bytearray(512 * 1024 * 1024)\n"
+              "except MemoryError:\n"
+              "    print('MemoryError')\n")
+    result = subprocess.run([sys.executable, "-c", script],
+                            cwd=Path(__file__).parents[1],
+                            capture_output=True,
+                            text=True,
+                            check=True)
+    assert result.stdout == "MemoryError\n"
+
+
+def test_limit_memory_rejects_other_platforms(monkeypatch):
+    # macOS accepts an address space limit without enforcing it
+    monkeypatch.setattr(sys, "platform", "darwin")
+    with pytest.raises(ValueError, match="only supported on Linux"):
+        limit_memory(256 * 1024 * 1024)
+
+
+def test_profile_stage_without_profiler():
+    with profile_stage(None, "render"):
+        pass
+    profiler = Profiler()
+    with profile_stage(profiler, "render"):
+        pass
+    assert profiler.stages["render"].calls == 1
+
+
+def test_counting_writer_counts_utf8_bytes():
+    stream = io.StringIO()
+    writer = CountingWriter(stream)
+    writer.write("ab")
+    writer.writelines(["é", "\n"])
+    writer.flush()
+    assert stream.getvalue() == "abé\n"
+    assert writer.bytes_written == 5
@@ -7,7 +7,8 @@ import networkx as nx
 import pytest
 import yaml
 
-from yaml2dot.renderer import render
+from yaml2dot import renderer
+from yaml2dot.renderer import EdgeRecord, NodeRecord, iter_render_records, render
 
 
 @pytest.fixture(params=[
@@ -52,3 +53,293 @@ def test_render_with_example_files(sample_data_file, expected_dot_file):
 
         # Compare the generated DOT file with the expected DOT file
         assert filecmp.cmp(output_dot_file, expected_dot_file, shallow=False)
+
+
+def test_iter_render_records_match_render():
+    data = [{"a": {"b": [1, 2, {"c": "d"}]}}, {"e": ["f", "f"]}]
+    graph = render(data)
+    records = list(iter_render_records(data))
+
+    node_ids = [record.id for record in records if isinstance(record, NodeRecord)]
+    edges = [(record.source, record.target) for record in records
+             if isinstance(record, EdgeRecord)]
+    assert set(node_ids) <= set(graph.nodes)
+    assert sorted(edges) == sorted(graph.edges())
+    for record in records:
+        if isinstance(record, NodeRecord):
+            assert graph.nodes[record.id]["label"] == record.label
+
+
+def test_render_shared_defaults():
+    data = [{"a": "b"}, {"c": {"d": "e"}}]
+    graph = render(data, shared_defaults=True)
+    assert graph.graph["node"]["fontname"] == "Fira Mono"
+    assert graph.graph["node"]["shape"] == "rounded"
+    assert graph.graph["edge"] == {"arrowhead": "none", "penwidth": "2.0"}
+    assert graph.nodes["0__c"] == {"label": "c"}
+    assert all(not attrs for _, _, attrs in graph.edges(data=True))
+
+    round_robin_graph = render(data, round_robin=True, shared_defaults=True)
+    assert "shape" not in round_robin_graph.graph["node"]
+    assert round_robin_graph.nodes["0__c"]["shape"] == "rounded"
+    assert round_robin_graph.nodes["1__a"]["shape"] == "ellipse"
+
+
+class UnprintableDict(dict):
+
+    def __str__(self):
+        raise AssertionError("list items must not be stringified")
+
+    __repr__ = __str__
+
+
+def test_nested_list_items_are_not_stringified():
+    data = {"items": [UnprintableDict(name=f"item{index}") for index in range(3)]}
+    graph = render(data)
+    assert "0__items__name__item2" in graph.nodes
+
+
+def test_labels_are_set_at_insertion():
+    data = {"host:port": {"__init__": "a:b"}, "items": [1]}
+    graph = render(data)
+    assert graph.nodes["0__host---port"]["label"] == '"host:port"'
+    assert graph.nodes["0__host---port____init__"]["label"] == "__init__"
+    assert graph.nodes["0__host---port____init____a---b"]["label"] == '"a:b"'
+    # Children of a key with a colon hang off the key's node, not a quoted copy of its path
+    assert ("0__host---port", "0__host---port____init__") in graph.edges()
+    assert all(":" not in node for node in graph.nodes)
+
+
+def test_implicit_root_node_is_labelled():
+    graph = render([["a", "b"]])
+    assert graph.nodes["0"] == {"label": "0"}
+    assert list(graph.successors("0")) == ["0__b", "0__a"]
+
+
+def test_render_forward_document_order_is_lazy():
+    documents = [{"a": "b"}, {"c": ["d"]}]
+    consumed = []
+
+    def generate():
+        for document in documents:
+            consumed.append(document)
+            yield document
+
+    records = iter_render_records(generate(), document_order="forward")
+    first = next(records)
+    assert first.id == "0__a"
+    assert consumed == documents[:1]
+
+    graph = render(generate(), document_order="forward")
+    assert list(graph.nodes) == ["0__a", "0__a__b", "1__c", "1__c__d"]
+
+
+def test_render_reversed_document_order_accepts_iterables():
+    data = [{"a": "b"}, {"c": {"d": "e"}}]
+    graph = render(iter(data))
+    assert list(graph.nodes) == list(render(data).nodes)
+
+    with pytest.raises(ValueError):
+        render(data, document_order="sideways")
+
+
+@pytest.mark.parametrize("options", [{}, {
+    "round_robin": True
+}, {
+    "shared_defaults": True,
+    "compact": True
+}, {
+    "multi_view": True
+}])
+def test_render_parallel_matches_serial(monkeypatch, options):
+    # Small batches so that the documents are spread over several tasks
+    monkeypatch.setattr(renderer, "PARALLEL_BATCH_SIZE", 2)
+    data = [{"name": f"doc{index}", "items": [index, {"key": "a:b"}]}
+            for index in range(7)]
+
+    serial = render(data, **options)
+    parallel = render(data, workers=2, **options)
+
+    assert list(parallel.nodes(data=True)) == list(serial.nodes(data=True))
+    assert list(parallel.edges(keys=True, data=True)) == list(
+        serial.edges(keys=True, data=True))
+
+
+def test_iter_render_records_parallel_forward_order(monkeypatch):
+    monkeypatch.setattr(renderer, "PARALLEL_BATCH_SIZE", 2)
+    data = [{"a": [index]} for index in range(5)]
+
+    records = list(
+        iter_render_records(iter(data), document_order="forward", workers=3))
+
+    assert records == list(iter_render_records(data,
+                                               document_order="forward"))
+
+
+def test_render_dag_shares_identical_subtrees():
+    resources = {"limits": {"cpu": "1"}}
+    data = [{
+        "spec": {
+            "first": {"resources": resources},
+            "second": {"resources": dict(resources)},
+            "third": {"resources": {"limits": {"cpu": "2"}}},
+        }
+    }, {
+        "spec": {"first": {"resources": resources}}
+    }]
+
+    tree = render(data)
+    dag = render(data, dag=True)
+
+    assert tree.number_of_nodes() > dag.number_of_nodes()
+    resources_nodes = [
+        node for node, label in dag.nodes(data="label") if label == "resources"
+    ]
+    assert len(resources_nodes) == 2
+    assert sorted(dag.in_degree(node) for node in resources_nodes) == [1, 2]
+    # The identical "first" blocks of both documents are shared as well
+    first = [node for node, label in dag.nodes(data="label") if label == "first"]
+    assert len(first) == 1
+    assert {source for source, _ in dag.in_edges(first[0])} == {"0__spec", "1__spec"}
+    # Every document keeps its own top-level keys
+    assert {"0__spec", "1__spec"} <= set(dag.nodes)
+    # Parents are linked to a shared node once
+    assert len(set(dag.edges())) == dag.number_of_edges()
+
+
+def test_render_dag_matches_tree_without_repeats():
+    data = {"a": {"b": ["c", {"d": "e"}]}}
+
+    tree = render(data)
+    dag = render(data, dag=True)
+
+    assert sorted(label for _, label in tree.nodes(data="label")) == sorted(
+        label for _, label in dag.nodes(data="label"))
+    assert tree.number_of_edges() == dag.number_of_edges()
+
+
+def _labels(graph):
+    return {node: label for node, label in graph.nodes(data="label")}
+
+
+def test_render_max_depth_summarizes_deeper_subtrees():
+    data = {"a": {"b": {"c": 1, "d": [1, 2]}}, "e": 3, "f": {}}
+
+    labels = _labels(render(data, max_depth=2))
+
+    assert labels == {
+        "0__a": "a",
+        "0__a__b": "b",
+        "0__a__b__+": "+5 nodes",
+        "0__e": "e",
+        "0__e__3": "3",
+        "0__f": "f",
+    }
+    assert _labels(render(data, max_depth=0)) == {"0__+": "+10 nodes"}
+    assert _labels(render(data, max_depth=10)) == _labels(render(data))
+
+
+def test_render_max_depth_keeps_list_items_on_their_parent_level():
+    data = {"a": [{"b": {"c": 1}}, {"d": 2}]}
+
+    labels = _labels(render(data, max_depth=2))
+
+    assert labels["0__a__b__+"] == "+2 nodes"
+    assert labels["0__a__d__2"] == "2"
+
+
+def test_depth_for_node_budget():
+    documents = [{"a": {"b": {"c": 1}}, "d": 2}]
+
+    # Level 1 holds a, d and 2, plus one summary node for the mapping under a
+    assert renderer.depth_for_node_budget(documents, 3) == 0
+    assert renderer.depth_for_node_budget(documents, 4) == 1
+    assert renderer.depth_for_node_budget(documents, 5) == 2
+    assert renderer.depth_for_node_budget(documents, 6) is None
+
+
+@pytest.mark.parametrize("max_nodes", [0, 4, 6, 10, 40])
+def test_render_max_nodes_stays_within_budget(max_nodes):
+    data = [{"spec": {"containers": [{"name": f"c{index}", "env": {"A": 1}}
+                                     for index in range(3)]}},
+            {"kind": "Service", "spec": {"ports": [80, 443]}}]
+
+    graph = render(data, max_nodes=max_nodes)
+
+    full = render(data)
+    if max_nodes >= full.number_of_nodes():
+        assert _labels(graph) == _labels(full)
+    else:
+        # One summary node per document is the least that can be shown
+        assert graph.number_of_nodes() <= max(max_nodes, len(data))
+        assert any(label.endswith(" nodes") for label in _labels(graph).values())
+
+
+def test_render_max_nodes_and_max_depth_use_the_shallower_cut():
+    data = {"a": {"b": {"c": {"d": 1}}}}
+
+    assert _labels(render(data, max_depth=1,
+                          max_nodes=100)) == _labels(render(data, max_depth=1))
+    assert _labels(render(data, max_depth=3,
+                          max_nodes=3)) == _labels(render(data, max_depth=2))
+
+
+class _Unprintable:
+
+    def __str__(self):
+        raise AssertionError("hidden list items must not be stringified")
+
+
+def test_render_max_list_items_keeps_head_and_tail():
+    data = {"ids": [0, 1, _Unprintable(), _Unprintable(), _Unprintable(), 5]}
+
+    labels = _labels(render(data, max_list_items=3))
+
+    assert labels == {
+        "0__ids": "ids",
+        "0__ids__0": "0",
+        "0__ids__1": "1",
+        "0__ids__...": "… 3 more",
+        "0__ids__5": "5",
+    }
+    assert _labels(render({"ids": [1, 2, 3]}, max_list_items=3)) == _labels(
+        render({"ids": [1, 2, 3]}))
+
+
+def test_render_max_list_items_keeps_mappings_in_lists():
+    data = {"items": [1, {"a": 2}, 3, 4, 5, {"b": 6}, 7]}
+
+    graph = render(data, max_list_items=2)
+
+    labels = _labels(graph)
+    assert labels["0__items__..."] == "… 3 more"
+    assert {"0__items__a", "0__items__b", "0__items__1", "0__items__7"} <= set(labels)
+    assert "0__items__4" not in labels
+    # Nodes keep the traversal order: the tail of the list comes first, as without the limit
+    assert [node for node in graph.nodes if node.startswith("0__items__")][:2] == [
+        "0__items__7", "0__items__..."
+    ]
+
+
+def test_depth_for_node_budget_counts_collapsed_lists():
+    documents = [{"a": list(range(100)), "b": {"c": 1}}]
+
+    assert renderer.depth_for_node_budget(documents, 10) == 1
+    assert renderer.depth_for_node_budget(documents, 10, max_list_items=4) is None
+
+
+def test_render_counters():
+    data = [{"a": {"b": 1}, "c": ["x", "x"]}, {"a": {"b": 1}}]
+    counters = {}
+    graph = render(data, counters=counters)
+    # The repeated list item shares its node id; the documents have their own prefixes
+    assert counters == {
+        "documents": 2,
+        "duplicate_paths": 1,
+        "nodes": graph.number_of_nodes(),
+        "edges": graph.number_of_edges()
+    }
+
+    parallel_counters = {}
+    render(data, workers=2, counters=parallel_counters)
+    assert parallel_counters == counters
@@ -0,0 +1,228 @@
+import asyncio
+
+import pytest
+import yaml
+
+from yaml2dot.converter import convert_yaml_or_json_to_format
+from yaml2dot.server import (RenderServer, RequestError, ResultCache,
+                             Response, input_format, render_options)
+
+YAML_BODY = b"a:\n  b: [c, d]\n---\ne: f\n"
+
+
+async def _request(port, method, path, body=b"", headers=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    head = [f"{method} {path} HTTP/1.1", "Host: localhost",
+            f"Content-Length: {len(body)}", "Connection: close"]
+    head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status_line, _, rest = response.partition(b"\r\n")
+    response_headers, _, response_body = rest.partition(b"\r\n\r\n")
+    return int(status_line.split()[1]), response_headers.decode(), response_body
+
+
+def _serve(test, **options):
+    # Runs test(server, port) against a server with one worker process
+    async def run():
+        server = RenderServer(workers=1, **options)
+        _, port = await server.start("127.0.0.1", 0)
+        try:
+            return await test(server, port)
+        finally:
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def test_render_options_defaults_and_validation():
+    options = render_options("output_format=json&dag&max_depth=2")
+
+    assert options["output_format"] == "json"
+    assert options["dag"] is True
+    assert options["max_depth"] == 2
+    assert options["multi_view"] is False
+    assert render_options("") == render_options("output_format=dot&rankdir=LR")
+    for query in ("nope=1", "output_format=png", "max_depth=-1", "dag=maybe"):
+        with pytest.raises(RequestError) as error:
+            render_options(query)
+        assert error.value.status == 400
+
+
+def test_input_format():
+    assert input_format("application/json; charset=utf-8") == "json"
+    assert input_format("application/x-ndjson") == "jsonl"
+    assert input_format("") == "yaml"
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", Response(200, "text/plain", b"aaaa"))
+    cache.put("b", Response(200, "text/plain", b"bbbb"))
+    assert cache.get("a") is not None
+    cache.put("c", Response(200, "text/plain", b"cccc"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.evictions == 1 and cache.size == 8
+
+
+def test_serve_renders_dot_and_json():
+
+    async def test(server, port):
+        dot = await _request(port, "POST", "/render", YAML_BODY)
+        graph = await _request(port, "POST", "/render?output_format=json",
+                               b'{"a": [1, 2]}',
+                               {"Content-Type": "application/json"})
+        return dot, graph
+
+    (status, headers, body), (json_status, _, json_body) = _serve(test)
+
+    assert status == 200
+    assert "text/vnd.graphviz" in headers
+    assert body.decode() == convert_yaml_or_json_to_format(
+        list(yaml.safe_load_all(YAML_BODY)))
+    assert json_status == 200
+    assert json_body.decode() == convert_yaml_or_json_to_format(
+        {"a": [1, 2]}, output_format="json")
+
+
+def test_serve_caches_results_and_reports_metrics():
+
+    async def test(server, port):
+        first = await _request(port, "POST", "/render", YAML_BODY)
+        second = await _request(port, "POST", "/render", YAML_BODY)
+        metrics = await _request(port, "GET", "/metrics")
+        return first, second, metrics
+
+    first, second, (status, _, metrics) = _serve(test)
+
+    assert first[2] == second[2]
+    assert status == 200
+    lines = metrics.decode().splitlines()
+    assert "yaml2dot_renders_total 1" in lines
+    assert "yaml2dot_cache_hits_total 1" in lines
+    assert 'yaml2dot_requests_total{path="/render",status="200"} 2' in lines
+    assert "yaml2dot_queue_depth 0" in lines
+    assert 'yaml2dot_request_duration_seconds_bucket{le="+Inf"} 2' in lines
+
+
+def test_serve_error_statuses():
+
+    async def test(server, port):
+        return [(await _request(port, method, path, body))[0]
+                for method, path, body in (
+                    ("POST", "/render", b"a: ["),
+                    ("POST", "/render?shape", b"a: b"),
+                    ("POST", "/render?max_nodes=x", b"a: b"),
+                    ("GET", "/render", b""),
+                    ("GET", "/nowhere", b""),
+                    ("POST", "/render", b"a" * 100),
+                )]
+
+    assert _serve(test, max_body_size=64) == [422, 200, 400, 405, 404, 413]
+
+
+@pytest.mark.parametrize("length", ["-1", "x", "1_0", "+4", " 4 4"])
+def test_serve_rejects_invalid_content_length(length):
+
+    async def test(server, port):
+        # The last Content-Length header is the one read
+        return await _request(port, "POST", "/render", b"a: b",
+                              headers={"Content-Length": length})
+
+    status, _, body = _serve(test)
+    assert status == 400
+    assert b"Invalid Content-Length" in body
+
+
+def test_serve_times_out_and_rejects_when_queue_is_full():
+
+    async def timed_out(server, port):
+        return await _request(port, "POST", "/render", YAML_BODY), server.metrics.timeouts
+
+    (status, _, _), timeouts = _serve(timed_out, timeout=0)
+    assert status == 504
+    assert timeouts == 1
+
+    async def rejected(server, port):
+        return await _request(port, "POST", "/render", YAML_BODY)
+
+    assert _serve(rejected, max_queue=0)[0] == 503
+
+
+def test_serve_replaces_a_worker_whose_render_times_out():
+    # Aliases expand to 10**8 list items, far more than a render can walk within the timeout
+    levels = ["l0: &l0 [" + ", ".join(["x"] * 10) + "]"]
+    levels += [f"l{level}: &l{level} [" + ", ".join([f"*l{level - 1}"] * 10) + "]"
+               for level in range(1, 8)]
+    slow_body = "\n".join(levels).encode() + b"\n"
+
+    async def test(server, port):
+        slow = await _request(port, "POST", "/render", slow_body)
+        fast = await _request(port, "POST", "/render", YAML_BODY)
+        return slow[0], fast[0], server.metrics.timeouts
+
+    assert _serve(test, timeout=1) == (504, 200, 1)
+
+
+def test_serve_keeps_connections_alive():
+
+    async def test(server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        statuses = []
+        for _ in range(2):
+            writer.write(b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+            assert await reader.readexactly(length) == b"ok\n"
+            statuses.append(int(head.split()[1]))
+        writer.close()
+        return statuses
+
+    assert _serve(test) == [200, 200]
+
+
+def test_serve_closes_http_1_0_connections_by_default():
+
+    async def test(server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /health HTTP/1.0\r\n\r\n")
+        await writer.drain()
+        # Reading to the end only returns once the server closes the connection
+        closed = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /health HTTP/1.0\r\nConnection: keep-alive\r\n\r\n")
+        await writer.drain()
+        kept = await reader.readuntil(b"\r\n\r\n")
+        writer.close()
+        return closed, kept
+
+    closed, kept = _serve(test)
+    assert b"Connection: close" in closed and closed.endswith(b"ok\n")
+    assert b"Connection: keep-alive" in kept
+
+
+def test_serve_answers_expect_100_continue():
+
+    async def test(server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST /render HTTP/1.1\r\nHost: localhost\r\n"
+                     b"Content-Length: %d\r\nExpect: 100-continue\r\n\r\n" %
+                     len(YAML_BODY))
+        await writer.drain()
+        interim = await reader.readuntil(b"\r\n\r\n")
+        writer.write(YAML_BODY)
+        await writer.drain()
+        final = await reader.readuntil(b"\r\n\r\n")
+        writer.close()
+        unsupported = await _request(port, "POST", "/render", YAML_BODY,
+                                     headers={"Expect": "something-else"})
+        return interim, int(final.split()[1]), unsupported[0]
+
+    assert _serve(test) == (b"HTTP/1.1 100 Continue\r\n\r\n", 200, 417)
@@ -0,0 +1,54 @@
+import yaml
+
+from yaml2dot.subtrees import SharedSubtrees, SubtreeTable
+
+
+def test_equal_subtrees_get_equal_ids():
+    document = {
+        "a": {"x": [1, {"y": "z"}]},
+        "b": {"x": [1, {"y": "z"}]},
+        "c": {"x": [1, {"y": "other"}]},
+        "d": {"x": ["1", {"y": "z"}]},
+    }
+    table = SubtreeTable()
+    ids = table.index(document)
+
+    assert ids[id(document["a"])] == ids[id(document["b"])]
+    assert ids[id(document["a"])] != ids[id(document["c"])]
+    # Scalars are compared as they are displayed
+    assert ids[id(document["a"])] == ids[id(document["d"])]
+    assert ids[id(document["a"]["x"][1])] == ids[id(document["b"]["x"][1])]
+
+
+def test_subtree_ids_depend_on_order_and_type():
+    table = SubtreeTable()
+    document = [{"a": 1, "b": 2}, {"b": 2, "a": 1}, ["a", "b"], ["b", "a"]]
+    ids = table.index(document)
+
+    assert len({ids[id(item)] for item in document}) == 4
+
+
+def test_subtree_ids_are_stable_across_documents():
+    table = SubtreeTable()
+    first = table.index({"a": {"b": "c"}})
+    size = len(table)
+    second = table.index({"other": {"b": "c"}})
+
+    assert len(table) == size + 1
+    assert set(first.values()) & set(second.values())
+
+
+def test_recursive_documents_are_interned():
+    document = yaml.safe_load("a: &x [1, *x]\n")
+    ids = SubtreeTable().index(document)
+
+    assert id(document["a"]) in ids
+
+
+def test_shared_subtrees_index_document():
+    shared = SharedSubtrees()
+    document = {"a": {"b": "c"}}
+    shared.index_document(document)
+
+    assert shared.ids == shared.table.index(document)
+    assert shared.links == set()
@@ -0,0 +1,105 @@
+import os
+from pathlib import Path
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+import yaml2dot.__main__
+from yaml2dot.__main__ import render_yaml
+from yaml2dot.dot_writer import to_dot_string
+from yaml2dot.renderer import render
+from yaml2dot.watch import (IncrementalDotRenderer, RenderStats,
+                            iter_file_changes)
+
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent / "examples"
+
+
+@pytest.mark.parametrize("example", ["k8-deployment.yaml", "complex.yaml"])
+@pytest.mark.parametrize("options", [{}, {
+    "round_robin": True
+}, {
+    "round_robin": True,
+    "shared_defaults": True
+}, {
+    "document_order": "forward"
+}])
+def test_incremental_render_matches_render(example, options):
+    with open(EXAMPLES_DIR / example) as example_file:
+        data = list(yaml.safe_load_all(example_file))
+    renderer = IncrementalDotRenderer(**options)
+
+    assert renderer.render(data) == to_dot_string(render(data, **options))
+    assert renderer.render(data) == to_dot_string(render(data, **options))
+    assert renderer.stats == RenderStats(rendered=0, reused=len(data))
+
+
+def test_incremental_render_only_renders_changed_documents():
+    data = [{"name": f"doc{index}", "items": [index]} for index in range(5)]
+    renderer = IncrementalDotRenderer(round_robin=True, shared_defaults=True)
+    renderer.render(data)
+
+    data[2]["items"].append("new")
+    output = renderer.render(data)
+    assert renderer.stats == RenderStats(rendered=1, reused=4)
+    assert output == to_dot_string(
+        render(data, round_robin=True, shared_defaults=True))
+
+    # A single document changes the shared defaults, so everything is rendered again
+    output = renderer.render(data[:1])
+    assert renderer.stats == RenderStats(rendered=1, reused=0)
+    assert output == to_dot_string(
+        render(data[:1], round_robin=True, shared_defaults=True))
+
+
+def test_iter_file_changes(temp_dir):
+    watched = temp_dir / "input.yaml"
+    sleeps = []
+    changes = iter_file_changes(str(watched), 0.5, sleep=sleeps.append)
+
+    watched.write_text("a: b\n")
+    next(changes)
+    os.utime(watched, ns=(1, 1))
+    next(changes)
+    watched.write_text("a: bc\n")
+    next(changes)
+
+    assert sleeps == [0.5, 0.5]
+
+
+def test_render_yaml_watch(temp_dir, monkeypatch):
+    yaml_file = temp_dir / "input.yaml"
+    dot_file = temp_dir / "output.dot"
+    yaml_file.write_text("a: b\n---\nc: d\n")
+    outputs = []
+
+    def fake_changes(file_path, interval):
+        yield
+        outputs.append(dot_file.read_text())
+        yaml_file.write_text("a: b\n---\nc: [d\n")
+        yield
+        yaml_file.write_text("a: b\n---\nc: e\n")
+        yield
+        outputs.append(dot_file.read_text())
+
+    monkeypatch.setattr(yaml2dot.__main__, "iter_file_changes", fake_changes)
+    result = CliRunner().invoke(render_yaml, [
+        f"--input-file={yaml_file}", f"--output-file={dot_file}", "--watch"
+    ])
+
+    assert result.exit_code == 0
+    assert "Error parsing YAML" in result.output
+    assert "1 documents rendered, 1 reused" in result.output
+    assert outputs[0] == to_dot_string(render([{"a": "b"}, {"c": "d"}]))
+    assert outputs[1] == to_dot_string(render([{"a": "b"}, {"c": "e"}]))
+
+
+def test_render_yaml_watch_usage_errors(temp_dir):
+    yaml_file = temp_dir / "input.yaml"
+    yaml_file.write_text("a: b\n")
+
+    result = CliRunner().invoke(
+        render_yaml,
+        [f"--input-file={yaml_file}", "--output-file=-", "--watch"])
+
+    assert result.exit_code == 2
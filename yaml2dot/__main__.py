@@ -1,53 +1,387 @@
-import json
+import errno
+import sys
+import time
 from pathlib import Path
+from typing import IO, NoReturn, Optional, Union
 
 import click
-import networkx as nx
-from networkx.readwrite import json_graph
+import yaml
 
-from yaml2dot.data_loader import load_yaml_or_json
-from yaml2dot.renderer import render
+from yaml2dot.batch import MANIFEST_NAME, collect_inputs, run_batch
+from yaml2dot.cache import RenderCache
+from yaml2dot.converter import (convert_yaml_or_json_to_format,
+                                export_yaml_or_json,
+                                stream_yaml_or_json_to_dot)
+from yaml2dot.data_loader import (PARSERS, YAML_ENGINES, JSONStreamError,
+                                  file_format, load_yaml_or_json_with_parser,
+                                  read_yaml_or_json)
+from yaml2dot.diff import compare
+from yaml2dot.dot_writer import DOT_BACKENDS, to_dot_string, write_dot
+from yaml2dot.export import BINARY_FORMATS, EXPORT_FORMATS
+from yaml2dot.json_writer import PRETTY_INDENT, to_json_string, write_json
+from yaml2dot.profiling import (CountingWriter, Profiler, limit_memory,
+                                profile_stage)
+from yaml2dot.renderer import DOCUMENT_ORDERS, render
+from yaml2dot.watch import (DEFAULT_POLL_INTERVAL, IncrementalDotRenderer,
+                            iter_file_changes)
 
 
-@click.command()
+MEGABYTE = 1024 * 1024
+
+# Profiler stages that write the output file
+WRITING_STAGES = ("write", "stream", "export")
+# Errors that can mean the process ran out of memory, see _memory_exceeded
+MEMORY_ERRORS = (MemoryError, OSError)
+
+# Options shared by the render and batch commands
+RENDER_OPTIONS = [
+    click.option(
+        "--rankdir",
+        type=click.Choice(['LR', 'TB']),
+        default='LR',
+        help="Rank direction (LR for left to right, TB for top to bottom)."),
+    click.option("--output-format",
+                 type=click.Choice(['dot', 'json', *EXPORT_FORMATS, '']),
+                 default='dot',
+                 help=
+                 "Output format: DOT, node-link JSON, or for analytics npz (columnar arrays), tsv (edge list) or graphml."
+                 ),
+    click.option(
+        "--compact-json",
+        is_flag=True,
+        help=
+        "Write JSON output without indentation or spaces. By default it is indented by 2 spaces."
+    ),
+    click.option(
+        "--multi-view",
+        is_flag=True,
+        help=
+        "Enable alternative graph view for multiple YAML documents. Disables round robin."
+    ),
+    click.option(
+        "--round-robin",
+        is_flag=True,
+        help=
+        "Enable Round Robin Node Style. If not, defaults to 'rounded' shape."),
+    click.option(
+        "--shape",
+        type=click.STRING,
+        default="rounded",
+        help=
+        "User defined node shape. Default='rounded'. See graphviz page: https://graphviz.org/doc/info/shapes.html for support shapes."
+    ),
+    click.option(
+        "--dot-backend",
+        type=click.Choice(DOT_BACKENDS),
+        default="native",
+        help=
+        "DOT serializer. 'native' writes the graph directly, 'pydot' converts it through pydot first."
+    ),
+    click.option(
+        "--compact-graph",
+        is_flag=True,
+        help=
+        "Only affects --dot-backend pydot: build the array-backed graph before converting it, which needs far less memory. The native backend always uses it. The output is unchanged."
+    ),
+    click.option(
+        "--shared-defaults",
+        is_flag=True,
+        help=
+        "Write attributes shared by every node and edge once as DOT defaults instead of repeating them on each element."
+    ),
+    click.option(
+        "--parser",
+        type=click.Choice(PARSERS),
+        default="auto",
+        help=
+        "Parser backend. 'auto' uses the fastest one installed: libyaml for YAML when PyYAML was built with it, orjson for JSON when installed, falling back to the standard json module. ujson is only used when selected."
+    ),
+    click.option(
+        "--document-order",
+        type=click.Choice(DOCUMENT_ORDERS),
+        default="reversed",
+        help=
+        "Order in which documents are numbered and rendered. 'reversed' (default) starts from the last document and loads the whole file first; 'forward' parses and renders one document at a time."
+    ),
+    click.option(
+        "--yaml-engine",
+        type=click.Choice(YAML_ENGINES),
+        default="constructor",
+        help=
+        "How YAML documents are built. 'events' builds them straight from parser events, skipping PyYAML's node graph and constructor."
+    ),
+    click.option(
+        "--dag",
+        is_flag=True,
+        help=
+        "Render identical subtrees once, with an edge from each of their parents, instead of repeating them."
+    ),
+    click.option(
+        "--max-depth",
+        type=click.IntRange(min=0),
+        default=None,
+        help=
+        "Deepest key level to render, counting the top-level keys as 1. Each deeper subtree is replaced by one summary node such as '+312 nodes'."
+    ),
+    click.option(
+        "--max-nodes",
+        type=click.IntRange(min=0),
+        default=None,
+        help=
+        "Node budget. Renders the shallowest levels that fit and replaces each subtree below them by one summary node."
+    ),
+    click.option(
+        "--max-list-items",
+        type=click.IntRange(min=0),
+        default=None,
+        help=
+        "Show only the first and last few scalar items of longer lists, with one '… N more' node in place of the rest."
+    ),
+    click.option(
+        "--cache-dir",
+        type=click.Path(file_okay=False),
+        default=None,
+        help=
+        "Cache parsed documents and rendered outputs in this directory, keyed by the input contents, parser and options."
+    ),
+    click.option("--cache-size",
+                 type=click.IntRange(min=1),
+                 default=256,
+                 show_default=True,
+                 help="Size limit of each cache tier in megabytes."),
+]
+
+
+def render_options(function):
+    """
+    Applies RENDER_OPTIONS to a command.
+    """
+    for option in reversed(RENDER_OPTIONS):
+        function = option(function)
+    return function
+
+
+def _error_format(error: Exception) -> str:
+    return "YAML" if isinstance(error, yaml.YAMLError) else "JSON"
+
+
+def _write_text_output(output: Union[str, bytes], output_file: str,
+                       output_format: str) -> None:
+    # Writes rendered text exactly as the graph writers below would
+    if isinstance(output, bytes):
+        if output_file == "-":
+            sys.stdout.buffer.write(output)
+        else:
+            output_path = Path(output_file)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            output_path.write_bytes(output)
+        return
+    if output_file == "-":
+        if output_format == 'json':
+            click.echo(output)
+        else:
+            sys.stdout.write(output)
+        return
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path,
+              'w',
+              encoding="utf-8" if output_format in EXPORT_FORMATS else None) as output_stream:
+        output_stream.write(output)
+
+
+def _stdout_text(profiler: Optional[Profiler]) -> IO[str]:
+    # Counts what is written to stdout; a file output is measured once it is closed
+    if profiler is None:
+        return sys.stdout
+    writer = CountingWriter(sys.stdout)
+    click.get_current_context().call_on_close(
+        lambda: profiler.count("bytes_written", writer.bytes_written))
+    return writer
+
+
+def _write_profile(profiler: Profiler, profile_output: str,
+                   output_file: str) -> None:
+    profiler.close()
+    if output_file != "-" and Path(output_file).is_file():
+        profiler.count("bytes_written", Path(output_file).stat().st_size)
+    profiler.write_report(profile_output)
+
+
+def _memory_exceeded(error: Exception, profiler: Optional[Profiler],
+                     max_memory: Optional[int], output_file: str) -> NoReturn:
+    # Near the --max-memory limit, an import that cannot list a directory fails with an
+    # OSError instead of MemoryError
+    if not (isinstance(error, MemoryError) or
+            isinstance(error, OSError) and error.errno == errno.ENOMEM):
+        raise error
+    stage = profiler.current_stage if profiler is not None else None
+    # A partly written output would look complete
+    if stage in WRITING_STAGES and output_file != "-":
+        Path(output_file).unlink(missing_ok=True)
+    message = (f"Memory limit of {max_memory} MB exceeded"
+               if max_memory is not None else "Out of memory")
+    if stage:
+        message += f" during the {stage} stage"
+    message += ". Reduce the graph with --stream, --max-depth, --max-nodes or --max-list-items"
+    if max_memory is not None:
+        message += ", or raise --max-memory"
+    raise click.ClickException(message + ".")
+
+
+def _echo_cache_stats(cache: RenderCache) -> None:
+    for tier, stats in cache.stats().items():
+        click.echo(
+            f"Cache {tier}: {stats.hits} hits, {stats.misses} misses, "
+            f"{stats.stores} stored, {stats.evictions} evicted",
+            err=True)
+
+
+def _watch_input(input_file: str, output_file: str, parser: str,
+                 yaml_engine: str, interval: float, **options) -> None:
+    # Renders the input every time it changes, until interrupted. DOT output without multi_view,
+    # DAG mode or a node budget is rendered incrementally: only changed documents are traversed
+    # again.
+    incremental = None
+    if (options["output_format"] == 'dot' and options["dot_backend"] == "native"
+            and not options["multi_view"] and not options["dag"]
+            and options["max_nodes"] is None):
+        incremental = IncrementalDotRenderer(
+            rankdir=options["rankdir"],
+            round_robin=options["round_robin"],
+            shape=options["shape"],
+            shared_defaults=options["shared_defaults"],
+            document_order=options["document_order"],
+            max_depth=options["max_depth"],
+            max_list_items=options["max_list_items"])
+
+    try:
+        for _ in iter_file_changes(input_file, interval):
+            start = time.perf_counter()
+            try:
+                data, _ = read_yaml_or_json(input_file,
+                                            parser,
+                                            yaml_engine=yaml_engine)
+            except (yaml.YAMLError, JSONStreamError) as error:
+                click.echo(f"Error parsing {_error_format(error)}: {error}",
+                           err=True)
+                continue
+            except ValueError as error:
+                raise click.BadParameter(str(error), param_hint="--parser")
+
+            if incremental is not None and isinstance(data, (dict, list)):
+                output = incremental.render(data)
+                detail = (f" ({incremental.stats.rendered} documents rendered, "
+                          f"{incremental.stats.reused} reused)")
+            else:
+                output = convert_yaml_or_json_to_format(data, **options)
+                detail = ""
+            if output is None:
+                continue
+            _write_text_output(output, output_file, options["output_format"])
+            click.echo(
+                f"Rendered {output_file} in {time.perf_counter() - start:.3f}s{detail}",
+                err=True)
+    except KeyboardInterrupt:
+        pass
+
+
+class DefaultCommandGroup(click.Group):
+    """
+    Command group that runs its default command when the first argument is not a subcommand,
+    so that `yaml2dot --input-file ...` keeps working alongside `yaml2dot batch ...`.
+    """
+
+    def __init__(self, *args, default_command: str = "render", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx, args):
+        if not args or (args[0] not in self.commands
+                         and args[0] not in ctx.help_option_names):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=DefaultCommandGroup, default_command="render")
+def cli():
+    """
+    Render YAML or JSON data as graphs. Without a command, the arguments are passed to render.
+    """
+
+
+@cli.command("render")
 @click.option("--input-file",
               type=click.Path(exists=True),
               metavar="INPUT_FILE",
               required=True,
-              help="Path to the input YAML or JSON file.")
+              help="Path to the input YAML, JSON or JSON Lines (.jsonl, .ndjson) file.")
 @click.option("--output-file",
               type=click.Path(),
               metavar="OUTPUT_FILE",
               required=True,
               help="Path to the output file. Use '-' for stdout JSON format.")
+@render_options
 @click.option(
-    "--rankdir",
-    type=click.Choice(['LR', 'TB']),
-    default='LR',
-    help="Rank direction (LR for left to right, TB for top to bottom).")
-@click.option("--output-format",
-              type=click.Choice(['dot', 'json', '']),
-              default='dot',
-              help="Output format (DOT or JSON).")
+    "--stream",
+    is_flag=True,
+    help=
+    "Write DOT statements while traversing the input instead of building the graph in memory. Only supports the dot output format."
+)
+@click.option("--show-parser",
+              is_flag=True,
+              help="Print the parser backend that read the input to stderr.")
 @click.option(
-    "--multi-view",
+    "--document-workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help=
+    "Number of processes rendering the documents of a multi-document input in parallel. Ignored with --multi-view."
+)
+@click.option("--cache-stats",
+              is_flag=True,
+              help="Print the hits and misses of the cache to stderr.")
+@click.option(
+    "--watch",
     is_flag=True,
     help=
-    "Enable alternative graph view for multiple YAML documents. Disables round robin."
+    "Keep running and render the input again whenever it changes, traversing only the documents that changed."
 )
+@click.option("--watch-interval",
+              type=click.FloatRange(min=0, min_open=True),
+              default=DEFAULT_POLL_INTERVAL,
+              show_default=True,
+              help="Seconds between two checks of the input in --watch mode.")
 @click.option(
-    "--round-robin",
+    "--profile",
+    "profile_output",
+    is_flag=False,
+    flag_value="-",
+    default=None,
+    metavar="[FILE]",
+    help=
+    "Write the time of each stage and counters (documents, nodes, edges, duplicate paths, bytes written) as JSON to FILE, or to stderr without a FILE."
+)
+@click.option(
+    "--profile-memory",
     is_flag=True,
-    help="Enable Round Robin Node Style. If not, defaults to 'rounded' shape.")
+    help=
+    "Trace allocations with tracemalloc and add the peak and retained bytes of each stage to the profile, which is written to stderr without --profile. Makes rendering several times slower."
+)
 @click.option(
-    "--shape",
-    type=click.STRING,
-    default="rounded",
+    "--max-memory",
+    type=click.IntRange(min=1),
+    metavar="MB",
     help=
-    "User defined node shape. Default='rounded'. See graphviz page: https://graphviz.org/doc/info/shapes.html for support shapes."
+    "Abort with an error naming the stage that ran out when the process needs more than MB megabytes, instead of being killed. Linux only."
 )
-def render_yaml(input_file, output_file, rankdir, output_format, multi_view,
-                round_robin, shape):
+def render_yaml(input_file, output_file, rankdir, output_format, compact_json,
+                multi_view, round_robin, shape, dot_backend, stream, compact_graph,
+                shared_defaults, parser, show_parser, document_order,
+                yaml_engine, dag, max_depth, max_nodes, max_list_items, cache_dir,
+                cache_size, document_workers, cache_stats, watch,
+                watch_interval, profile_output, profile_memory, max_memory):
     """
     Render YAML or JSON data as a graph and save it as a DOT or JSON file.
 
@@ -56,40 +390,531 @@ def render_yaml(input_file, output_file, rankdir, output_format, multi_view,
     - output_file (click.Path): The output file where the graph will be saved.
     - rankdir (str): Rank direction for the layout (LR for left to right, TB for top to bottom).
     - output_format (str): Output format (DOT or JSON).
+    - compact_json (bool): Flag to write JSON output without indentation.
     - multi_view (bool): Flag to enable alternative graph view for multiple YAML documents.
     - round_robin (bool): Flag to enable Round Robin Node Style.
     - shape (str): User defined node shape.
+    - dot_backend (str): DOT serializer to use ('native' or 'pydot').
+    - stream (bool): Flag to write DOT output incrementally without building a graph.
+    - compact_graph (bool): Flag to build the array-backed CompactGraph instead of a networkx graph.
+    - shared_defaults (bool): Flag to write shared node and edge attributes once as defaults.
+    - parser (str): Parser backend to use, or 'auto' for the fastest one installed.
+    - show_parser (bool): Flag to print the parser backend to stderr.
+    - document_order (str): 'reversed' or 'forward' document rendering order.
+    - yaml_engine (str): 'constructor' or 'events' YAML document builder.
+    - dag (bool): Flag to render identical subtrees once.
+    - max_depth (int): Deepest key level to render, or None for no limit.
+    - max_nodes (int): Node budget, or None for no limit.
+    - max_list_items (int): Scalar items shown per list, or None for no limit.
+    - cache_dir (click.Path): Directory of the document and output cache, or None to disable it.
+    - cache_size (int): Size limit of each cache tier in megabytes.
+    - document_workers (int): Number of processes rendering documents in parallel.
+    - cache_stats (bool): Flag to print the cache statistics to stderr.
+    - watch (bool): Flag to render the input again whenever it changes.
+    - watch_interval (float): Seconds between two checks of the input in watch mode.
+    - profile_output (str): File the profile is written to, '-' for stderr, or None to disable it.
+    - profile_memory (bool): Flag to add the memory of each stage to the profile.
+    - max_memory (int): Memory limit of the process in megabytes, or None for no limit.
 
     Returns:
     - None
     """
-    data = load_yaml_or_json(input_file)
+    if stream and output_format != 'dot':
+        raise click.UsageError(
+            "--stream only supports the dot output format.")
 
-    if data is None:
+    if profile_memory and profile_output is None:
+        profile_output = "-"
+    profiler = None
+    if profile_output is not None or max_memory is not None:
+        if watch:
+            raise click.UsageError(
+                "--profile, --profile-memory and --max-memory cannot be combined with --watch.")
+        # The memory guard reports the stage that ran out
+        profiler = Profiler(trace_memory=profile_memory)
+    if profile_output is not None:
+        click.get_current_context().call_on_close(
+            lambda: _write_profile(profiler, profile_output, output_file))
+    if max_memory is not None:
+        try:
+            limit_memory(max_memory * MEGABYTE)
+        except ValueError as error:
+            raise click.BadParameter(str(error), param_hint="--max-memory")
+
+    if watch:
+        if stream or output_file == "-":
+            raise click.UsageError(
+                "--watch needs an output file and cannot be combined with --stream.")
+        if file_format(input_file) is None:
+            # Reported the same way as without --watch
+            load_yaml_or_json_with_parser(input_file, parser)
+            return
+        _watch_input(input_file,
+                     output_file,
+                     parser,
+                     yaml_engine,
+                     watch_interval,
+                     output_format=output_format,
+                     compact_json=compact_json,
+                     rankdir=rankdir,
+                     multi_view=multi_view,
+                     round_robin=round_robin,
+                     shape=str(shape),
+                     dot_backend=dot_backend,
+                     compact=compact_graph,
+                     shared_defaults=shared_defaults,
+                     document_order=document_order,
+                     workers=document_workers,
+                     dag=dag,
+                     max_depth=max_depth,
+                     max_nodes=max_nodes,
+                     max_list_items=max_list_items)
         return
 
-    nx_graph = render(data,
-                      rankdir=rankdir,
-                      multi_view=multi_view,
-                      round_robin=round_robin,
-                      shape=str(shape))
+    cache = None
+    if cache_dir and file_format(input_file) is not None:
+        cache = RenderCache(cache_dir, cache_size * MEGABYTE)
+        if cache_stats:
+            click.get_current_context().call_on_close(
+                lambda: _echo_cache_stats(cache))
+
+    if cache is not None and not stream:
+        try:
+            # A cache hit skips every stage, so the conversion is timed as a whole
+            with profile_stage(profiler, "convert"):
+                output, parser_used = cache.convert(
+                    input_file,
+                    parser,
+                    yaml_engine,
+                    output_format=output_format,
+                    compact_json=compact_json,
+                    rankdir=rankdir,
+                    multi_view=multi_view,
+                    round_robin=round_robin,
+                    shape=str(shape),
+                    dot_backend=dot_backend,
+                    compact=compact_graph,
+                    shared_defaults=shared_defaults,
+                    document_order=document_order,
+                    workers=document_workers,
+                    dag=dag,
+                    max_depth=max_depth,
+                    max_nodes=max_nodes,
+                    max_list_items=max_list_items)
+        except (yaml.YAMLError, JSONStreamError) as error:
+            click.echo(f"Error parsing {_error_format(error)}: {error}")
+            return
+        except ValueError as error:
+            raise click.BadParameter(str(error), param_hint="--parser")
+        except MEMORY_ERRORS as error:
+            _memory_exceeded(error, profiler, max_memory, output_file)
+        if show_parser:
+            click.echo(f"Parser: {parser_used}", err=True)
+        if output is not None:
+            try:
+                with profile_stage(profiler, "write"):
+                    _write_text_output(output, output_file, output_format)
+            except MEMORY_ERRORS as error:
+                _memory_exceeded(error, profiler, max_memory, output_file)
+            if profiler is not None and output_file == "-":
+                profiler.count(
+                    "bytes_written",
+                    len(output.encode() if isinstance(output, str) else output))
+        return
+
+    try:
+        with profile_stage(profiler, "parse"):
+            if cache is not None:
+                # Cached documents are stored whole, so they are not read lazily
+                data, parser_used = cache.load(input_file, parser, yaml_engine)
+            else:
+                data, parser_used = load_yaml_or_json_with_parser(
+                    input_file,
+                    parser,
+                    lazy=document_order == "forward",
+                    yaml_engine=yaml_engine)
+    except (yaml.YAMLError, JSONStreamError) as error:
+        click.echo(f"Error parsing {_error_format(error)}: {error}")
+        return
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--parser")
+    except MEMORY_ERRORS as error:
+        _memory_exceeded(error, profiler, max_memory, output_file)
+
+    if show_parser and parser_used:
+        click.echo(f"Parser: {parser_used}", err=True)
+
+    if data is None:
+        return
 
     if output_file != "-":
         output_path = Path(output_file)
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
+    try:
+        if stream:
+            stream_yaml_or_json_to_dot(
+                data,
+                _stdout_text(profiler) if output_file == "-" else output_path,
+                rankdir=rankdir,
+                multi_view=multi_view,
+                round_robin=round_robin,
+                shape=str(shape),
+                shared_defaults=shared_defaults,
+                document_order=document_order,
+                workers=document_workers,
+                dag=dag,
+                max_depth=max_depth,
+                max_nodes=max_nodes,
+                max_list_items=max_list_items,
+                profiler=profiler)
+            return
+
+        if output_format in EXPORT_FORMATS:
+            if output_file == "-":
+                output = (sys.stdout.buffer
+                          if output_format in BINARY_FORMATS else
+                          _stdout_text(profiler))
+            else:
+                output = output_path
+            export_yaml_or_json(data,
+                                output,
+                                output_format,
+                                multi_view=multi_view,
+                                document_order=document_order,
+                                workers=document_workers,
+                                dag=dag,
+                                max_depth=max_depth,
+                                max_nodes=max_nodes,
+                                max_list_items=max_list_items,
+                                profiler=profiler)
+            return
+
+        with profile_stage(profiler, "render"):
+            nx_graph = render(
+                data,
+                rankdir=rankdir,
+                multi_view=multi_view,
+                round_robin=round_robin,
+                shape=str(shape),
+                # The native writers read a CompactGraph, so networkx is only
+                # imported for the pydot backend
+                compact=compact_graph or dot_backend != 'pydot',
+                shared_defaults=shared_defaults,
+                document_order=document_order,
+                workers=document_workers,
+                dag=dag,
+                max_depth=max_depth,
+                max_nodes=max_nodes,
+                max_list_items=max_list_items,
+                counters=profiler.counters if profiler is not None else None)
+    except (yaml.YAMLError, JSONStreamError) as error:
+        # Documents read lazily can fail part way through the file
+        click.echo(f"Error parsing {_error_format(error)}: {error}")
+        if (stream or output_format in EXPORT_FORMATS) and output_file != "-":
+            output_path.unlink(missing_ok=True)
+        return
+    except MEMORY_ERRORS as error:
+        _memory_exceeded(error, profiler, max_memory, output_file)
+
+    try:
+        if output_format == 'dot' and dot_backend == 'pydot' and profiler is not None:
+            # pydot builds the whole text before writing it, so the two are timed apart
+            with profile_stage(profiler, "serialize"):
+                output = to_dot_string(nx_graph, backend=dot_backend)
+            with profile_stage(profiler, "write"):
+                if output_file == "-":
+                    _stdout_text(profiler).write(output)
+                else:
+                    _write_text_output(output, output_file, output_format)
+        elif output_format == 'dot':
+            with profile_stage(profiler, "write"):
+                if output_file == "-":
+                    write_dot(nx_graph, _stdout_text(profiler), backend=dot_backend)
+                else:
+                    write_dot(nx_graph, output_path, backend=dot_backend)
+        elif output_format == 'json':
+            indent = None if compact_json else PRETTY_INDENT
+            with profile_stage(profiler, "write"):
+                if output_file == "-":
+                    stdout = _stdout_text(profiler)
+                    write_json(nx_graph, stdout, indent=indent)
+                    stdout.write("\n")
+                else:
+                    write_json(nx_graph, output_path, indent=indent)
+    except MEMORY_ERRORS as error:
+        _memory_exceeded(error, profiler, max_memory, output_file)
+
+
+@cli.command("batch")
+@click.argument("sources", nargs=-1, metavar="[SOURCE]...")
+@click.option(
+    "--files-from",
+    type=click.File('r'),
+    help="Read more input paths from a file, one per line. Use '-' for stdin.")
+@click.option("--output-dir",
+              type=click.Path(file_okay=False),
+              required=True,
+              help="Directory the graphs are written to.")
+@render_options
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of worker processes. Defaults to the number of CPUs.")
+@click.option(
+    "--manifest",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help=
+    f"Manifest of completed inputs, used to resume an interrupted run. Defaults to OUTPUT_DIR/{MANIFEST_NAME}."
+)
+@click.option(
+    "--no-resume",
+    is_flag=True,
+    help=
+    "Render every input again instead of skipping the ones a previous run completed."
+)
+def render_batch(sources, files_from, output_dir, rankdir, output_format,
+                 compact_json, multi_view, round_robin, shape, dot_backend,
+                 compact_graph, shared_defaults, parser, document_order,
+                 yaml_engine, dag, max_depth, max_nodes, max_list_items,
+                 cache_dir, cache_size, workers, manifest, no_resume):
+    """
+    Render many YAML or JSON files in parallel. SOURCE can be a directory (searched
+    recursively), a glob pattern or a file.
+
+    Parameters:
+    - sources (Tuple[str]): Directories, glob patterns or files to render.
+    - files_from (IO[str]): A file listing more inputs, one per line.
+    - output_dir (click.Path): The directory where the graphs will be saved.
+    - rankdir, output_format, compact_json, multi_view, round_robin, shape, dot_backend,
+      compact_graph, shared_defaults, parser, document_order, yaml_engine, dag, max_depth,
+      max_nodes, max_list_items, cache_dir, cache_size:
+      Render options, as for render.
+    - workers (int): Number of worker processes.
+    - manifest (click.Path): The manifest of completed inputs.
+    - no_resume (bool): Flag to render inputs that a previous run completed again.
+
+    Returns:
+    - None
+    """
+    sources = list(sources)
+    if files_from is not None:
+        sources.extend(line.strip() for line in files_from if line.strip())
+    if not sources:
+        raise click.UsageError("No inputs given.")
+
+    output_path = Path(output_dir)
+    try:
+        inputs = collect_inputs(sources, output_path, output_format or "dot")
+    except ValueError as error:
+        raise click.UsageError(str(error))
+
+    options = {
+        "output_format": output_format or "dot",
+        "compact_json": compact_json,
+        "rankdir": rankdir,
+        "multi_view": multi_view,
+        "round_robin": round_robin,
+        "shape": str(shape),
+        "dot_backend": dot_backend,
+        "compact": compact_graph,
+        "shared_defaults": shared_defaults,
+        "parser": parser,
+        "document_order": document_order,
+        "yaml_engine": yaml_engine,
+        "dag": dag,
+        "max_depth": max_depth,
+        "max_nodes": max_nodes,
+        "max_list_items": max_list_items,
+    }
+    if cache_dir:
+        options["cache_dir"] = cache_dir
+        options["cache_size"] = cache_size * MEGABYTE
+
+    def report(result):
+        if not result.ok:
+            click.echo(f"Failed {result.input}: {result.error}", err=True)
+
+    summary = run_batch(inputs,
+                        options,
+                        Path(manifest) if manifest else output_path /
+                        MANIFEST_NAME,
+                        workers=workers,
+                        resume=not no_resume,
+                        on_result=report)
+    click.echo(f"Rendered {summary.rendered}, skipped {summary.skipped} "
+               f"already rendered, failed {len(summary.failures)}.")
+    if summary.failures:
+        raise SystemExit(1)
+
+
+@cli.command("compare")
+@click.argument("old_file", type=click.Path(exists=True, dir_okay=False))
+@click.argument("new_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--output-file",
+              type=click.Path(),
+              metavar="OUTPUT_FILE",
+              required=True,
+              help="Path to the output file. Use '-' for stdout.")
+@click.option("--output-format",
+              type=click.Choice(['dot', 'json']),
+              default='dot',
+              help="Output format (DOT or JSON).")
+@click.option(
+    "--rankdir",
+    type=click.Choice(['LR', 'TB']),
+    default='LR',
+    help="Rank direction (LR for left to right, TB for top to bottom).")
+@click.option("--shape",
+              type=click.STRING,
+              default="rounded",
+              help="User defined node shape. Default='rounded'.")
+@click.option("--parser",
+              type=click.Choice(PARSERS),
+              default="auto",
+              help="Parser backend, as for render.")
+@click.option("--yaml-engine",
+              type=click.Choice(YAML_ENGINES),
+              default="constructor",
+              help="How YAML documents are built, as for render.")
+@click.option(
+    "--document-order",
+    type=click.Choice(DOCUMENT_ORDERS),
+    default="reversed",
+    show_default=True,
+    help=
+    "Number documents as render does with this order. Documents with the same number are compared, so 'reversed' pairs them from the end of the files and 'forward' from the start."
+)
+def compare_files(old_file, new_file, output_file, output_format, rankdir,
+                  shape, parser, yaml_engine, document_order):
+    """
+    Render what changed between two YAML or JSON files: added nodes in green, removed nodes in red
+    and their modified ancestors in orange. Documents are numbered and paired as render numbers
+    them with the same document order.
+
+    Parameters:
+    - old_file (click.Path): The old input file.
+    - new_file (click.Path): The new input file.
+    - output_file (click.Path): The output file where the graph of changes will be saved.
+    - output_format (str): Output format (DOT or JSON).
+    - rankdir (str): Rank direction for the layout (LR for left to right, TB for top to bottom).
+    - shape (str): User defined node shape.
+    - parser (str): Parser backend to use, or 'auto' for the fastest one installed.
+    - yaml_engine (str): 'constructor' or 'events' YAML document builder.
+    - document_order (str): 'reversed' or 'forward' document numbering.
+
+    Returns:
+    - None
+    """
+    inputs = []
+    for input_file in (old_file, new_file):
+        try:
+            data, _ = read_yaml_or_json(input_file,
+                                        parser,
+                                        yaml_engine=yaml_engine)
+        except (yaml.YAMLError, JSONStreamError) as error:
+            raise click.ClickException(
+                f"Error parsing {_error_format(error)} in {input_file}: {error}")
+        except ValueError as error:
+            raise click.BadParameter(f"{input_file}: {error}",
+                                     param_hint="--parser")
+        inputs.append(data)
+
+    graph, summary = compare(inputs[0],
+                             inputs[1],
+                             rankdir=rankdir,
+                             shape=str(shape),
+                             document_order=document_order)
     if output_format == 'dot':
-        pydot_graph = nx.drawing.nx_pydot.to_pydot(nx_graph)
-        pydot_graph.write_raw(output_path)
-    elif output_format == 'json':
-        if output_file == "-":
-            json_data = json_graph.node_link_data(nx_graph)
-            click.echo(json.dumps(json_data, indent=2))
-        else:
-            with open(output_path, 'w') as json_file:
-                json_data = json_graph.node_link_data(nx_graph)
-                json.dump(json_data, json_file, indent=2)
+        output = to_dot_string(graph)
+    else:
+        output = to_json_string(graph)
+    _write_text_output(output, output_file, output_format)
+    click.echo(
+        f"{summary.added} added, {summary.removed} removed, {summary.modified} modified",
+        err=True)
+
+
+@cli.command("serve")
+# yaml2dot.server is only imported by the command, since asyncio takes longer to import than a
+# small render takes. The defaults are the DEFAULT_* constants of yaml2dot.server.
+@click.option("--host",
+              default="127.0.0.1",
+              show_default=True,
+              help="Address to listen on.")
+@click.option("--port",
+              type=click.IntRange(min=0, max=65535),
+              default=8080,
+              show_default=True,
+              help="Port to listen on.")
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of worker processes rendering requests. Defaults to the number of CPUs.")
+@click.option("--timeout",
+              type=click.FloatRange(min=0, min_open=True),
+              default=30,
+              show_default=True,
+              help="Seconds before a request is answered with 504. A render running longer is stopped.")
+@click.option("--cache-size",
+              type=click.IntRange(min=0),
+              default=64,
+              show_default=True,
+              help="Size limit of the in-memory result cache in megabytes.")
+@click.option("--max-body-size",
+              type=click.IntRange(min=1),
+              default=16,
+              show_default=True,
+              help="Largest accepted request body in megabytes.")
+@click.option(
+    "--max-queue",
+    type=click.IntRange(min=0),
+    default=None,
+    help=
+    "Requests that may wait for a worker before new ones are answered with 503. Defaults to 16 per worker."
+)
+def serve_http(host, port, workers, timeout, cache_size, max_body_size,
+               max_queue):
+    """
+    Serve renders over HTTP. POST a YAML or JSON body to /render to get DOT or node-link JSON
+    back; the query string takes the render options, e.g. /render?output_format=json&max_depth=3.
+    Counters are served at /metrics.
+
+    Parameters:
+    - host (str): Address to listen on.
+    - port (int): Port to listen on.
+    - workers (int): Number of worker processes.
+    - timeout (float): Seconds before a request times out.
+    - cache_size (int): Size limit of the result cache in megabytes.
+    - max_body_size (int): Largest accepted request body in megabytes.
+    - max_queue (int): Requests that may wait for a worker.
+
+    Returns:
+    - None
+    """
+    import asyncio
+
+    from yaml2dot.server import serve
+
+    def started(address):
+        click.echo(f"Serving on http://{address[0]}:{address[1]}", err=True)
+
+    try:
+        asyncio.run(
+            serve(host,
+                  port,
+                  on_start=started,
+                  workers=workers,
+                  timeout=timeout,
+                  cache_size=cache_size * MEGABYTE,
+                  max_body_size=max_body_size * MEGABYTE,
+                  max_queue=max_queue))
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
-    render_yaml()
+    cli()
@@ -0,0 +1,364 @@
+import glob
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import (IO, Any, Callable, Dict, Final, Iterable, Iterator, List,
+                    NamedTuple, Optional, Tuple)
+
+from yaml2dot.cache import DEFAULT_CACHE_SIZE, RenderCache
+from yaml2dot.converter import convert_yaml_or_json_to_format
+from yaml2dot.data_loader import file_format, read_yaml_or_json
+from yaml2dot.export import EXPORT_FORMATS
+
+MANIFEST_NAME: Final = ".yaml2dot-manifest.jsonl"
+GLOB_CHARACTERS: Final = frozenset("*?[")
+# Options that do not change the rendered outputs, left out of the manifest digest
+_DIGEST_NEUTRAL_OPTIONS: Final = frozenset(("cache_dir", "cache_size"))
+
+# Render options of the worker processes, set once by _initialize_worker
+_worker_options: Dict[str, Any] = {}
+
+
+class BatchInput(NamedTuple):
+    """An input file and the path its graph is written to."""
+    input: Path
+    output: Path
+
+
+class BatchResult(NamedTuple):
+    """The outcome of rendering one input file."""
+    input: str
+    output: str
+    ok: bool
+    error: Optional[str]
+    seconds: float
+
+
+class BatchSummary(NamedTuple):
+    """Counts of a batch run, and the results of the inputs that failed."""
+    rendered: int
+    skipped: int
+    failures: List[BatchResult]
+
+
+def _is_supported(path: Path) -> bool:
+    return path.is_file() and file_format(path.name) is not None
+
+
+def collect_inputs(sources: Iterable[str], output_dir: Path,
+                   output_format: str = "dot") -> List[BatchInput]:
+    """
+    Expands directories, glob patterns and file paths into the list of files to render.
+
+    Files found in a directory (recursively) keep their path relative to that directory under
+    output_dir. Files given directly or matched by a glob pattern are written to output_dir
+    under their own name. Only YAML, JSON and JSON Lines files are collected from directories
+    and patterns.
+
+    Parameters:
+    - sources (Iterable[str]): Directories, glob patterns or file paths.
+    - output_dir (Path): The directory the graphs are written to.
+    - output_format (str, optional): 'dot' or 'json', used as the output file extension.
+
+    Returns:
+    - List[BatchInput]: The inputs and their output paths, sorted by input path.
+
+    Raises:
+    - ValueError: If a source does not exist or two inputs would be written to the same output.
+    """
+    pairs: Dict[Path, Path] = {}
+    for source in sources:
+        source_path = Path(source)
+        if source_path.is_dir():
+            for path in sorted(source_path.rglob("*")):
+                if _is_supported(path):
+                    pairs[path] = path.relative_to(source_path)
+        elif GLOB_CHARACTERS & set(source):
+            for match in sorted(glob.glob(source, recursive=True)):
+                path = Path(match)
+                if _is_supported(path):
+                    pairs[path] = Path(path.name)
+        elif source_path.is_file():
+            pairs[source_path] = Path(source_path.name)
+        else:
+            raise ValueError(f"Input not found: {source}")
+
+    inputs: List[BatchInput] = []
+    outputs: Dict[Path, Path] = {}
+    for path in sorted(pairs):
+        output = output_dir / pairs[path].with_suffix(f".{output_format}")
+        if output in outputs:
+            raise ValueError(
+                f"{outputs[output]} and {path} would both be written to {output}")
+        outputs[output] = path
+        inputs.append(BatchInput(path, output))
+    return inputs
+
+
+def options_digest(options: Dict[str, Any]) -> str:
+    """
+    Returns a short digest of the render options, stored in the manifest so that changing an
+    option renders the inputs again.
+    """
+    options = {
+        name: value
+        for name, value in options.items()
+        if name not in _DIGEST_NEUTRAL_OPTIONS
+    }
+    encoded = json.dumps(options, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def _input_signature(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def read_manifest(manifest_path: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads the manifest of a previous run and returns its latest entry for each input.
+
+    Parameters:
+    - manifest_path (Path): The JSON Lines manifest file.
+
+    Returns:
+    - Dict[str, Dict[str, Any]]: The entries keyed by input path. Empty if there is no manifest.
+    """
+    entries: Dict[str, Dict[str, Any]] = {}
+    if not manifest_path.exists():
+        return entries
+    with open(manifest_path, 'r') as manifest:
+        for line in manifest:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # The last line may be cut short if the previous run was killed
+                continue
+            entries[entry["input"]] = entry
+    return entries
+
+
+def is_complete(entry: Optional[Dict[str, Any]], batch_input: BatchInput,
+                digest: str) -> bool:
+    """
+    Tells whether a manifest entry shows that an input was rendered with the same options and
+    has not changed since.
+    """
+    if entry is None or not entry.get("ok") or entry.get("options") != digest:
+        return False
+    if not batch_input.output.exists():
+        return False
+    size, mtime_ns = _input_signature(batch_input.input)
+    return entry.get("size") == size and entry.get("mtime_ns") == mtime_ns
+
+
+def render_file(input_path: str, output_path: str,
+                **options: Any) -> BatchResult:
+    """
+    Renders one input file to a DOT or JSON file and reports the outcome instead of raising.
+
+    Parameters:
+    - input_path (str): The input YAML, JSON or JSON Lines file.
+    - output_path (str): The output file. Its parent directory is created if needed.
+    - options: Render options: output_format, compact_json, rankdir, multi_view, round_robin,
+      shape, dot_backend, compact, shared_defaults, parser, yaml_engine, document_order, dag,
+      max_depth, max_nodes and max_list_items, and optionally cache_dir and cache_size (in bytes) to render through a RenderCache.
+
+    Returns:
+    - BatchResult: The outcome, with the error message if rendering failed.
+    """
+    start = time.perf_counter()
+    try:
+        options = dict(options)
+        parser = options.pop("parser", "auto")
+        yaml_engine = options.pop("yaml_engine", "constructor")
+        cache_dir = options.pop("cache_dir", None)
+        cache_size = options.pop("cache_size", DEFAULT_CACHE_SIZE)
+        if cache_dir:
+            output, _ = RenderCache(cache_dir, cache_size).convert(
+                input_path, parser, yaml_engine, **options)
+        else:
+            data, _ = read_yaml_or_json(
+                input_path,
+                parser,
+                lazy=options.get("document_order") == "forward",
+                yaml_engine=yaml_engine)
+            output = convert_yaml_or_json_to_format(data, **options)
+        if output is None:
+            raise ValueError("The input holds no mapping or list to render")
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(output, bytes):
+            Path(output_path).write_bytes(output)
+        else:
+            # Exports are written as UTF-8 like export.write_export does
+            with open(output_path,
+                      'w',
+                      encoding="utf-8" if options.get("output_format")
+                      in EXPORT_FORMATS else None) as output_file:
+                output_file.write(output)
+    except Exception as error:
+        return BatchResult(input_path, output_path, False,
+                           f"{type(error).__name__}: {error}",
+                           time.perf_counter() - start)
+    return BatchResult(input_path, output_path, True, None,
+                       time.perf_counter() - start)
+
+
+def _initialize_worker(options: Dict[str, Any]) -> None:
+    # Runs once per worker process, which has imported this module and with it the rendering
+    # stack. The options are kept here so that they are not sent with every task.
+    _worker_options.clear()
+    _worker_options.update(options)
+
+
+def _render_in_worker(input_path: str, output_path: str) -> BatchResult:
+    return render_file(input_path, output_path, **_worker_options)
+
+
+def _failed_result(batch_input: BatchInput, error: Exception) -> BatchResult:
+    return BatchResult(str(batch_input.input), str(batch_input.output), False,
+                       f"{type(error).__name__}: {error}", 0.0)
+
+
+def _render_in_pool(pending: List[BatchInput], options: Dict[str, Any],
+                    workers: int) -> Iterator[Tuple[BatchInput, BatchResult]]:
+    # Yields the result of each input as it completes. At most one input per worker is in flight,
+    # so when a worker process dies, e.g. killed for running out of memory, only those inputs
+    # are suspects. They are rendered again one at a time, each in a fresh process, to find the
+    # one that crashed, and the others continue on a new pool.
+    from concurrent.futures import (FIRST_COMPLETED, Future,
+                                    ProcessPoolExecutor, wait)
+    from concurrent.futures.process import BrokenProcessPool
+
+    def new_pool(max_workers: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=max_workers,
+                                   initializer=_initialize_worker,
+                                   initargs=(options, ))
+
+    def submit(executor: ProcessPoolExecutor,
+               batch_input: BatchInput) -> "Future[BatchResult]":
+        return executor.submit(_render_in_worker, str(batch_input.input),
+                               str(batch_input.output))
+
+    queue = deque(pending)
+    while queue:
+        suspects: List[BatchInput] = []
+        broken = False
+        with new_pool(min(workers, len(queue))) as executor:
+            in_flight: Dict["Future[BatchResult]", BatchInput] = {}
+            while True:
+                while queue and len(in_flight) < workers and not broken:
+                    try:
+                        future = submit(executor, queue[0])
+                    except BrokenProcessPool:
+                        broken = True
+                        break
+                    in_flight[future] = queue.popleft()
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch_input = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        suspects.append(batch_input)
+                        continue
+                    except Exception as error:
+                        result = _failed_result(batch_input, error)
+                    yield batch_input, result
+        for batch_input in suspects:
+            with new_pool(1) as executor:
+                try:
+                    result = submit(executor, batch_input).result()
+                except Exception as error:
+                    result = _failed_result(batch_input, error)
+            yield batch_input, result
+
+
+def _write_manifest_entry(manifest: IO[str], batch_input: BatchInput,
+                          result: BatchResult, digest: str) -> None:
+    entry: Dict[str, Any] = {
+        "input": str(batch_input.input),
+        "output": result.output,
+        "ok": result.ok,
+        "options": digest,
+        "seconds": round(result.seconds, 6),
+    }
+    if result.ok:
+        entry["size"], entry["mtime_ns"] = _input_signature(batch_input.input)
+    else:
+        entry["error"] = result.error
+    manifest.write(json.dumps(entry) + "\n")
+    # Flushed after every input so that an interrupted run loses nothing that was finished
+    manifest.flush()
+
+
+def run_batch(inputs: List[BatchInput],
+              options: Dict[str, Any],
+              manifest_path: Path,
+              workers: Optional[int] = None,
+              resume: bool = True,
+              on_result: Optional[Callable[[BatchResult], None]] = None
+              ) -> BatchSummary:
+    """
+    Renders many input files in parallel, recording each completed input in a manifest.
+
+    Inputs that the manifest shows as already rendered with the same options, and that have not
+    changed since, are skipped, so an interrupted run resumes where it stopped. Failures are
+    recorded and reported without stopping the other inputs.
+
+    Parameters:
+    - inputs (List[BatchInput]): The inputs and output paths, as returned by collect_inputs.
+    - options (Dict[str, Any]): Render options passed to render_file.
+    - manifest_path (Path): The JSON Lines manifest to resume from and append to.
+    - workers (int, optional): Number of worker processes. Defaults to the number of CPUs; 1 renders
+      in the current process.
+    - resume (bool, optional): Skip inputs completed by a previous run. If False the manifest is
+      started afresh.
+    - on_result (Callable[[BatchResult], None], optional): Called with each result as it completes.
+
+    Returns:
+    - BatchSummary: The number of rendered and skipped inputs, and the failed results.
+    """
+    digest = options_digest(options)
+    entries = read_manifest(manifest_path) if resume else {}
+    pending = [
+        batch_input for batch_input in inputs
+        if not is_complete(entries.get(str(batch_input.input)), batch_input,
+                           digest)
+    ]
+    skipped = len(inputs) - len(pending)
+    rendered = 0
+    failures: List[BatchResult] = []
+
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path, 'a' if resume else 'w') as manifest:
+
+        def record(batch_input: BatchInput, result: BatchResult) -> None:
+            nonlocal rendered
+            _write_manifest_entry(manifest, batch_input, result, digest)
+            if result.ok:
+                rendered += 1
+            else:
+                failures.append(result)
+            if on_result is not None:
+                on_result(result)
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(pending) <= 1:
+            for batch_input in pending:
+                record(
+                    batch_input,
+                    render_file(str(batch_input.input),
+                                str(batch_input.output), **options))
+        else:
+            for batch_input, result in _render_in_pool(pending, options,
+                                                       workers):
+                record(batch_input, result)
+
+    return BatchSummary(rendered, skipped, failures)
@@ -0,0 +1,362 @@
+import base64
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import (Any, Dict, Final, List, NamedTuple, Optional, Tuple,
+                    Union)
+
+from yaml2dot.converter import convert_yaml_or_json_to_format
+from yaml2dot.data_loader import (SUPPORTED_FORMATS_MESSAGE, file_format,
+                                  read_yaml_or_json, resolve_parser)
+from yaml2dot.export import BINARY_FORMATS
+
+# Bumped when the layout or the encoding of the cache entries change
+CACHE_FORMAT: Final = 2
+DEFAULT_CACHE_SIZE: Final = 256 * 1024 * 1024
+HASH_CHUNK_SIZE: Final = 1 << 20
+# Options that change how an output is produced but not its contents
+_OUTPUT_NEUTRAL_OPTIONS: Final = frozenset(("workers", ))
+# Key of the one-key JSON objects that hold the values JSON has no type for
+_TAG: Final = "\u0000yaml2dot"
+
+
+class TierStats(NamedTuple):
+    """Hit and miss counts of one cache tier since it was opened."""
+    hits: int
+    misses: int
+    stores: int
+    evictions: int
+
+
+class CacheTier:
+    """
+    A directory of cache entries bounded in total size, evicting the least recently used first.
+
+    Each entry is one file named after its key. Reading an entry refreshes its modification time,
+    which is the recency used for eviction, so the tier needs no index and can be shared by
+    several processes: entries are written atomically and a concurrently evicted entry is
+    simply a miss.
+
+    The total size is scanned once when the tier is opened and then estimated from the sizes
+    written; the directory is scanned again only when the estimate goes over the limit.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, suffix: str):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._size = self._scan()[1]
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the entry stored under key, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as entry:
+                value = entry.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        """
+        Stores an entry under key, then evicts old entries if the tier is over its size limit.
+        Entries larger than the limit are not stored.
+        """
+        if len(value) > self.max_bytes:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory,
+                                                 suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, 'wb') as entry:
+                entry.write(value)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        self.stores += 1
+        # Replacing an entry counts it twice, which at worst brings the next scan forward
+        self._size += len(value)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _scan(self) -> Tuple[List[Tuple[int, int, str]], int]:
+        # Returns the (modification time, size, path) of each entry and their total size
+        entries = []
+        total = 0
+        try:
+            listing = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return entries, total
+        for entry in listing:
+            if not entry.name.endswith(self.suffix):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            total += stat.st_size
+        return entries, total
+
+    def _evict(self) -> None:
+        entries, total = self._scan()
+        self._size = total
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._size = total
+
+    def stats(self) -> TierStats:
+        return TierStats(self.hits, self.misses, self.stores, self.evictions)
+
+
+def file_digest(file_path: Union[str, Path]) -> str:
+    """
+    Returns the sha256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint() -> str:
+    """
+    Returns the sha256 hex digest of the yaml2dot source files, so that cache entries made by
+    other code, including an edited source checkout, are not used. Computed on first use.
+    """
+    digest = hashlib.sha256()
+    package_dir = Path(__file__).resolve().parent
+    for path in sorted(package_dir.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _key(*parts: Any) -> str:
+    encoded = json.dumps([CACHE_FORMAT, code_fingerprint(), *parts],
+                         sort_keys=True,
+                         default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _encode_value(value: Any) -> Any:
+    # Lists, string-keyed mappings and JSON scalars are stored as they are; the other values
+    # safe_load can build are stored as {_TAG: [type, payload]}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [_encode_value(item) for item in value]
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value) and list(value) != [_TAG]:
+            return {key: _encode_value(item) for key, item in value.items()}
+        return {
+            _TAG: ["map", [[_encode_value(key),
+                            _encode_value(item)] for key, item in value.items()]]
+        }
+    if isinstance(value, tuple):
+        return {_TAG: ["tuple", [_encode_value(item) for item in value]]}
+    if isinstance(value, (set, frozenset)):
+        return {_TAG: ["set", [_encode_value(item) for item in value]]}
+    if isinstance(value, bytes):
+        return {_TAG: ["bytes", base64.b64encode(value).decode()]}
+    if isinstance(value, datetime.datetime):
+        return {_TAG: ["datetime", value.isoformat()]}
+    if isinstance(value, datetime.date):
+        return {_TAG: ["date", value.isoformat()]}
+    raise TypeError(f"Cannot cache values of type {type(value).__name__}")
+
+
+def _decode_object(value: Dict[str, Any]) -> Any:
+    if len(value) != 1 or _TAG not in value:
+        return value
+    kind, payload = value[_TAG]
+    if kind == "map":
+        return {key: item for key, item in payload}
+    if kind == "tuple":
+        return tuple(payload)
+    if kind == "set":
+        return set(payload)
+    if kind == "bytes":
+        return base64.b64decode(payload)
+    if kind == "datetime":
+        return datetime.datetime.fromisoformat(payload)
+    if kind == "date":
+        return datetime.date.fromisoformat(payload)
+    raise ValueError(f"Unknown cached value type: {kind}")
+
+
+def encode_documents(data: Any) -> bytes:
+    """
+    Encodes parsed documents as JSON for the document tier. Unlike pickle, reading an entry
+    cannot run code, so a cache directory others can write to is not a way to run code as the
+    user. Mappings with other keys than strings, tuples, sets, bytes, dates and datetimes, which
+    safe_load builds, are stored as tagged objects and decoded to the same values.
+
+    Parameters:
+    - data (Any): The parsed data.
+
+    Returns:
+    - bytes: The encoded data.
+
+    Raises:
+    - TypeError: If the data holds a value of another type.
+    """
+    # Escaped as ASCII, since YAML escapes can produce lone surrogates
+    return json.dumps(_encode_value(data), separators=(",", ":")).encode()
+
+
+def decode_documents(entry: bytes) -> Any:
+    """
+    Decodes the data encoded by encode_documents.
+    """
+    return json.loads(entry, object_hook=_decode_object)
+
+
+class RenderCache:
+    """
+    Two-tier content-addressed cache of parsed documents and rendered outputs.
+
+    The document tier stores the parsed data of an input, encoded by encode_documents and keyed by
+    the hash of its contents, the parser backend and the code_fingerprint, so rendering the same
+    input with other options skips parsing. The output tier stores the rendered DOT or JSON text, keyed additionally by the
+    render options, so rendering it again with the same options skips the traversal as well.
+    """
+
+    def __init__(self,
+                 cache_dir: Union[str, Path],
+                 max_bytes: int = DEFAULT_CACHE_SIZE):
+        """
+        Parameters:
+        - cache_dir (Union[str, Path]): The cache directory. Created when the first entry is stored.
+        - max_bytes (int, optional): Size limit of each tier in bytes.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.documents = CacheTier(self.cache_dir / "documents", max_bytes,
+                                   ".json")
+        self.outputs = CacheTier(self.cache_dir / "outputs", max_bytes,
+                                 ".out")
+
+    def load(self,
+             file_path: Union[str, Path],
+             parser: str = "auto",
+             yaml_engine: str = "constructor",
+             digest: Optional[str] = None) -> Tuple[Any, str]:
+        """
+        Reads an input through the document tier. Documents are always loaded eagerly, since
+        they are stored as a whole.
+
+        Parameters:
+        - file_path (Union[str, Path]): The input YAML, JSON or JSON Lines file.
+        - parser (str, optional): A backend name from PARSERS, or 'auto' for the fastest installed one.
+        - yaml_engine (str, optional): 'constructor' or 'events'. Both give the same documents, so
+          it is not part of the key.
+        - digest (str, optional): The file_digest of the input, if already computed.
+
+        Returns:
+        - Tuple[Any, str]: The parsed data and the parser backend name.
+
+        Raises:
+        - The errors of data_loader.read_yaml_or_json.
+        """
+        backend = self._backend(file_path, parser)
+        key = _key("documents", digest or file_digest(file_path), backend)
+        entry = self.documents.get(key)
+        if entry is not None:
+            return decode_documents(entry), backend
+
+        # Given the requested parser, so that 'auto' keeps its fallback to json
+        data, backend = read_yaml_or_json(str(file_path),
+                                          parser,
+                                          yaml_engine=yaml_engine)
+        try:
+            self.documents.put(key, encode_documents(data))
+        except TypeError:
+            # Not cached, but the documents render as usual
+            pass
+        return data, backend
+
+    def convert(self,
+                file_path: Union[str, Path],
+                parser: str = "auto",
+                yaml_engine: str = "constructor",
+                **options: Any) -> Tuple[Optional[Union[str, bytes]], str]:
+        """
+        Renders an input to DOT or JSON text, or an export format, through both tiers.
+
+        Parameters:
+        - file_path (Union[str, Path]): The input YAML, JSON or JSON Lines file.
+        - parser (str, optional): A backend name from PARSERS, or 'auto' for the fastest installed one.
+        - yaml_engine (str, optional): 'constructor' or 'events'.
+        - options: Keyword arguments of converter.convert_yaml_or_json_to_format.
+
+        Returns:
+        - Tuple[Optional[Union[str, bytes]], str]: The rendered text (bytes for binary export
+          formats), or None if the input holds nothing to render, and the parser backend name.
+
+        Raises:
+        - The errors of data_loader.read_yaml_or_json.
+        """
+        backend = self._backend(file_path, parser)
+        digest = file_digest(file_path)
+        key = _key(
+            "outputs", digest, backend, {
+                name: value
+                for name, value in options.items()
+                if name not in _OUTPUT_NEUTRAL_OPTIONS
+            })
+        entry = self.outputs.get(key)
+        if entry is not None:
+            if options.get("output_format") in BINARY_FORMATS:
+                return entry, backend
+            return entry.decode(), backend
+
+        data, backend = self.load(file_path, parser, yaml_engine, digest)
+        output = convert_yaml_or_json_to_format(data, **options)
+        if output is not None:
+            self.outputs.put(
+                key, output if isinstance(output, bytes) else output.encode())
+        return output, backend
+
+    def stats(self) -> Dict[str, TierStats]:
+        """
+        Returns the statistics of the 'documents' and 'outputs' tiers.
+        """
+        return {
+            "documents": self.documents.stats(),
+            "outputs": self.outputs.stats()
+        }
+
+    @staticmethod
+    def _backend(file_path: Union[str, Path], parser: str) -> str:
+        data_format = file_format(str(file_path))
+        if data_format is None:
+            raise ValueError(f"Invalid file format. {SUPPORTED_FORMATS_MESSAGE}")
+        return resolve_parser(data_format, parser)
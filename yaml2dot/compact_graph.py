@@ -0,0 +1,197 @@
+from array import array
+from typing import (TYPE_CHECKING, Any, Dict, Final, Iterator, List, Optional,
+                    Tuple)
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+NO_ATTRS: Final = -1
+
+
+class CompactGraph:
+    """
+    Array-backed directed multigraph used as a lightweight alternative to nx.MultiDiGraph.
+
+    Nodes live in a table of ids and labels, edges in parallel source/target index arrays, and
+    attribute dictionaries are interned once and referenced by id from both. The class exposes the
+    small read-only subset of the networkx graph API used by the writers (nodes, edges, graph,
+    is_directed, is_multigraph), and to_networkx() builds a full networkx graph on request.
+    """
+
+    def __init__(self, rankdir: str = "LR"):
+        self.name = ""
+        self.graph: Dict[str, Any] = {'graph': {'rankdir': rankdir}}
+        self._node_index: Dict[str, int] = {}
+        self._node_ids: List[str] = []
+        self._labels: List[Optional[str]] = []
+        self._label_table: Dict[str, str] = {}
+        self._node_attr_ids = array('i')
+        self._edge_sources = array('i')
+        self._edge_targets = array('i')
+        self._edge_attr_ids = array('i')
+        self._attr_sets: List[Dict[str, Any]] = []
+        self._attr_ids_by_object: Dict[int, int] = {}
+        self._attr_ids_by_content: Dict[Tuple, int] = {}
+        self._interned_objects: List[Dict[str, Any]] = []
+
+    def intern_attrs(self, attrs: Optional[Dict[str, Any]]) -> int:
+        """
+        Returns the id of an attribute set, storing it the first time it is seen.
+
+        Dictionaries are looked up by identity first, since the renderer reuses the same attribute
+        dictionary for every node of a document, and by content otherwise.
+        """
+        if not attrs:
+            return NO_ATTRS
+        attr_id = self._attr_ids_by_object.get(id(attrs))
+        if attr_id is not None:
+            return attr_id
+
+        content_key = tuple(attrs.items())
+        attr_id = self._attr_ids_by_content.get(content_key)
+        if attr_id is None:
+            attr_id = len(self._attr_sets)
+            self._attr_sets.append(dict(attrs))
+            self._attr_ids_by_content[content_key] = attr_id
+        # Keep the dictionary alive so its id() cannot be reused by another object
+        self._interned_objects.append(attrs)
+        self._attr_ids_by_object[id(attrs)] = attr_id
+        return attr_id
+
+    def add_node(self,
+                 node_id: str,
+                 label: Optional[str] = None,
+                 attrs: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Adds a node, or updates the label and attributes of an existing one, and returns its index.
+        """
+        attr_id = self.intern_attrs(attrs)
+        if label is not None:
+            # Labels such as "name" or "image" repeat across the graph; keep one copy of each
+            label = self._label_table.setdefault(label, label)
+        index = self._node_index.get(node_id)
+        if index is None:
+            index = len(self._node_ids)
+            self._node_index[node_id] = index
+            self._node_ids.append(node_id)
+            self._labels.append(label)
+            self._node_attr_ids.append(attr_id)
+        else:
+            if label is not None:
+                self._labels[index] = label
+            if attr_id != NO_ATTRS:
+                self._node_attr_ids[index] = attr_id
+        return index
+
+    def add_edge(self,
+                 source: str,
+                 target: str,
+                 attrs: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Adds an edge, creating bare source and target nodes if they do not exist yet.
+        """
+        source_index = self._node_index.get(source)
+        if source_index is None:
+            source_index = self.add_node(source)
+        target_index = self._node_index.get(target)
+        if target_index is None:
+            target_index = self.add_node(target)
+        self._edge_sources.append(source_index)
+        self._edge_targets.append(target_index)
+        self._edge_attr_ids.append(self.intern_attrs(attrs))
+
+    def has_node(self, node_id: str) -> bool:
+        return node_id in self._node_index
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self._node_index
+
+    def __len__(self) -> int:
+        return len(self._node_ids)
+
+    def number_of_nodes(self) -> int:
+        return len(self._node_ids)
+
+    def number_of_edges(self) -> int:
+        return len(self._edge_sources)
+
+    def is_directed(self) -> bool:
+        return True
+
+    def is_multigraph(self) -> bool:
+        return True
+
+    def _node_data(self, index: int) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        label = self._labels[index]
+        if label is not None:
+            data['label'] = label
+        attr_id = self._node_attr_ids[index]
+        if attr_id != NO_ATTRS:
+            data.update(self._attr_sets[attr_id])
+        return data
+
+    def nodes(self, data: bool = False) -> Iterator[Any]:
+        """
+        Iterates over node ids, or (id, attributes) pairs when data is True, in insertion order.
+        """
+        for index, node_id in enumerate(self._node_ids):
+            if data:
+                yield node_id, self._node_data(index)
+            else:
+                yield node_id
+
+    def _edge_order(self) -> Tuple[List[int], array]:
+        # networkx yields edges grouped by source node (in node order), then by target in the
+        # order each (source, target) pair first appeared, then by key. Keys count parallel edges.
+        keys = array('i', bytes(4 * len(self._edge_sources)))
+        first_seen: Dict[Tuple[int, int], int] = {}
+        counts: Dict[Tuple[int, int], int] = {}
+        for position, pair in enumerate(
+                zip(self._edge_sources, self._edge_targets)):
+            if pair not in first_seen:
+                first_seen[pair] = position
+                counts[pair] = 0
+            keys[position] = counts[pair]
+            counts[pair] += 1
+        order = sorted(range(len(self._edge_sources)),
+                       key=lambda position:
+                       (self._edge_sources[position], first_seen[
+                           (self._edge_sources[position],
+                            self._edge_targets[position])], keys[position]))
+        return order, keys
+
+    def edges(self, keys: bool = False, data: bool = False) -> Iterator[Tuple]:
+        """
+        Iterates over edges in the same order as nx.MultiDiGraph.edges.
+        """
+        order, edge_keys = self._edge_order()
+        for position in order:
+            edge: Tuple = (self._node_ids[self._edge_sources[position]],
+                           self._node_ids[self._edge_targets[position]])
+            if keys:
+                edge += (edge_keys[position], )
+            if data:
+                attr_id = self._edge_attr_ids[position]
+                edge += (dict(self._attr_sets[attr_id])
+                         if attr_id != NO_ATTRS else {}, )
+            yield edge
+
+    def to_networkx(self) -> "nx.MultiDiGraph":
+        """
+        Builds the equivalent nx.MultiDiGraph, with nodes and edges in the same order.
+        """
+        import networkx as nx
+        graph = nx.MultiDiGraph()
+        graph.graph.update(
+            {key: dict(value)
+             for key, value in self.graph.items()})
+        for node_id, node_data in self.nodes(data=True):
+            graph.add_node(node_id, **node_data)
+        for source, target, edge_data in zip(
+            (self._node_ids[index] for index in self._edge_sources),
+            (self._node_ids[index] for index in self._edge_targets),
+            (self._attr_sets[attr_id] if attr_id != NO_ATTRS else {}
+             for attr_id in self._edge_attr_ids)):
+            graph.add_edge(source, target, **edge_data)
+        return graph
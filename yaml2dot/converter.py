@@ -1,50 +1,240 @@
-import json
-from typing import Optional, Union
+from pathlib import Path
+from typing import IO, Any, Iterator, Optional, Union
 
-import networkx as nx
-from networkx.readwrite import json_graph
+from yaml2dot.dot_writer import to_dot_string, write_dot_records
+from yaml2dot.export import EXPORT_FORMATS, export_records, write_export
+from yaml2dot.json_writer import PRETTY_INDENT, to_json_string
+from yaml2dot.profiling import Profiler, profile_stage
+from yaml2dot.renderer import graph_defaults, iter_render_records, render
 
-from yaml2dot.renderer import render
 
+def _is_renderable(data: Any) -> bool:
+    # Documents come as a dict, a list, or a lazy iterator over a YAML stream
+    return isinstance(data, (dict, list, Iterator))
 
-def convert_yaml_or_json_to_format(data: Union[dict, None],
+
+def convert_yaml_or_json_to_format(data: Union[dict, list, Iterator, None],
                                    user_node_attrs: dict = None,
                                    output_format: str = 'dot',
                                    rankdir: str = 'LR',
                                    multi_view: bool = False,
                                    round_robin: bool = False,
-                                   shape: str = 'rounded') -> Optional[str]:
+                                   shape: str = 'rounded',
+                                   dot_backend: str = 'native',
+                                   compact: bool = False,
+                                   shared_defaults: bool = False,
+                                   document_order: str = 'reversed',
+                                   workers: int = 1,
+                                   dag: bool = False,
+                                   max_depth: Optional[int] = None,
+                                   max_nodes: Optional[int] = None,
+                                   max_list_items: Optional[int] = None,
+                                   compact_json: bool = False,
+                                   profiler: Optional[Profiler] = None) -> Optional[Union[str, bytes]]:
     """
-    Convert YAML or JSON data to DOT or JSON format.
+    Convert YAML or JSON data to DOT or JSON format, or to one of the export formats.
 
     Parameters:
-    - data (Union[dict, None]): The input YAML or JSON data as a dictionary or None if there was an error.
+    - data (Union[dict, list, Iterator, None]): The input YAML or JSON data as a dictionary, a list or iterator of documents, or None if there was an error.
     - user_node_attrs (Dict[str, Any], optional): User-defined attributes for each node.
-    - output_format (str): Output format ('dot' or 'json'). Default is 'dot'.
+    - output_format (str): Output format ('dot', 'json', or 'npz', 'tsv' or 'graphml', see export.py). Default is 'dot'.
     - rankdir (str): Rank direction for the layout (LR for left to right, TB for top to bottom). Default is 'LR'.
     - multi_view (bool): Enable alternative graph view for multiple YAML documents. Default is False.
     - round_robin (bool): Enable Round Robin Node Style. If not, defaults to user-defined shapes. Default is False.
     - shape (str): User-defined node shape. Default is 'rounded'.
+    - dot_backend (str): DOT serializer, 'native' or 'pydot'. Default is 'native'.
+    - compact (bool): Build the array-backed CompactGraph instead of a networkx graph. Always done
+      unless dot_backend is 'pydot'; the output is the same. Default is False.
+    - shared_defaults (bool): Write attributes shared by all nodes and edges once as defaults. Default is False.
+    - document_order (str): 'reversed' or 'forward'. Forward renders an iterator of documents lazily. Default is 'reversed'.
+    - workers (int): Number of processes rendering independent documents in parallel. Default is 1.
+    - dag (bool): Render identical subtrees once and link every parent to them. Default is False.
+    - max_depth (int, optional): Deepest key level to render; deeper subtrees become summary nodes. Default is None (no limit).
+    - max_nodes (int, optional): Node budget; the shallowest levels that fit are rendered and the rest summarized. Default is None (no limit).
+    - max_list_items (int, optional): Scalar items shown per list; the others become one "… N more" node. Default is None (no limit).
+    - compact_json (bool): Write JSON without indentation or spaces. Default is False (indented by 2).
+    - profiler (Profiler, optional): Records the time, and the memory if it traces it, of the
+      'render' and 'serialize' stages (one 'export' stage for the export formats), and counts
+      documents, duplicate paths, nodes, edges and bytes written. Default is None.
 
     Returns:
-    - Optional[str]: The converted data in DOT or JSON format as a string or None if there was an error.
+    - Optional[Union[str, bytes]]: The converted data as a string (bytes for npz) or None if there was an error.
     """
-    if data is None or (not isinstance(data, dict) and not isinstance(data,list)):
+    if data is None or not _is_renderable(data):
         return None
-    nx_graph = render(data,
-                      user_node_attrs=user_node_attrs,
-                      rankdir=rankdir,
-                      multi_view=multi_view,
-                      round_robin=round_robin,
-                      shape=shape)
-
-    if output_format == 'dot':
-        # Convert the graph to DOT format
-        pydot_graph = nx.drawing.nx_pydot.to_pydot(nx_graph)
-        return pydot_graph.to_string()
-    elif output_format == 'json':
-        # Convert the graph to JSON format
-        json_data = json_graph.node_link_data(nx_graph)
-        return json.dumps(json_data, indent=2)
-
-    return None
+    counters = profiler.counters if profiler is not None else None
+    if output_format in EXPORT_FORMATS:
+        # Written straight from the traversal; the node and edge attributes are not exported
+        with profile_stage(profiler, "export"):
+            output = export_records(
+                iter_render_records(data,
+                                    multi_view=multi_view,
+                                    document_order=document_order,
+                                    workers=workers,
+                                    dag=dag,
+                                    max_depth=max_depth,
+                                    max_nodes=max_nodes,
+                                    max_list_items=max_list_items,
+                                    counters=counters,
+                                    raw_labels=True), output_format)
+        _count_output(profiler, output)
+        return output
+    with profile_stage(profiler, "render"):
+        nx_graph = render(data,
+                          user_node_attrs=user_node_attrs,
+                          rankdir=rankdir,
+                          multi_view=multi_view,
+                          round_robin=round_robin,
+                          shape=shape,
+                          # Only the pydot backend needs a networkx graph
+                          compact=compact or dot_backend != 'pydot',
+                          shared_defaults=shared_defaults,
+                          document_order=document_order,
+                          workers=workers,
+                          dag=dag,
+                          max_depth=max_depth,
+                          max_nodes=max_nodes,
+                          max_list_items=max_list_items,
+                          counters=counters)
+
+    with profile_stage(profiler, "serialize"):
+        if output_format == 'dot':
+            # Convert the graph to DOT format
+            output = to_dot_string(nx_graph, backend=dot_backend)
+        elif output_format == 'json':
+            # Convert the graph to node-link JSON format
+            output = to_json_string(
+                nx_graph, indent=None if compact_json else PRETTY_INDENT)
+        else:
+            return None
+    _count_output(profiler, output)
+    return output
+
+
+def _count_output(profiler: Optional[Profiler], output: Union[str,
+                                                              bytes]) -> None:
+    if profiler is not None:
+        profiler.count(
+            "bytes_written",
+            len(output.encode() if isinstance(output, str) else output))
+
+
+def stream_yaml_or_json_to_dot(data: Union[dict, list, Iterator, None],
+                               output: Union[str, Path, IO[str]],
+                               user_node_attrs: dict = None,
+                               rankdir: str = 'LR',
+                               multi_view: bool = False,
+                               round_robin: bool = False,
+                               shape: str = 'rounded',
+                               shared_defaults: bool = False,
+                               document_order: str = 'reversed',
+                               workers: int = 1,
+                               dag: bool = False,
+                               max_depth: Optional[int] = None,
+                               max_nodes: Optional[int] = None,
+                               max_list_items: Optional[int] = None,
+                               profiler: Optional[Profiler] = None) -> bool:
+    """
+    Convert YAML or JSON data to DOT, writing statements while the data is traversed instead of
+    building a graph first.
+
+    Parameters:
+    - data (Union[dict, list, Iterator, None]): The input YAML or JSON data as a dictionary, a list or iterator of documents, or None if there was an error.
+    - output (Union[str, Path, IO[str]]): Destination path or writable text stream.
+    - user_node_attrs (Dict[str, Any], optional): User-defined attributes for each node.
+    - rankdir (str): Rank direction for the layout (LR for left to right, TB for top to bottom). Default is 'LR'.
+    - multi_view (bool): Enable alternative graph view for multiple YAML documents. Default is False.
+    - round_robin (bool): Enable Round Robin Node Style. If not, defaults to user-defined shapes. Default is False.
+    - shape (str): User-defined node shape. Default is 'rounded'.
+    - shared_defaults (bool): Write attributes shared by all nodes and edges once as defaults. Default is False.
+    - document_order (str): 'reversed' or 'forward'. Forward renders an iterator of documents lazily. Default is 'reversed'.
+    - workers (int): Number of processes rendering independent documents in parallel. Default is 1.
+    - dag (bool): Render identical subtrees once and link every parent to them. Default is False.
+    - max_depth (int, optional): Deepest key level to render; deeper subtrees become summary nodes. Default is None (no limit).
+    - max_nodes (int, optional): Node budget; the shallowest levels that fit are rendered and the rest summarized. Default is None (no limit).
+    - max_list_items (int, optional): Scalar items shown per list; the others become one "… N more" node. Default is None (no limit).
+    - profiler (Profiler, optional): Records the time, and the memory if it traces it, of the
+      'stream' stage, which traverses the data and writes the output, and counts documents,
+      duplicate paths, nodes and edges. Default is None.
+
+    Returns:
+    - bool: True if the DOT output was written, False if the data was invalid.
+    """
+    if data is None or not _is_renderable(data):
+        return False
+    defaults = None
+    if shared_defaults:
+        defaults = graph_defaults(data,
+                                  user_node_attrs=user_node_attrs,
+                                  multi_view=multi_view,
+                                  round_robin=round_robin,
+                                  shape=shape)
+    records = iter_render_records(data,
+                                  user_node_attrs=user_node_attrs,
+                                  multi_view=multi_view,
+                                  round_robin=round_robin,
+                                  shape=shape,
+                                  defaults=defaults,
+                                  document_order=document_order,
+                                  workers=workers,
+                                  dag=dag,
+                                  max_depth=max_depth,
+                                  max_nodes=max_nodes,
+                                  max_list_items=max_list_items,
+                                  counters=profiler.counters
+                                  if profiler is not None else None)
+    with profile_stage(profiler, "stream"):
+        write_dot_records(records, output, rankdir=rankdir, defaults=defaults)
+    return True
+
+
+def export_yaml_or_json(data: Union[dict, list, Iterator, None],
+                        output: Union[str, Path, IO],
+                        output_format: str,
+                        multi_view: bool = False,
+                        document_order: str = 'reversed',
+                        workers: int = 1,
+                        dag: bool = False,
+                        max_depth: Optional[int] = None,
+                        max_nodes: Optional[int] = None,
+                        max_list_items: Optional[int] = None,
+                        profiler: Optional[Profiler] = None) -> bool:
+    """
+    Convert YAML or JSON data to one of the export formats, writing it straight from the traversal.
+    TSV and GraphML are written while the data is traversed. Labels hold the text of keys and
+    values as it is, and ids are their unescaped paths, unlike the DOT output.
+
+    Parameters:
+    - data (Union[dict, list, Iterator, None]): The input YAML or JSON data as a dictionary, a list or iterator of documents, or None if there was an error.
+    - output (Union[str, Path, IO]): Destination path, or a binary stream for npz and a text stream otherwise.
+    - output_format (str): 'npz', 'tsv' or 'graphml'.
+    - multi_view (bool): Enable alternative graph view for multiple YAML documents. Default is False.
+    - document_order (str): 'reversed' or 'forward'. Forward renders an iterator of documents lazily. Default is 'reversed'.
+    - workers (int): Number of processes rendering independent documents in parallel. Default is 1.
+    - dag (bool): Render identical subtrees once and link every parent to them. Default is False.
+    - max_depth (int, optional): Deepest key level to render; deeper subtrees become summary nodes. Default is None (no limit).
+    - max_nodes (int, optional): Node budget; the shallowest levels that fit are rendered and the rest summarized. Default is None (no limit).
+    - max_list_items (int, optional): Scalar items shown per list; the others become one "… N more" node. Default is None (no limit).
+    - profiler (Profiler, optional): Records the time, and the memory if it traces it, of the
+      'export' stage, which traverses the data and writes the output, and counts documents,
+      duplicate paths, nodes and edges. Default is None.
+
+    Returns:
+    - bool: True if the output was written, False if the data was invalid.
+    """
+    if data is None or not _is_renderable(data):
+        return False
+    records = iter_render_records(data,
+                                  multi_view=multi_view,
+                                  document_order=document_order,
+                                  workers=workers,
+                                  dag=dag,
+                                  max_depth=max_depth,
+                                  max_nodes=max_nodes,
+                                  max_list_items=max_list_items,
+                                  counters=profiler.counters
+                                  if profiler is not None else None,
+                                  raw_labels=True)
+    with profile_stage(profiler, "export"):
+        write_export(records, output, output_format)
+    return True
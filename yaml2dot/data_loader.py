@@ -1,11 +1,121 @@
+import importlib
 import json
-from typing import IO, Any, List, Optional, Tuple
+from typing import IO, Any, Dict, Final, Iterator, List, Optional, Tuple
 
 import yaml
 
+from yaml2dot.event_builder import iter_event_file_documents
+
+# Parser backends per input format, fastest first. "auto" picks the first one that is installed.
+YAML_PARSERS: Final = ("libyaml", "pyyaml")
+JSON_PARSERS: Final = ("orjson", "ujson", "json")
+# JSON parsers "auto" picks from. ujson rounds some floats, so it is only used when asked for
+AUTO_JSON_PARSERS: Final = ("orjson", "json")
+PARSERS: Final = ("auto", ) + YAML_PARSERS + JSON_PARSERS
+JSON_CHUNK_SIZE: Final = 1 << 16
+# How YAML documents are built: PyYAML's composer and constructor, or straight from parser events
+YAML_ENGINES: Final = ("constructor", "events")
+
+
+class JSONStreamError(ValueError):
+    """Raised when JSON or JSON Lines input cannot be parsed, including while it is read lazily."""
+
+
+def _yaml_loader(parser: str) -> Any:
+    if parser == "libyaml":
+        return getattr(yaml, "CSafeLoader", None)
+    return yaml.SafeLoader
+
+
+def _json_module(parser: str) -> Any:
+    try:
+        return importlib.import_module(parser)
+    except ImportError:
+        return None
+
+
+def _json_loads(content: bytes, backend: str,
+                fallback: bool) -> Tuple[Any, str]:
+    # orjson rejects NaN, Infinity, overflowing floats and integers beyond 64 bits, which json
+    # accepts, so with fallback those inputs are read by json and give the same data
+    try:
+        return _json_module(backend).loads(content), backend
+    except ValueError:
+        if not fallback or backend == "json":
+            raise
+        return json.loads(content), "json"
+
+
+def available_parsers() -> Dict[str, List[str]]:
+    """
+    Reports which parser backends are installed for each input format, fastest first.
+
+    Returns:
+    - Dict[str, List[str]]: The available backends keyed by format ('yaml' and 'json').
+    """
+    return {
+        "yaml": [
+            parser for parser in YAML_PARSERS
+            if _yaml_loader(parser) is not None
+        ],
+        "json": [
+            parser for parser in JSON_PARSERS
+            if _json_module(parser) is not None
+        ],
+    }
+
+
+def file_format(file_path: str) -> Optional[str]:
+    """
+    Returns 'yaml', 'json' or 'jsonl' based on the file extension, or None if it is not supported.
+    """
+    file_extension = file_path.lower().split('.')[-1]
+    if file_extension in ('yaml', 'yml'):
+        return 'yaml'
+    if file_extension == 'json':
+        return 'json'
+    if file_extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    return None
+
+
+def resolve_parser(data_format: str, parser: str = "auto") -> str:
+    """
+    Resolves the parser backend used for an input format.
+
+    Parameters:
+    - data_format (str): The input format, 'yaml', 'json' or 'jsonl'. JSON Lines use the JSON parsers.
+    - parser (str, optional): A backend name from PARSERS, or 'auto' for the fastest installed one
+      that gives the same data as the standard library (so ujson is never picked).
+
+    Returns:
+    - str: The backend name.
+
+    Raises:
+    - ValueError: If the backend is unknown, does not read this format, or is not installed.
+    """
+    if data_format == 'jsonl':
+        data_format = 'json'
+    available = available_parsers()[data_format]
+    if parser == "auto":
+        if data_format == 'json':
+            return next(backend for backend in available
+                        if backend in AUTO_JSON_PARSERS)
+        return available[0]
+    if parser not in PARSERS:
+        raise ValueError(
+            f"Unknown parser: {parser}. Supported parsers: {', '.join(PARSERS)}"
+        )
+    if parser not in (YAML_PARSERS if data_format == 'yaml' else JSON_PARSERS):
+        raise ValueError(f"Parser {parser} cannot read {data_format} files")
+    if parser not in available:
+        raise ValueError(f"Parser {parser} is not installed")
+    return parser
+
 
 def parse_yaml(
-        reader: IO[str]
+    reader: IO[str],
+    parser: str = "pyyaml"
 ) -> Tuple[Optional[List[dict]], Optional[yaml.YAMLError]]:
     """
     Parse YAML data from a file-like object and return the parsed dictionaries for all documents 
@@ -13,44 +123,329 @@ def parse_yaml(
 
     Parameters:
     - reader (IO[str]): A file-like object containing YAML data.
+    - parser (str, optional): 'pyyaml' for the pure Python SafeLoader or 'libyaml' for CSafeLoader.
 
     Returns:
     - Tuple[Optional[List[dict]], Optional[yaml.YAMLError]]: A tuple containing a list of parsed 
       dictionaries (or None if there was an error) and any parsing error (or None if parsing was successful).
     """
     try:
-        parsed_yaml = list(yaml.safe_load_all(reader))
+        parsed_yaml = list(yaml.load_all(reader,
+                                         Loader=_yaml_loader(parser)))
         return parsed_yaml, None
     except yaml.YAMLError as error:
         return None, error
 
 
-def load_yaml_or_json(file_path: str) -> Optional[Any]:
+def iter_yaml_documents(file_path: str, parser: str = "pyyaml") -> Iterator[Any]:
     """
-    Load YAML or JSON data from a file and return the parsed dictionaries for YAML or dictionary for JSON.
+    Parse a multi-document YAML file lazily, yielding one document at a time.
+
+    The file stays open until the generator is exhausted or closed. Parsing errors are raised as
+    yaml.YAMLError by the iteration that reaches them, after the preceding documents were yielded.
 
     Parameters:
-    - file_path (str): The path to the input YAML or JSON file.
+    - file_path (str): The path to the input YAML file.
+    - parser (str, optional): 'pyyaml' for the pure Python SafeLoader or 'libyaml' for CSafeLoader.
 
     Returns:
-    - Optional[Any]: The parsed data (list of dictionaries for YAML, dictionary for JSON) or None if there was an error.
+    - Iterator[Any]: The parsed documents in file order.
     """
-    file_extension = file_path.lower().split('.')[-1]
+    with open(file_path, 'r') as file:
+        yield from yaml.load_all(file, Loader=_yaml_loader(parser))
 
-    if file_extension in ('yaml', 'yml'):
+
+def _parse_json(file_path: str, parser: str, fallback: bool) -> Tuple[Any, str]:
+    if parser == "json":
         with open(file_path, 'r') as file:
-            parsed_data, error = parse_yaml(file)
-            if error:
-                print(f"Error parsing YAML: {error}")
-            return parsed_data
-    elif file_extension == 'json':
-        try:
-            with open(file_path, 'r') as file:
-                return json.load(file)
-        except json.JSONDecodeError as error:
-            print(f"Error parsing JSON: {error}")
+            return json.load(file), parser
+    with open(file_path, 'rb') as file:
+        return _json_loads(file.read(), parser, fallback)
+
+
+def iter_json_lines(file_path: str,
+                    parser: str = "json",
+                    fallback: bool = False) -> Iterator[Any]:
+    """
+    Parse a JSON Lines (newline-delimited JSON) file lazily, yielding one document per line.
+
+    Blank lines are skipped. An invalid line raises JSONStreamError from the iteration that
+    reaches it, after the preceding documents were yielded.
+
+    Parameters:
+    - file_path (str): The path to the input .jsonl or .ndjson file.
+    - parser (str, optional): A backend name from JSON_PARSERS.
+    - fallback (bool, optional): Read the lines `parser` rejects with the standard json module
+      before reporting an error. Default is False.
+
+    Returns:
+    - Iterator[Any]: The parsed documents in file order.
+    """
+    with open(file_path, 'rb') as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                yield _json_loads(line, parser, fallback)[0]
+            except ValueError as error:
+                raise JSONStreamError(f"line {line_number}: {error}") from error
+
+
+def _read_json_lines(file_path: str, parser: str,
+                     fallback: bool) -> Tuple[List[Any], str]:
+    try:
+        return list(iter_json_lines(file_path, parser)), parser
+    except JSONStreamError:
+        if not fallback or parser == "json":
+            raise
+        return list(iter_json_lines(file_path, "json")), "json"
+
+
+# Characters that may follow a decoded number prefix when the number was cut by a chunk
+# boundary; "" stands for a buffer with no delimiter yet
+_NUMBER_CONTINUATION: Final = frozenset(("", ".", "e", "E", "+", "-", *"0123456789"))
+
+
+def iter_json_array(reader: IO[str],
+                    chunk_size: int = JSON_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Parse a top-level JSON array incrementally, yielding its elements one at a time.
+
+    The text is read in chunks and each element is decoded with json.JSONDecoder.raw_decode, so
+    only the current element and one chunk of text are held in memory. Elements larger than a
+    chunk are handled by reading progressively larger chunks until they decode.
+
+    Parameters:
+    - reader (IO[str]): A file-like object whose content is a JSON array.
+    - chunk_size (int, optional): The number of characters read at a time.
+
+    Returns:
+    - Iterator[Any]: The elements of the array, equal to the items of json.load(reader).
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    at_end = False
+
+    def read_more(size: int) -> bool:
+        nonlocal buffer, position, at_end
+        chunk = reader.read(size)
+        if not chunk:
+            at_end = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    def next_char() -> str:
+        # Skips whitespace and returns the next significant character, or "" at the end of input
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\n\r":
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if not read_more(chunk_size):
+                return ""
+
+    if next_char() != "[":
+        raise JSONStreamError("Expecting a JSON array")
+    position += 1
+    if next_char() == "]":
+        position += 1
     else:
-        print(
-            "Invalid file format. Supported formats: YAML (.yaml, .yml) and JSON (.json)"
-        )
-        return None
+        while True:
+            char = next_char()
+            if not char:
+                raise JSONStreamError("Unterminated JSON array")
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as error:
+                # The element may continue in the next chunk
+                if read_more(max(chunk_size, len(buffer))):
+                    continue
+                raise JSONStreamError(str(error)) from error
+            if (char not in '"[{' and not at_end
+                    and buffer[end:].lstrip(" \t\n\r")[:1] in _NUMBER_CONTINUATION
+                    and read_more(chunk_size)):
+                # A number or literal not yet followed by a delimiter may be cut in the middle,
+                # e.g. "12" decoded from "12." before the rest of "12.75" was read
+                continue
+            position = end
+            yield value
+
+            char = next_char()
+            position += 1
+            if char == "]":
+                break
+            if char != ",":
+                raise JSONStreamError(
+                    f"Expecting ',' delimiter or ']' but found {char or 'the end of input'!r}"
+                )
+    if next_char():
+        raise JSONStreamError("Extra data after the JSON array")
+
+
+def _iter_json_array_file(file_path: str) -> Iterator[Any]:
+    with open(file_path, 'r') as file:
+        yield from iter_json_array(file)
+
+
+def _starts_with_array(file_path: str) -> bool:
+    with open(file_path, 'r') as file:
+        while True:
+            chunk = file.read(JSON_CHUNK_SIZE)
+            if not chunk:
+                return False
+            stripped = chunk.lstrip()
+            if stripped:
+                return stripped[0] == "["
+
+
+SUPPORTED_FORMATS_MESSAGE: Final = "Supported formats: YAML (.yaml, .yml), JSON (.json) and JSON Lines (.jsonl, .ndjson)"
+
+
+def read_yaml_or_json(file_path: str,
+                      parser: str = "auto",
+                      lazy: bool = False,
+                      yaml_engine: str = "constructor") -> Tuple[Any, str]:
+    """
+    Read YAML or JSON data from a file, raising parsing errors instead of printing them.
+
+    Parameters:
+    - file_path (str): The path to the input YAML, JSON or JSON Lines file.
+    - parser (str, optional): A backend name from PARSERS, or 'auto' for the fastest installed one.
+      With 'auto', JSON that orjson rejects but the standard json module accepts (such as NaN or
+      floats that overflow) is read by json, and 'json' is reported unless the input is JSON
+      Lines read lazily.
+    - lazy (bool, optional): Return documents as a generator instead of a list: YAML documents
+      from iter_yaml_documents, JSON Lines documents from iter_json_lines, and the elements of a
+      top-level JSON array from iter_json_array. Errors are then raised while iterating. As
+      iter_json_array uses the stdlib decoder, a JSON array is only read lazily with the 'auto'
+      or 'json' parser. Other JSON files are always loaded eagerly.
+    - yaml_engine (str, optional): 'constructor' (default) to load YAML with PyYAML's loader, or
+      'events' to build the documents from parser events with event_builder. Both give equal data.
+
+    Returns:
+    - Tuple[Any, str]: The parsed data and the parser backend name.
+
+    Raises:
+    - yaml.YAMLError: If a YAML document cannot be parsed.
+    - JSONStreamError: If JSON or JSON Lines input cannot be parsed.
+    - ValueError: If the file format is not supported or the parser cannot be used for it.
+    """
+    data_format = file_format(file_path)
+    if data_format is None:
+        raise ValueError(f"Invalid file format. {SUPPORTED_FORMATS_MESSAGE}")
+    backend = resolve_parser(data_format, parser)
+
+    if data_format == 'yaml':
+        if yaml_engine == "events":
+            documents = iter_event_file_documents(file_path, backend)
+        else:
+            documents = iter_yaml_documents(file_path, backend)
+        return (documents if lazy else list(documents)), backend
+    fallback = parser == "auto"
+    if data_format == 'jsonl':
+        if lazy:
+            return iter_json_lines(file_path, backend, fallback), backend
+        return _read_json_lines(file_path, backend, fallback)
+    if lazy and parser in ("auto", "json") and _starts_with_array(file_path):
+        return _iter_json_array_file(file_path), "json"
+    try:
+        return _parse_json(file_path, backend, fallback)
+    except ValueError as error:
+        # json.JSONDecodeError and the errors of orjson and ujson are all ValueErrors
+        raise JSONStreamError(str(error)) from error
+
+
+def parse_yaml_or_json_bytes(content: bytes,
+                             data_format: str,
+                             parser: str = "auto") -> Tuple[Any, str]:
+    """
+    Parse YAML, JSON or JSON Lines data held in memory, such as the body of a request.
+
+    Parameters:
+    - content (bytes): The encoded data.
+    - data_format (str): 'yaml', 'json' or 'jsonl'.
+    - parser (str, optional): A backend name from PARSERS, or 'auto' for the fastest installed one.
+      With 'auto', data orjson rejects is read by the standard json module, as in read_yaml_or_json.
+
+    Returns:
+    - Tuple[Any, str]: The parsed data, a list of documents for YAML and JSON Lines, and the
+      parser backend that read it.
+
+    Raises:
+    - yaml.YAMLError: If a YAML document cannot be parsed.
+    - JSONStreamError: If JSON or JSON Lines input cannot be parsed.
+    - ValueError: If the parser cannot be used for the format.
+    """
+    backend = resolve_parser(data_format, parser)
+    if data_format == 'yaml':
+        return list(yaml.load_all(content,
+                                  Loader=_yaml_loader(backend))), backend
+    fallback = parser == "auto"
+    try:
+        if data_format == 'jsonl':
+            lines = [line for line in content.splitlines() if line.strip()]
+            try:
+                return [_json_loads(line, backend, False)[0]
+                        for line in lines], backend
+            except ValueError:
+                if not fallback or backend == "json":
+                    raise
+                return [json.loads(line) for line in lines], "json"
+        return _json_loads(content, backend, fallback)
+    except ValueError as error:
+        raise JSONStreamError(str(error)) from error
+
+
+def load_yaml_or_json_with_parser(
+        file_path: str,
+        parser: str = "auto",
+        lazy: bool = False,
+        yaml_engine: str = "constructor") -> Tuple[Optional[Any], Optional[str]]:
+    """
+    Load YAML or JSON data from a file and report the parser backend that read it.
+
+    Parameters:
+    - file_path (str): The path to the input YAML or JSON file.
+    - parser (str, optional): A backend name from PARSERS, or 'auto' for the fastest installed one.
+    - lazy (bool, optional): Return documents as a generator, see read_yaml_or_json. Errors are
+      then raised while iterating (yaml.YAMLError or JSONStreamError) rather than printed.
+    - yaml_engine (str, optional): 'constructor' (default) or 'events', see read_yaml_or_json.
+
+    Returns:
+    - Tuple[Optional[Any], Optional[str]]: The parsed data (or None if there was an error) and the
+      backend name (or None if the file format is not supported).
+
+    Raises:
+    - ValueError: If the requested parser cannot be used for this file.
+    """
+    data_format = file_format(file_path)
+    if data_format is None:
+        print(f"Invalid file format. {SUPPORTED_FORMATS_MESSAGE}")
+        return None, None
+
+    backend = resolve_parser(data_format, parser)
+    try:
+        return read_yaml_or_json(file_path, parser, lazy, yaml_engine)
+    except yaml.YAMLError as error:
+        print(f"Error parsing YAML: {error}")
+    except JSONStreamError as error:
+        print(f"Error parsing JSON: {error}")
+    return None, backend
+
+
+def load_yaml_or_json(file_path: str, parser: str = "auto") -> Optional[Any]:
+    """
+    Load YAML or JSON data from a file and return the parsed dictionaries for YAML or dictionary for JSON.
+
+    Parameters:
+    - file_path (str): The path to the input YAML or JSON file.
+    - parser (str, optional): A backend name from PARSERS, or 'auto' for the fastest installed one.
+
+    Returns:
+    - Optional[Any]: The parsed data (list of dictionaries for YAML, dictionary for JSON) or None if there was an error.
+    """
+    return load_yaml_or_json_with_parser(file_path, parser)[0]
@@ -0,0 +1,238 @@
+from itertools import zip_longest
+from typing import Any, Dict, Final, List, NamedTuple, Optional, Set, Tuple
+
+from yaml2dot.compact_graph import CompactGraph
+from yaml2dot.renderer import (EDGE_ATTRS, SEPARATOR, EdgeRecord, NodeRecord,
+                               add_compact_record, base_node_attrs, dot_leaf,
+                               iter_bfs_records, iter_documents)
+from yaml2dot.subtrees import SubtreeTable
+
+ADDED: Final = "added"
+REMOVED: Final = "removed"
+MODIFIED: Final = "modified"
+# Unchanged nodes and edges kept to connect changes to their ancestors
+CONTEXT: Final = "context"
+# The space makes the writer quote the style list, which Graphviz cannot parse unquoted
+NODE_STYLES: Final = {
+    ADDED: {"color": "#2e7d32", "fillcolor": "#e8f5e9", "style": "rounded, filled"},
+    REMOVED: {"color": "#c62828", "fillcolor": "#ffebee", "style": "rounded, filled"},
+    MODIFIED: {"color": "#ef6c00", "fillcolor": "#fff3e0", "style": "rounded, filled"},
+}
+EDGE_STYLES: Final = {
+    ADDED: {"color": "#2e7d32"},
+    REMOVED: {"color": "#c62828", "style": "dashed"},
+}
+# Stands in for a document or mapping value that only exists on one side
+_MISSING: Final = object()
+
+
+class DiffSummary(NamedTuple):
+    """Number of nodes added, removed and modified between two inputs."""
+    added: int
+    removed: int
+    modified: int
+
+
+def _merge_status(current: Optional[str], status: str) -> str:
+    # A node can be reached from several changes: a change beats context, and a node added by
+    # one change and removed by another was modified
+    if current is None or current == status or current == CONTEXT:
+        return status
+    if status == CONTEXT:
+        return current
+    return MODIFIED
+
+
+class _DiffBuilder:
+    """Collects the changed nodes and edges of two inputs, keyed by the renderer's node ids."""
+
+    def __init__(self):
+        self.table = SubtreeTable()
+        self.ids: Dict[int, int] = {}
+        self.nodes: Dict[str, Tuple[str, str]] = {}
+        self.edges: Dict[Tuple[str, str], str] = {}
+
+    def same(self, old: Any, new: Any) -> bool:
+        # Interned subtrees are equal exactly when their ids are, so identical subtrees are
+        # skipped without being looked at
+        if isinstance(old, (dict, list)) or isinstance(new, (dict, list)):
+            return (type(old) is type(new)
+                    and self.ids[id(old)] == self.ids[id(new)])
+        return f"{old}" == f"{new}"
+
+    def add_node(self, node_id: str, label: str, status: str) -> None:
+        current = self.nodes.get(node_id)
+        self.nodes[node_id] = (label,
+                               _merge_status(current and current[1], status))
+
+    def add_edge(self, source: str, target: str, status: str) -> None:
+        self.edges[(source, target)] = _merge_status(
+            self.edges.get((source, target)), status)
+
+    def diff_documents(self, file_num: int, old: Any, new: Any) -> None:
+        if old is not _MISSING:
+            self.ids.update(self.table.index(old))
+        if new is not _MISSING:
+            self.ids.update(self.table.index(new))
+        if old is not _MISSING and new is not _MISSING and self.same(old, new):
+            return
+        root_id = str(file_num)
+        if isinstance(old, dict) and isinstance(new, dict):
+            self.diff_mappings(old, new, root_id, root_id, True, file_num)
+        else:
+            self.diff_region(old, new, None, file_num)
+
+    def diff_mappings(self, old: Dict, new: Dict, parent_id: str,
+                      parent_label: str, is_root: bool, file_num: int) -> None:
+        keys = list(new) + [key for key in old if key not in new]
+        for key in keys:
+            old_value = old.get(key, _MISSING)
+            new_value = new.get(key, _MISSING)
+            if (old_value is not _MISSING and new_value is not _MISSING
+                    and self.same(old_value, new_value)):
+                continue
+            if isinstance(old_value, dict) and isinstance(new_value, dict):
+                # The key exists on both sides and only part of its mapping changed
+                key_id, key_label = dot_leaf(key)
+                child_id = f"{parent_id}{SEPARATOR}{key_id}"
+                self.add_node(child_id, key_label, MODIFIED)
+                if not is_root:
+                    self.add_edge(parent_id, child_id, CONTEXT)
+                self.diff_mappings(old_value, new_value, child_id, key_label,
+                                   False, file_num)
+                continue
+            # Lists and values merge into shared paths, so they are compared as rendered nodes
+            self.diff_region(
+                {key: old_value} if old_value is not _MISSING else _MISSING,
+                {key: new_value} if new_value is not _MISSING else _MISSING,
+                None if is_root else (parent_id, parent_label), file_num)
+
+    def diff_region(self, old: Any, new: Any, parent: Optional[Tuple[str,
+                                                                     str]],
+                    file_num: int) -> None:
+        old_nodes, old_edges = self._region(old, parent, file_num)
+        new_nodes, new_edges = self._region(new, parent, file_num)
+        parents = {target: source for source, target in old_edges}
+        parents.update((target, source) for source, target in new_edges)
+        labels = {**old_nodes, **new_nodes}
+
+        changed = [(node_id, ADDED) for node_id in new_nodes
+                   if node_id not in old_nodes]
+        changed += [(node_id, REMOVED) for node_id in old_nodes
+                    if node_id not in new_nodes]
+        kept: Set[str] = set()
+        for node_id, status in changed:
+            self.add_node(node_id, labels[node_id], status)
+            kept.add(node_id)
+            # Unchanged ancestors inside the region lead to the change. An ancestor on one side
+            # only, such as the root of a list document that was added, is itself in changed.
+            ancestor = parents.get(node_id)
+            while (ancestor is not None and ancestor in old_nodes
+                   and ancestor in new_nodes and ancestor not in kept):
+                self.add_node(ancestor, labels[ancestor], MODIFIED)
+                kept.add(ancestor)
+                ancestor = parents.get(ancestor)
+
+        if parent is not None and kept:
+            kept.add(parent[0])
+        for edge in list(new_edges) + [
+                edge for edge in old_edges if edge not in new_edges
+        ]:
+            if edge[0] in kept and edge[1] in kept:
+                if edge not in old_edges:
+                    self.add_edge(*edge, ADDED)
+                elif edge not in new_edges:
+                    self.add_edge(*edge, REMOVED)
+                else:
+                    self.add_edge(*edge, CONTEXT)
+
+    @staticmethod
+    def _region(data: Any, parent: Optional[Tuple[str, str]],
+                file_num: int) -> Tuple[Dict[str, str], Dict[Tuple[str, str],
+                                                             None]]:
+        # Renders part of a document and returns its node labels and edges, in insertion order
+        nodes: Dict[str, str] = {}
+        edges: Dict[Tuple[str, str], None] = {}
+        if data is _MISSING:
+            return nodes, edges
+        seen = set() if parent is None else {parent[0]}
+        for record in iter_bfs_records(data, {},
+                                       file_num=file_num,
+                                       first_level=parent is None,
+                                       seen=seen,
+                                       parent=parent):
+            if isinstance(record, NodeRecord):
+                nodes[record.id] = record.label
+            else:
+                edges[(record.source, record.target)] = None
+        return nodes, edges
+
+
+def compare(old_data: Any,
+            new_data: Any,
+            user_node_attrs: Dict[str, Any] = None,
+            rankdir: str = "LR",
+            shape: str = "rounded",
+            document_order: str = "reversed") -> Tuple[CompactGraph, DiffSummary]:
+    """
+    Renders the structural differences between two inputs as one graph.
+
+    Both inputs are interned into one SubtreeTable, which hashes their subtrees bottom-up, so
+    identical subtrees are recognized in O(1) and skipped. Where a mapping changed, only the keys
+    that differ are followed; where a list or value changed, that key's subtree is rendered on both
+    sides and compared node by node. Documents are numbered as renderer.render numbers them with
+    the same document_order, and the documents with the same number are compared, so node ids are
+    the ids render gives either input. With 'reversed' (render's default) the last documents of
+    the two inputs are compared first, and a document added at the end of a file shifts the pairs;
+    'forward' pairs documents from the start of the files. Only changed nodes and their ancestors
+    are drawn: added nodes and edges in green, removed ones in red, and modified ones
+    (ancestors of a change) in orange.
+
+    Parameters:
+    - old_data (Any): The documents of the old input, as accepted by renderer.iter_documents.
+    - new_data (Any): The documents of the new input.
+    - user_node_attrs (Dict[str, Any], optional): User-defined attributes for each node.
+    - rankdir (str, optional): The direction of the graph layout. Defaults to "LR" (left to right).
+    - shape (str, optional): User specified custom shape for nodes.
+    - document_order (str, optional): 'reversed' (default) or 'forward', see renderer.iter_documents.
+
+    Returns:
+    - Tuple[CompactGraph, DiffSummary]: The graph of changes and the number of changed nodes.
+    """
+    builder = _DiffBuilder()
+    old_documents: List[Any] = [
+        document for _, document in iter_documents(old_data, document_order)
+    ]
+    new_documents: List[Any] = [
+        document for _, document in iter_documents(new_data, document_order)
+    ]
+    for file_num, (old, new) in enumerate(
+            zip_longest(old_documents, new_documents, fillvalue=_MISSING)):
+        builder.diff_documents(file_num, old, new)
+
+    node_attrs = base_node_attrs(user_node_attrs, shape)
+    styled_attrs = {
+        status: {
+            **node_attrs,
+            **style
+        }
+        for status, style in NODE_STYLES.items()
+    }
+    graph = CompactGraph(rankdir)
+    counts = {ADDED: 0, REMOVED: 0, MODIFIED: 0}
+    for node_id, (label, status) in builder.nodes.items():
+        if status in counts:
+            counts[status] += 1
+        add_compact_record(
+            graph,
+            NodeRecord(node_id, label, None,
+                       styled_attrs.get(status, node_attrs)))
+    for (source, target), status in builder.edges.items():
+        add_compact_record(
+            graph,
+            EdgeRecord(source, target, {
+                **EDGE_ATTRS,
+                **EDGE_STYLES.get(status, {})
+            }))
+    return graph, DiffSummary(counts[ADDED], counts[REMOVED],
+                              counts[MODIFIED])
@@ -0,0 +1,279 @@
+import re
+from pathlib import Path
+from typing import IO, Any, Dict, Final, Iterable, Iterator, Optional, Union
+
+from yaml2dot.renderer import GraphRecord, NodeRecord
+
+DOT_BACKENDS: Final = ("native", "pydot")
+
+# Identifier rules used by pydot when deciding whether an ID must be quoted.
+# They are reproduced here so that the native writer emits the exact same
+# text as the pydot backend for every graph produced by the renderer.
+_DOT_KEYWORDS: Final = frozenset(
+    ("graph", "subgraph", "digraph", "node", "edge", "strict"))
+_ID_ALPHA_NUMS: Final = re.compile(r'^[_a-zA-Z][a-zA-Z0-9_,]*$', re.UNICODE)
+_ID_ALPHA_NUMS_WITH_PORTS: Final = re.compile(
+    r'^[_a-zA-Z][a-zA-Z0-9_,:"]*[a-zA-Z0-9_,"]+$', re.UNICODE)
+_ID_NUM: Final = re.compile(r'^[0-9,]+$', re.UNICODE)
+_ID_WITH_PORT: Final = re.compile(r'^([^:]*):([^:]*)$', re.UNICODE)
+_ID_DBL_QUOTED: Final = re.compile(r'^".*"$', re.UNICODE | re.DOTALL)
+_ID_HTML: Final = re.compile(r'^<.*>$', re.UNICODE | re.DOTALL)
+# Any of the patterns above that leave an ID unquoted, tried in a single match
+_ID_UNQUOTED: Final = re.compile(
+    "|".join(f"(?:{pattern.pattern})"
+             for pattern in (_ID_ALPHA_NUMS, _ID_NUM, _ID_DBL_QUOTED, _ID_HTML,
+                             _ID_ALPHA_NUMS_WITH_PORTS)),
+    re.UNICODE | re.DOTALL)
+
+
+def _needs_quotes(value: str) -> bool:
+    if value in _DOT_KEYWORDS:
+        return False
+
+    if not value.isascii() or "\0" in value:
+        if not _ID_DBL_QUOTED.match(value) and not _ID_HTML.match(value):
+            return True
+
+    if _ID_UNQUOTED.match(value):
+        return False
+
+    match = _ID_WITH_PORT.match(value)
+    if match:
+        return _needs_quotes(match.group(1)) or _needs_quotes(
+            match.group(2))
+
+    return True
+
+
+def quote_id(value: Any) -> str:
+    """
+    Quotes a DOT identifier or attribute value when required.
+
+    Parameters:
+    - value (Any): The identifier or attribute value. Non-string values are rendered with str().
+
+    Returns:
+    - str: The value as it should appear in DOT source.
+    """
+    if isinstance(value, bool):
+        return 'True' if value else 'False'
+    if not isinstance(value, str):
+        return str(value)
+    if not value:
+        return '""'
+    if _needs_quotes(value):
+        value = (value.replace('"', r'\"').replace("\n",
+                                                   r'\n').replace("\r", r'\r'))
+        return f'"{value}"'
+    return value
+
+
+def _format_attrs(attrs: Dict[str, Any], stringify: bool = True) -> str:
+    # Graph, node and edge attributes are stringified before quoting, while
+    # the graph-level defaults are quoted as given (matching networkx+pydot).
+    return ", ".join(
+        f"{key}={quote_id(str(value) if stringify else value)}"
+        for key, value in sorted(attrs.items()))
+
+
+def _defaults_statement(name: str, attrs: Dict[str, Any]) -> str:
+    if not attrs:
+        return "\n"
+    return f"{name} [{_format_attrs(attrs, stringify=False)}];\n"
+
+
+def _node_statement(node: Any, node_attrs: Dict[str, Any]) -> str:
+    node_id = quote_id(str(node))
+    if node_attrs:
+        return f"{node_id} [{_format_attrs(node_attrs)}];\n"
+    return f"{node_id};\n"
+
+
+def _edge_statement(source: Any, target: Any, connector: str,
+                    edge_attrs: Dict[str, Any]) -> str:
+    statement = f"{quote_id(str(source))} {connector} {quote_id(str(target))}"
+    if edge_attrs:
+        return f"{statement}  [{_format_attrs(edge_attrs)}];\n"
+    return f"{statement};\n"
+
+
+def _graph_attr_statements(graph_attrs: Dict[str, Any]) -> Iterator[str]:
+    for key, value in sorted(graph_attrs.items()):
+        if value is not None:
+            yield f"{key}={quote_id(value)};\n"
+
+
+def iter_dot_lines(graph) -> Iterator[str]:
+    """
+    Serializes a rendered graph into DOT source, one statement per line.
+
+    The output is identical to what pydot produces for the same graph, without
+    building the intermediate pydot object graph.
+
+    Parameters:
+    - graph (nx.MultiDiGraph): The graph produced by renderer.render.
+
+    Returns:
+    - Iterator[str]: The DOT source lines, each terminated by a newline.
+    """
+    yield from iter_dot_header_lines(graph)
+    yield from iter_node_lines(graph)
+    yield from iter_edge_lines(graph)
+    yield "}\n"
+
+
+def iter_dot_header_lines(graph) -> Iterator[str]:
+    """
+    Yields the opening line of the DOT source of a graph and its graph, node and edge attributes.
+    """
+    multigraph = graph.is_multigraph()
+    graph_type = "digraph" if graph.is_directed() else "graph"
+    strict = not multigraph and not any(
+        True for node, neighbour in graph.edges() if node == neighbour)
+    name = f'"{graph.name}"' if graph.name else ""
+
+    yield f"{'strict ' if strict else ''}{graph_type} {name} {{\n"
+    yield from _graph_attr_statements(graph.graph.get("graph", {}))
+    if "node" in graph.graph:
+        yield _defaults_statement("node", graph.graph["node"])
+    if "edge" in graph.graph:
+        yield _defaults_statement("edge", graph.graph["edge"])
+
+
+def iter_node_lines(graph) -> Iterator[str]:
+    """
+    Yields the node statements of a graph, in node order.
+    """
+    for node, node_attrs in graph.nodes(data=True):
+        yield _node_statement(node, node_attrs)
+
+
+def iter_edge_lines(graph) -> Iterator[str]:
+    """
+    Yields the edge statements of a graph, in the order of graph.edges().
+    """
+    connector = "->" if graph.is_directed() else "--"
+    if graph.is_multigraph():
+        edges = ((source, target, {
+            **{k: v
+               for k, v in edge_attrs.items() if k != "key"}, "key": key
+        }) for source, target, key, edge_attrs in graph.edges(keys=True,
+                                                               data=True))
+    else:
+        edges = graph.edges(data=True)
+    for source, target, edge_attrs in edges:
+        yield _edge_statement(source, target, connector, edge_attrs)
+
+
+def iter_record_dot_lines(
+        records: Iterable[GraphRecord],
+        rankdir: str = "LR",
+        defaults: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Iterator[str]:
+    """
+    Serializes traversal records into DOT source as they arrive, without building a graph.
+
+    Node and edge statements are written in traversal order, so the output describes the same
+    graph as iter_dot_lines(render(...)) but interleaves nodes and edges.
+
+    Parameters:
+    - records (Iterable[GraphRecord]): Records produced by renderer.iter_render_records.
+    - rankdir (str, optional): The direction of the graph layout. Defaults to "LR" (left to right).
+    - defaults (Dict[str, Dict[str, Any]], optional): Shared 'node' and 'edge' attributes written once
+      as default statements, as returned by renderer.graph_defaults.
+
+    Returns:
+    - Iterator[str]: The DOT source lines, each terminated by a newline.
+    """
+    yield "digraph  {\n"
+    yield from _graph_attr_statements({"rankdir": rankdir})
+    for name in ("node", "edge"):
+        if defaults and name in defaults:
+            yield _defaults_statement(name, defaults[name])
+    for record in records:
+        if isinstance(record, NodeRecord):
+            yield _node_statement(record.id, {
+                "label": record.label,
+                **record.attrs
+            })
+        else:
+            yield _edge_statement(record.source, record.target, "->",
+                                  record.attrs)
+    yield "}\n"
+
+
+def to_dot_string(graph, backend: str = "native") -> str:
+    """
+    Converts a rendered graph into a DOT string.
+
+    Parameters:
+    - graph (nx.MultiDiGraph): The graph produced by renderer.render.
+    - backend (str, optional): 'native' for the built-in serializer or 'pydot' to go through pydot. Defaults to 'native'.
+
+    Returns:
+    - str: The DOT source.
+    """
+    if backend == "native":
+        return "".join(iter_dot_lines(graph))
+    if backend == "pydot":
+        import networkx as nx
+        if hasattr(graph, "to_networkx"):
+            graph = graph.to_networkx()
+        return nx.drawing.nx_pydot.to_pydot(graph).to_string()
+    raise ValueError(
+        f"Unknown DOT backend: {backend}. Supported backends: {', '.join(DOT_BACKENDS)}"
+    )
+
+
+def write_dot(graph,
+              output: Union[str, Path, IO[str]],
+              backend: str = "native") -> None:
+    """
+    Writes a rendered graph as DOT source to a file path or text stream.
+
+    Parameters:
+    - graph (nx.MultiDiGraph): The graph produced by renderer.render.
+    - output (Union[str, Path, IO[str]]): Destination path or writable text stream.
+    - backend (str, optional): 'native' for the built-in serializer or 'pydot' to go through pydot. Defaults to 'native'.
+
+    Returns:
+    - None
+    """
+    if backend == "native":
+        lines = iter_dot_lines(graph)
+    else:
+        lines = iter((to_dot_string(graph, backend=backend), ))
+
+    _write_lines(lines, output)
+
+
+def write_dot_records(
+        records: Iterable[GraphRecord],
+        output: Union[str, Path, IO[str]],
+        rankdir: str = "LR",
+        defaults: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+    """
+    Streams traversal records as DOT source to a file path or text stream.
+
+    Parameters:
+    - records (Iterable[GraphRecord]): Records produced by renderer.iter_render_records.
+    - output (Union[str, Path, IO[str]]): Destination path or writable text stream.
+    - rankdir (str, optional): The direction of the graph layout. Defaults to "LR" (left to right).
+    - defaults (Dict[str, Dict[str, Any]], optional): Shared 'node' and 'edge' attributes written once
+      as default statements, as returned by renderer.graph_defaults.
+
+    Returns:
+    - None
+    """
+    _write_lines(
+        iter_record_dot_lines(records, rankdir=rankdir, defaults=defaults),
+        output)
+
+
+def _write_lines(lines: Iterable[str], output: Union[str, Path,
+                                                     IO[str]]) -> None:
+    if isinstance(output, (str, Path)):
+        with open(output, 'w') as dot_file:
+            dot_file.writelines(lines)
+    else:
+        output.writelines(lines)
@@ -0,0 +1,328 @@
+import collections.abc
+from typing import IO, Any, Dict, Final, Iterator, List, Optional, Union
+
+import yaml
+from yaml.composer import ComposerError
+from yaml.constructor import ConstructorError
+from yaml.events import (AliasEvent, DocumentEndEvent, MappingEndEvent,
+                         MappingStartEvent, ScalarEvent, SequenceEndEvent,
+                         SequenceStartEvent)
+from yaml.nodes import MappingNode, Node, ScalarNode, SequenceNode
+
+STR_TAG: Final = 'tag:yaml.org,2002:str'
+MAP_TAG: Final = 'tag:yaml.org,2002:map'
+SEQ_TAG: Final = 'tag:yaml.org,2002:seq'
+MERGE_TAG: Final = 'tag:yaml.org,2002:merge'
+VALUE_TAG: Final = 'tag:yaml.org,2002:value'
+# Scalar tags whose SafeConstructor method builds the value directly, without generators
+DIRECT_SCALAR_TAGS: Final = frozenset(
+    ('tag:yaml.org,2002:null', 'tag:yaml.org,2002:bool',
+     'tag:yaml.org,2002:int', 'tag:yaml.org,2002:float',
+     'tag:yaml.org,2002:binary', 'tag:yaml.org,2002:timestamp'))
+# Placeholder tag for nodes that wrap an already built value, see _compose_tagged
+_VALUE_NODE_TAG: Final = '!yaml2dot/value'
+
+
+def _construct_built_value(loader: Any, node: ScalarNode) -> Any:
+    return node.value
+
+
+class _EventLoader(yaml.SafeLoader):
+    pass
+
+
+_EventLoader.add_constructor(_VALUE_NODE_TAG, _construct_built_value)
+
+if hasattr(yaml, "CSafeLoader"):
+
+    class _LibyamlEventLoader(yaml.CSafeLoader):
+        pass
+
+    _LibyamlEventLoader.add_constructor(_VALUE_NODE_TAG, _construct_built_value)
+    _CEventLoader: Optional[type] = _LibyamlEventLoader
+else:
+    _CEventLoader = None
+
+
+class _Collection:
+    """A mapping or sequence whose end event has not been reached yet."""
+    __slots__ = ("value", "is_mapping", "key", "has_key", "merge_key",
+                 "merges", "start_mark")
+
+    def __init__(self, value: Union[dict, list], start_mark: Any):
+        self.value = value
+        self.is_mapping = isinstance(value, dict)
+        self.key: Any = None
+        self.has_key = False
+        self.merge_key = False
+        self.merges: List[list] = []
+        self.start_mark = start_mark
+
+
+class _DocumentBuilder:
+    """
+    Builds Python documents from the YAML event stream, matching what yaml.safe_load_all returns.
+
+    Plain mappings, sequences and scalars are built directly from their events, which skips the
+    node graph of the composer and the generator based construction of SafeConstructor. Merge
+    keys, duplicate keys, anchors and aliases follow the semantics of SafeLoader. Collections with
+    other explicit tags (!!set, !!omap, !!pairs...) are composed into nodes and handed to the
+    constructor of the loader.
+    """
+
+    def __init__(self, loader: Any):
+        self.loader = loader
+        self.anchors: Dict[str, Any] = {}
+        self.stack: List[_Collection] = []
+
+    def documents(self) -> Iterator[Any]:
+        get_event = self.loader.get_event
+        resolve = self.loader.resolve
+        constructors = self.loader.yaml_constructors
+        stack = self.stack
+        document: Any = None
+
+        while self.loader.check_event():
+            event = get_event()
+            event_type = type(event)
+
+            if event_type is ScalarEvent:
+                tag = event.tag
+                if tag is None or tag == '!':
+                    tag = resolve(ScalarNode, event.value, event.implicit)
+                if tag == STR_TAG:
+                    value = event.value
+                elif stack and stack[-1].is_mapping and not stack[-1].has_key and (
+                        tag == MERGE_TAG or tag == VALUE_TAG):
+                    if tag == MERGE_TAG:
+                        stack[-1].merge_key = True
+                        stack[-1].has_key = True
+                        continue
+                    # SafeConstructor reads a '=' key as a plain string
+                    value = event.value
+                else:
+                    node = ScalarNode(tag, event.value, event.start_mark,
+                                      event.end_mark, event.style)
+                    if tag in DIRECT_SCALAR_TAGS:
+                        value = constructors[tag](self.loader, node)
+                    else:
+                        value = self.loader.construct_document(node)
+                if event.anchor is not None:
+                    self._anchor(event, value)
+                document = self._add(value, event, document)
+
+            elif event_type is MappingStartEvent or event_type is SequenceStartEvent:
+                is_mapping = event_type is MappingStartEvent
+                if event.tag not in (None, '!',
+                                     MAP_TAG if is_mapping else SEQ_TAG):
+                    value = self._compose_tagged(event)
+                    document = self._add(value, event, document)
+                    continue
+                value = {} if is_mapping else []
+                if event.anchor is not None:
+                    # Registered before the children, so that they can refer to it
+                    self._anchor(event, value)
+                stack.append(_Collection(value, event.start_mark))
+
+            elif event_type is MappingEndEvent or event_type is SequenceEndEvent:
+                collection = stack.pop()
+                if collection.merges:
+                    self._apply_merges(collection)
+                document = self._add(collection.value, event, document)
+
+            elif event_type is AliasEvent:
+                if event.anchor not in self.anchors:
+                    raise ComposerError(None, None,
+                                        f"found undefined alias {event.anchor!r}",
+                                        event.start_mark)
+                document = self._add(self.anchors[event.anchor], event,
+                                     document)
+
+            elif event_type is DocumentEndEvent:
+                yield document
+                document = None
+                self.anchors = {}
+
+    def _anchor(self, event: Any, value: Any) -> None:
+        if event.anchor in self.anchors:
+            raise ComposerError(
+                f"found duplicate anchor {event.anchor!r}; first occurrence",
+                None, "second occurrence", event.start_mark)
+        self.anchors[event.anchor] = value
+
+    def _add(self, value: Any, event: Any, document: Any) -> Any:
+        # Attaches a finished value to the enclosing collection, or returns it as the document root
+        if not self.stack:
+            return value
+        collection = self.stack[-1]
+        if not collection.is_mapping:
+            collection.value.append(value)
+        elif not collection.has_key:
+            if not isinstance(value, collections.abc.Hashable):
+                raise ConstructorError("while constructing a mapping",
+                                       collection.start_mark,
+                                       "found unhashable key", event.start_mark)
+            collection.key = value
+            collection.has_key = True
+        else:
+            if collection.merge_key:
+                self._add_merge(collection, value, event)
+                collection.merge_key = False
+            else:
+                collection.value[collection.key] = value
+            collection.key = None
+            collection.has_key = False
+        return document
+
+    def _add_merge(self, collection: _Collection, value: Any,
+                   event: Any) -> None:
+        if isinstance(value, dict):
+            collection.merges.append(list(value.items()))
+        elif isinstance(value, list):
+            for item in value:
+                if not isinstance(item, dict):
+                    raise ConstructorError(
+                        "while constructing a mapping", collection.start_mark,
+                        "expected a mapping for merging", event.start_mark)
+            # SafeConstructor merges the last mapping of the list first
+            collection.merges.extend(
+                list(item.items()) for item in reversed(value))
+        else:
+            raise ConstructorError(
+                "while constructing a mapping", collection.start_mark,
+                "expected a mapping or list of mappings for merging",
+                event.start_mark)
+
+    @staticmethod
+    def _apply_merges(collection: _Collection) -> None:
+        # Merged keys come first and explicit keys override them. The dictionary is updated in
+        # place because aliases may already refer to it.
+        mapping = collection.value
+        own_items = list(mapping.items())
+        mapping.clear()
+        for items in collection.merges:
+            mapping.update(items)
+        mapping.update(own_items)
+
+    def _compose_tagged(self, start_event: Any) -> Any:
+        # Builds nodes for a collection with an explicit tag and lets the loader construct it
+        get_event = self.loader.get_event
+        resolve = self.loader.resolve
+        node_anchors: Dict[str, Node] = {}
+        stack: List[list] = []
+        root: Optional[Node] = None
+        event = start_event
+
+        while True:
+            event_type = type(event)
+            node: Optional[Node] = None
+            if event_type is ScalarEvent:
+                tag = event.tag
+                if tag is None or tag == '!':
+                    tag = resolve(ScalarNode, event.value, event.implicit)
+                node = ScalarNode(tag, event.value, event.start_mark,
+                                  event.end_mark, event.style)
+            elif event_type is AliasEvent:
+                if event.anchor in node_anchors:
+                    node = node_anchors[event.anchor]
+                elif event.anchor in self.anchors:
+                    node = ScalarNode(_VALUE_NODE_TAG,
+                                      self.anchors[event.anchor],
+                                      event.start_mark, event.end_mark)
+                else:
+                    raise ComposerError(None, None,
+                                        f"found undefined alias {event.anchor!r}",
+                                        event.start_mark)
+            elif event_type is MappingStartEvent or event_type is SequenceStartEvent:
+                node_class = MappingNode if event_type is MappingStartEvent else SequenceNode
+                tag = event.tag
+                if tag is None or tag == '!':
+                    tag = resolve(node_class, None, event.implicit)
+                collection_node = node_class(tag, [], event.start_mark, None,
+                                             event.flow_style)
+                if event.anchor is not None:
+                    node_anchors[event.anchor] = collection_node
+                self._attach(stack, collection_node)
+                stack.append([collection_node, None])
+                if root is None:
+                    root = collection_node
+            else:
+                # MappingEndEvent or SequenceEndEvent
+                finished = stack.pop()[0]
+                finished.end_mark = event.end_mark
+                if not stack:
+                    break
+
+            if node is not None:
+                if event_type is ScalarEvent and event.anchor is not None:
+                    node_anchors[event.anchor] = node
+                self._attach(stack, node)
+            event = get_event()
+
+        value = self.loader.construct_object(root, deep=True)
+        for anchor, anchored_node in node_anchors.items():
+            self._anchor_constructed(anchor, anchored_node)
+        self.loader.constructed_objects = {}
+        self.loader.recursive_objects = {}
+        return value
+
+    def _anchor_constructed(self, anchor: str, node: Node) -> None:
+        if anchor in self.anchors:
+            raise ComposerError(
+                f"found duplicate anchor {anchor!r}; first occurrence", None,
+                "second occurrence", node.start_mark)
+        self.anchors[anchor] = self.loader.constructed_objects[node]
+
+    @staticmethod
+    def _attach(stack: List[list], node: Node) -> None:
+        if not stack:
+            return
+        parent = stack[-1]
+        if isinstance(parent[0], SequenceNode):
+            parent[0].value.append(node)
+        elif parent[1] is None:
+            parent[1] = node
+        else:
+            parent[0].value.append((parent[1], node))
+            parent[1] = None
+
+
+def iter_event_documents(stream: Union[str, bytes, IO],
+                         parser: str = "pyyaml") -> Iterator[Any]:
+    """
+    Parse YAML documents from PyYAML's event stream, one document at a time.
+
+    The documents are equal to the ones yaml.safe_load_all returns, but they are built straight
+    from parser events, without PyYAML's intermediate node graph.
+
+    Parameters:
+    - stream (Union[str, bytes, IO]): The YAML text or a file-like object.
+    - parser (str, optional): 'pyyaml' for the pure Python parser or 'libyaml' for the C parser.
+
+    Returns:
+    - Iterator[Any]: The parsed documents in stream order.
+    """
+    loader_class = _CEventLoader if parser == "libyaml" else _EventLoader
+    if loader_class is None:
+        raise ValueError("Parser libyaml is not installed")
+    loader = loader_class(stream)
+    try:
+        yield from _DocumentBuilder(loader).documents()
+    finally:
+        loader.dispose()
+
+
+def iter_event_file_documents(file_path: str,
+                              parser: str = "pyyaml") -> Iterator[Any]:
+    """
+    Parse a YAML file with iter_event_documents, keeping it open until the generator is done.
+
+    Parameters:
+    - file_path (str): The path to the input YAML file.
+    - parser (str, optional): 'pyyaml' for the pure Python parser or 'libyaml' for the C parser.
+
+    Returns:
+    - Iterator[Any]: The parsed documents in file order.
+    """
+    with open(file_path, 'r') as file:
+        yield from iter_event_documents(file, parser)
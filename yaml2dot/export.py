@@ -0,0 +1,271 @@
+import ast
+import io
+import sys
+import zipfile
+from array import array
+from pathlib import Path
+from typing import IO, Dict, Final, Iterable, Iterator, NamedTuple, Union
+
+from yaml2dot.renderer import GraphRecord, NodeRecord
+
+# Formats written straight from the traversal records, without building a graph
+EXPORT_FORMATS: Final = ("npz", "tsv", "graphml")
+BINARY_FORMATS: Final = frozenset(("npz", ))
+
+NPY_MAGIC: Final = b"\x93NUMPY\x01\x00"
+# dtype of each array module typecode, as written in the .npy header (always little-endian)
+_NPY_DTYPES: Final = {"i": "<i4", "q": "<i8", "B": "|u1"}
+_TYPECODES: Final = {
+    dtype: typecode
+    for typecode, dtype in _NPY_DTYPES.items()
+}
+# Arrays of a columnar graph, in the order they are written
+COLUMNS: Final = ("indptr", "indices", "label_index", "label_offsets",
+                  "label_data")
+
+TSV_HEADER: Final = "source\ttarget\tsource_label\ttarget_label\n"
+GRAPHML_HEADER: Final = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    '  <key id="label" for="node" attr.name="label" attr.type="string"/>\n'
+    '  <graph id="G" edgedefault="directed">\n')
+GRAPHML_FOOTER: Final = "  </graph>\n</graphml>\n"
+
+
+class ColumnarGraph(NamedTuple):
+    """
+    The topology and labels of a rendered graph as flat arrays.
+
+    Nodes are numbered in the order the traversal emits them. The children of node i are
+    indices[indptr[i]:indptr[i + 1]] (CSR form), and its label is the UTF-8 text
+    label_data[label_offsets[j]:label_offsets[j + 1]] with j = label_index[i]. Each distinct
+    label is stored once.
+    """
+    indptr: array
+    indices: array
+    label_index: array
+    label_offsets: array
+    label_data: array
+
+    def label(self, node: int) -> str:
+        """
+        Returns the label of a node.
+        """
+        index = self.label_index[node]
+        return self.label_data[self.label_offsets[index]:self.
+                               label_offsets[index + 1]].tobytes().decode()
+
+
+def columnar_graph(records: Iterable[GraphRecord]) -> ColumnarGraph:
+    """
+    Collects traversal records into a ColumnarGraph.
+
+    Parameters:
+    - records (Iterable[GraphRecord]): Records produced by renderer.iter_render_records.
+
+    Returns:
+    - ColumnarGraph: The edge list in CSR form and the deduplicated label table.
+    """
+    node_index: Dict[str, int] = {}
+    label_table: Dict[str, int] = {}
+    label_index = array("i")
+    label_offsets = array("q", [0])
+    label_data = array("B")
+    sources = array("i")
+    targets = array("i")
+
+    def node(node_id: str, label: str) -> int:
+        index = node_index.get(node_id)
+        if index is None:
+            index = node_index[node_id] = len(node_index)
+            label_id = label_table.get(label)
+            if label_id is None:
+                label_id = label_table[label] = len(label_table)
+                label_data.frombytes(label.encode())
+                label_offsets.append(len(label_data))
+            label_index.append(label_id)
+        return index
+
+    for record in records:
+        if isinstance(record, NodeRecord):
+            node(record.id, record.label)
+        else:
+            # Both ends were emitted as nodes before the edge
+            sources.append(node_index[record.source])
+            targets.append(node_index[record.target])
+
+    # Counting sort of the edges by source, keeping the traversal order of each node's children
+    indptr = array("i", bytes(4 * (len(node_index) + 1)))
+    for source in sources:
+        indptr[source + 1] += 1
+    for index in range(len(node_index)):
+        indptr[index + 1] += indptr[index]
+    fill = array("i", indptr[:-1])
+    indices = array("i", bytes(4 * len(targets)))
+    for source, target in zip(sources, targets):
+        indices[fill[source]] = target
+        fill[source] += 1
+    return ColumnarGraph(indptr, indices, label_index, label_offsets,
+                         label_data)
+
+
+def _npy_bytes(values: array) -> bytes:
+    header = repr({
+        "descr": _NPY_DTYPES[values.typecode],
+        "fortran_order": False,
+        "shape": (len(values), ),
+    })
+    # The header is padded so that the data starts on a 64-byte boundary
+    padding = 64 - (len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header = (header + " " * (padding % 64) + "\n").encode("latin1")
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return (NPY_MAGIC + len(header).to_bytes(2, "little") + header +
+            values.tobytes())
+
+
+def write_npz(graph: ColumnarGraph, output: Union[str, Path,
+                                                 IO[bytes]]) -> None:
+    """
+    Writes a ColumnarGraph as an uncompressed .npz archive, as numpy.savez would, without
+    requiring NumPy: numpy.load(output) returns the arrays by their ColumnarGraph field names.
+
+    Parameters:
+    - graph (ColumnarGraph): The graph, as returned by columnar_graph.
+    - output (Union[str, Path, IO[bytes]]): Destination path or writable binary stream.
+
+    Returns:
+    - None
+    """
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as archive:
+        for name in COLUMNS:
+            archive.writestr(f"{name}.npy", _npy_bytes(getattr(graph, name)))
+
+
+def read_npz(source: Union[str, Path, IO[bytes]]) -> ColumnarGraph:
+    """
+    Reads a graph written by write_npz, without requiring NumPy.
+
+    Raises:
+    - ValueError: If the archive does not hold the arrays of a ColumnarGraph.
+    """
+    columns: Dict[str, array] = {}
+    with zipfile.ZipFile(source) as archive:
+        for name in COLUMNS:
+            try:
+                data = archive.read(f"{name}.npy")
+            except KeyError:
+                raise ValueError(f"The archive has no {name}.npy array")
+            if not data.startswith(NPY_MAGIC):
+                raise ValueError(f"{name}.npy is not a .npy version 1.0 array")
+            header_length = int.from_bytes(data[8:10], "little")
+            header = ast.literal_eval(data[10:10 +
+                                           header_length].decode("latin1"))
+            values = array(_TYPECODES[header["descr"]])
+            values.frombytes(data[10 + header_length:])
+            if sys.byteorder == "big" and values.itemsize > 1:
+                values.byteswap()
+            columns[name] = values
+    return ColumnarGraph(**columns)
+
+
+def _tsv_field(value: str) -> str:
+    return (value.replace("\\", "\\\\").replace("\t", "\\t").replace(
+        "\n", "\\n").replace("\r", "\\r"))
+
+
+def iter_tsv_lines(records: Iterable[GraphRecord]) -> Iterator[str]:
+    """
+    Writes traversal records as a tab-separated edge list, one line per edge as it is traversed.
+
+    The columns are the source and target node ids and their labels. Tabs, newlines and
+    backslashes in a field are escaped as \\t, \\n and \\\\.
+
+    Parameters:
+    - records (Iterable[GraphRecord]): Records produced by renderer.iter_render_records.
+
+    Returns:
+    - Iterator[str]: The header line, then one line per edge.
+    """
+    labels: Dict[str, str] = {}
+    yield TSV_HEADER
+    for record in records:
+        if isinstance(record, NodeRecord):
+            labels[record.id] = _tsv_field(record.label)
+        else:
+            yield (f"{_tsv_field(record.source)}\t{_tsv_field(record.target)}\t"
+                   f"{labels[record.source]}\t{labels[record.target]}\n")
+
+
+def iter_graphml_lines(records: Iterable[GraphRecord]) -> Iterator[str]:
+    """
+    Writes traversal records as GraphML, one node or edge element per line as it is traversed.
+    GraphML allows nodes and edges in any order, so nothing is buffered.
+
+    Parameters:
+    - records (Iterable[GraphRecord]): Records produced by renderer.iter_render_records.
+
+    Returns:
+    - Iterator[str]: The GraphML document, line by line.
+    """
+    # Imported here since xml.sax pulls in urllib.request, which slows down every CLI start
+    from xml.sax.saxutils import escape, quoteattr
+    yield GRAPHML_HEADER
+    for record in records:
+        if isinstance(record, NodeRecord):
+            yield (f"    <node id={quoteattr(record.id)}>"
+                   f"<data key=\"label\">{escape(record.label)}</data></node>\n")
+        else:
+            yield (f"    <edge source={quoteattr(record.source)} "
+                   f"target={quoteattr(record.target)}/>\n")
+    yield GRAPHML_FOOTER
+
+
+def write_export(records: Iterable[GraphRecord], output: Union[str, Path,
+                                                               IO],
+                 output_format: str) -> None:
+    """
+    Writes traversal records in one of EXPORT_FORMATS to a file path or stream. TSV and GraphML
+    are streamed line by line; npz needs all records to build its arrays.
+
+    Parameters:
+    - records (Iterable[GraphRecord]): Records produced by renderer.iter_render_records.
+    - output (Union[str, Path, IO]): Destination path, or a binary stream for npz and a text
+      stream otherwise.
+    - output_format (str): 'npz', 'tsv' or 'graphml'.
+
+    Returns:
+    - None
+    """
+    if output_format == "npz":
+        write_npz(columnar_graph(records), output)
+        return
+    if output_format == "tsv":
+        lines = iter_tsv_lines(records)
+    elif output_format == "graphml":
+        lines = iter_graphml_lines(records)
+    else:
+        raise ValueError(
+            f"Unknown export format: {output_format}. Supported formats: {', '.join(EXPORT_FORMATS)}"
+        )
+    if isinstance(output, (str, Path)):
+        # GRAPHML_HEADER declares UTF-8, whatever the locale encoding is
+        with open(output, "w", encoding="utf-8") as output_file:
+            output_file.writelines(lines)
+    else:
+        output.writelines(lines)
+
+
+def export_records(records: Iterable[GraphRecord],
+                   output_format: str) -> Union[str, bytes]:
+    """
+    Returns traversal records in one of EXPORT_FORMATS: bytes for npz, text otherwise.
+    """
+    if output_format in BINARY_FORMATS:
+        buffer = io.BytesIO()
+        write_export(records, buffer, output_format)
+        return buffer.getvalue()
+    text = io.StringIO()
+    write_export(records, text, output_format)
+    return text.getvalue()
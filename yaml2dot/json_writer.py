@@ -0,0 +1,135 @@
+import json
+from pathlib import Path
+from typing import (IO, Any, Callable, Final, Iterable, Iterator, Optional,
+                    Union)
+
+# Indentation of the pretty output, as written by json.dumps(node_link_data(graph), indent=2)
+PRETTY_INDENT: Final = 2
+_COMPACT_SEPARATORS: Final = (",", ":")
+
+
+def _encoder(indent: Optional[int]) -> Callable[[Any], str]:
+    if indent is None:
+        return json.JSONEncoder(separators=_COMPACT_SEPARATORS).encode
+
+    indented = json.JSONEncoder(indent=indent).encode
+    # json only uses its C encoder without indent. A mapping of scalars comes out indented all the
+    # same when its items are separated by a newline and the indentation.
+    flat = json.JSONEncoder(separators=(",\n" + " " * indent, ": ")).encode
+    opening = "{\n" + " " * indent
+
+    def encode(value: Any) -> str:
+        if not isinstance(value, dict) or not value or any(
+                isinstance(item, (dict, list, tuple))
+                for item in value.values()):
+            return indented(value)
+        return opening + flat(value)[1:-1] + "\n}"
+
+    return encode
+
+
+def _iter_array(name: str, items: Iterable[Any], encode: Callable[[Any], str],
+                indent: Optional[int]) -> Iterator[str]:
+    if indent is None:
+        yield f'"{name}":['
+        separator = ""
+        for item in items:
+            yield separator + encode(item)
+            separator = ","
+        yield "]"
+        return
+
+    # Items sit two levels deep; JSON strings never contain a raw newline, so every newline of an
+    # encoded item starts one of its lines
+    item_indent = "\n" + " " * (2 * indent)
+    yield f'{" " * indent}"{name}": ['
+    empty = True
+    for item in items:
+        yield ("" if empty else ",") + item_indent + encode(item).replace(
+            "\n", item_indent)
+        empty = False
+    yield "]" if empty else f"\n{' ' * indent}]"
+
+
+def iter_json_chunks(graph, indent: Optional[int] = PRETTY_INDENT) -> Iterator[str]:
+    """
+    Serializes a rendered graph into node-link JSON one node or link at a time.
+
+    With the default indent the text is identical to
+    json.dumps(networkx.node_link_data(graph), indent=2), without building the node-link
+    dictionaries of the whole graph or the whole string first.
+
+    Parameters:
+    - graph (Union[nx.MultiDiGraph, CompactGraph]): The graph produced by renderer.render.
+    - indent (int, optional): Spaces per indentation level, or None for compact output without
+      any whitespace.
+
+    Returns:
+    - Iterator[str]: Consecutive pieces of the JSON text.
+    """
+    encode = _encoder(indent)
+    multigraph = graph.is_multigraph()
+    if multigraph:
+        links = ({
+            **edge_attrs, "source": source,
+            "target": target,
+            "key": key
+        } for source, target, key, edge_attrs in graph.edges(keys=True,
+                                                              data=True))
+    else:
+        links = ({
+            **edge_attrs, "source": source,
+            "target": target
+        } for source, target, edge_attrs in graph.edges(data=True))
+    nodes = ({
+        **node_attrs, "id": node
+    } for node, node_attrs in graph.nodes(data=True))
+    header = {
+        "directed": graph.is_directed(),
+        "multigraph": multigraph,
+        "graph": graph.graph
+    }
+
+    if indent is None:
+        # The header fields without their closing brace
+        yield encode(header)[:-1] + ","
+        yield from _iter_array("nodes", nodes, encode, indent)
+        yield ","
+        yield from _iter_array("links", links, encode, indent)
+        yield "}"
+        return
+
+    yield encode(header)[:-2] + ",\n"
+    yield from _iter_array("nodes", nodes, encode, indent)
+    yield ",\n"
+    yield from _iter_array("links", links, encode, indent)
+    yield "\n}"
+
+
+def to_json_string(graph, indent: Optional[int] = PRETTY_INDENT) -> str:
+    """
+    Converts a rendered graph into a node-link JSON string, see iter_json_chunks.
+    """
+    return "".join(iter_json_chunks(graph, indent=indent))
+
+
+def write_json(graph,
+               output: Union[str, Path, IO[str]],
+               indent: Optional[int] = PRETTY_INDENT) -> None:
+    """
+    Streams a rendered graph as node-link JSON to a file path or text stream.
+
+    Parameters:
+    - graph (Union[nx.MultiDiGraph, CompactGraph]): The graph produced by renderer.render.
+    - output (Union[str, Path, IO[str]]): Destination path or writable text stream.
+    - indent (int, optional): Spaces per indentation level, or None for compact output.
+
+    Returns:
+    - None
+    """
+    chunks = iter_json_chunks(graph, indent=indent)
+    if isinstance(output, (str, Path)):
+        with open(output, 'w') as json_file:
+            json_file.writelines(chunks)
+    else:
+        output.writelines(chunks)
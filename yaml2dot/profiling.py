@@ -0,0 +1,200 @@
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import (IO, Any, ContextManager, Dict, Final, Iterable, Iterator,
+                    NamedTuple, Optional, Union)
+
+# Written to stderr when no profile file is given
+STDERR: Final = "-"
+
+
+class StageTiming(NamedTuple):
+    """Wall-clock and CPU time spent in one stage, summed over its runs."""
+    wall_seconds: float
+    cpu_seconds: float
+    calls: int
+
+
+class StageMemory(NamedTuple):
+    """
+    Memory traced by tracemalloc during one stage: the highest total reached while it ran, and
+    how much more was allocated when it ended than when it started (negative if it freed memory).
+    """
+    peak_bytes: int
+    retained_bytes: int
+
+
+class Profiler:
+    """
+    Records the wall-clock and CPU time of each stage of a conversion, and counters such as the
+    number of documents, nodes, edges and bytes written. With trace_memory, it also records the
+    peak and retained memory of each stage with tracemalloc, which slows the stages down.
+
+    Stages are timed with Profiler.stage, and a stage entered several times accumulates. Stages
+    are not nested: when the input is read lazily, parsing happens while the next stage consumes
+    the documents and is timed as part of it. Memory allocated by worker processes is not traced.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, StageTiming] = {}
+        self.memory: Dict[str, StageMemory] = {}
+        self.counters: Dict[str, int] = {}
+        # The stage that is running, or that raised
+        self.current_stage: Optional[str] = None
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Times the body of a with statement as the stage `name`.
+        """
+        self.current_stage = name
+        if self.trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            # Python 3.8 has no reset_peak, so its peaks include the earlier stages
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            previous = self.stages.get(name, StageTiming(0.0, 0.0, 0))
+            self.stages[name] = StageTiming(previous.wall_seconds + wall,
+                                            previous.cpu_seconds + cpu,
+                                            previous.calls + 1)
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                previous_memory = self.memory.get(name, StageMemory(0, 0))
+                self.memory[name] = StageMemory(
+                    max(previous_memory.peak_bytes, peak),
+                    previous_memory.retained_bytes + current - memory_start)
+        self.current_stage = None
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        Adds `amount` to the counter `name`.
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returns the stages and counters as a JSON-serializable mapping.
+
+        Returns:
+        - Dict[str, Any]: 'stages' maps each stage, in the order it first ran, to its
+          'wall_seconds', 'cpu_seconds' and 'calls', and when memory is traced its 'peak_bytes'
+          and 'retained_bytes'; 'total' holds the sums of the times and the highest peak; and
+          'counters' holds the counters.
+        """
+        stages = {}
+        for name, timing in self.stages.items():
+            stages[name] = timing._asdict()
+            if name in self.memory:
+                stages[name].update(self.memory[name]._asdict())
+        total = {
+            "wall_seconds":
+            sum(timing.wall_seconds for timing in self.stages.values()),
+            "cpu_seconds":
+            sum(timing.cpu_seconds for timing in self.stages.values()),
+        }
+        if self.memory:
+            total["peak_bytes"] = max(memory.peak_bytes
+                                      for memory in self.memory.values())
+        return {
+            "stages": stages,
+            "total": total,
+            "counters": dict(self.counters),
+        }
+
+    def close(self) -> None:
+        """
+        Stops tracing memory if the profiler started it.
+        """
+        if self._started_tracing:
+            import tracemalloc
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def write_report(self, output: Union[str, Path, IO[str]] = STDERR) -> None:
+        """
+        Writes the report as one line of JSON, to stderr by default.
+
+        Parameters:
+        - output (Union[str, Path, IO[str]], optional): A file path, a text stream, or '-' for
+          stderr.
+
+        Returns:
+        - None
+        """
+        text = json.dumps(self.report()) + "\n"
+        if output == STDERR:
+            sys.stderr.write(text)
+        elif isinstance(output, (str, Path)):
+            Path(output).write_text(text)
+        else:
+            output.write(text)
+
+
+def profile_stage(profiler: Optional[Profiler], name: str) -> ContextManager:
+    """
+    Returns profiler.stage(name), or a context manager that does nothing without a profiler.
+    """
+    if profiler is None:
+        return nullcontext()
+    return profiler.stage(name)
+
+
+def limit_memory(max_bytes: int) -> None:
+    """
+    Caps the address space of the process, and of the workers it starts afterwards, so that an
+    allocation beyond `max_bytes` raises MemoryError instead of the process being killed by the
+    operating system. Unlike tracemalloc, the cap counts all memory, including the interpreter
+    and the C extensions. Only Linux enforces the limit; macOS accepts it but ignores it.
+
+    Parameters:
+    - max_bytes (int): The limit in bytes.
+
+    Returns:
+    - None
+
+    Raises:
+    - ValueError: If the platform does not enforce memory limits.
+    """
+    if not sys.platform.startswith("linux"):
+        raise ValueError("Memory limits are only supported on Linux.")
+    import resource
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        max_bytes = min(max_bytes, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (max_bytes, hard))
+
+
+class CountingWriter:
+    """
+    Wraps a text stream and counts the UTF-8 bytes written through it.
+    """
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self.bytes_written = 0
+
+    def write(self, text: str) -> int:
+        self.bytes_written += len(text.encode())
+        return self.stream.write(text)
+
+    def writelines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.write(line)
+
+    def flush(self) -> None:
+        self.stream.flush()
@@ -1,13 +1,56 @@
 from collections import deque
-from typing import Any, Dict, Final, List, Union
+from itertools import islice
+from typing import (TYPE_CHECKING, Any, Dict, Final, Iterable, Iterator, List,
+                    NamedTuple, Optional, Set, Sized, Tuple, Union)
 
-import networkx as nx
+from yaml2dot.compact_graph import CompactGraph
+from yaml2dot.subtrees import SharedSubtrees
+
+if TYPE_CHECKING:
+    # networkx takes longer to import than a small render takes, so it is only imported by
+    # the functions that build a networkx graph
+    from concurrent.futures import Future
+
+    import networkx as nx
 
 SEPARATOR: Final = "__"
 HANDLE_COLON: Final = "---"
+EDGE_ATTRS: Final = {"arrowhead": "none", "penwidth": "2.0"}
+ROUND_ROBIN_SHAPES: Final = ("rounded", "ellipse")
+# "reversed" numbers and renders documents from the last one to the first, which needs them all
+# in memory; "forward" renders them in input order as they are read.
+DOCUMENT_ORDERS: Final = ("reversed", "forward")
+# Id suffix, label and style of the node that stands in for a collapsed subtree
+SUMMARY_ID: Final = "+"
+SUMMARY_LABEL: Final = "+{count} nodes"
+SUMMARY_NODE_ATTRS: Final = {"style": "rounded, dashed"}
+# Id suffix and label of the node that stands in for the hidden middle of a long list
+MORE_ID: Final = "..."
+MORE_LABEL: Final = "… {count} more"
+# Documents sent to a worker process per task when rendering in parallel. Batches amortize the
+# cost of each round trip, which dominates for the small documents of a cluster dump.
+PARALLEL_BATCH_SIZE: Final = 64
+
+
+class NodeRecord(NamedTuple):
+    """A node emitted by the traversal, with its final label and the id of its parent (if any)."""
+    id: str
+    label: str
+    parent: Optional[str]
+    attrs: Dict[str, Any]
+
+
+class EdgeRecord(NamedTuple):
+    """An edge emitted by the traversal, from the parent node to the child node."""
+    source: str
+    target: str
+    attrs: Dict[str, Any]
 
 
-def create_graph(rankdir: str = "LR") -> nx.MultiDiGraph:
+GraphRecord = Union[NodeRecord, EdgeRecord]
+
+
+def create_graph(rankdir: str = "LR") -> "nx.MultiDiGraph":
     """
     Creates a new directed graph with specified layout direction.
 
@@ -17,13 +60,31 @@ def create_graph(rankdir: str = "LR") -> nx.MultiDiGraph:
     Returns:
     - nx.MultiDiGraph: A new directed graph.
     """
+    import networkx as nx
     graph = nx.MultiDiGraph()
     graph.graph['graph'] = {'rankdir': rankdir}
     return graph
 
 
-def add_node(graph: nx.MultiDiGraph, node_name: str, parent: str,
-             node_attrs: Dict[str, Any]) -> None:
+def render_label(node_name: str) -> str:
+    """
+    Returns the display label of a node, which is the last part of its path.
+    """
+    label = node_name.split(SEPARATOR)[-1]
+    if HANDLE_COLON in label:
+        label = label.replace(HANDLE_COLON, ":")
+        label = f'"{label}"'
+    return label
+
+
+def node_records(
+        node_name: str,
+        parent: Optional[str],
+        node_attrs: Dict[str, Any],
+        edge_attrs: Dict[str, Any] = EDGE_ATTRS) -> Iterator[GraphRecord]:
+    """
+    Yields the node record for node_name and, if it has a parent, the edge record linking them.
+    """
     # Handle empty node names or other specific conditions
     if not node_name.strip():
         # Skip adding the node, or handle it differently based on your requirements
@@ -33,29 +94,280 @@ def add_node(graph: nx.MultiDiGraph, node_name: str, parent: str,
                                  node_name.endswith('"')):
         node_name = node_name.replace(":", HANDLE_COLON)
 
-    graph.add_node(node_name, label=node_name, **node_attrs)
-
     if parent is not None:
         if ":" in parent and not (parent.startswith('"') and
                                   parent.endswith('"')):
             parent = f'"{parent}"'
-        graph.add_edge(parent, node_name, arrowhead="none", penwidth="2.0")
 
+    yield NodeRecord(node_name, render_label(node_name), parent, node_attrs)
 
-def process_data_bfs(data: Any,
-                     graph: nx.MultiDiGraph,
+    if parent is not None:
+        yield EdgeRecord(parent, node_name, edge_attrs)
+
+
+def add_record(graph: "nx.MultiDiGraph", record: GraphRecord) -> None:
+    """
+    Adds a node or edge record produced by the traversal to the graph.
+    """
+    if isinstance(record, NodeRecord):
+        graph.add_node(record.id, label=record.label, **record.attrs)
+    else:
+        graph.add_edge(record.source, record.target, **record.attrs)
+
+
+def add_compact_record(graph: CompactGraph, record: GraphRecord) -> None:
+    """
+    Adds a node or edge record produced by the traversal to a CompactGraph.
+    """
+    if isinstance(record, NodeRecord):
+        graph.add_node(record.id, record.label, record.attrs)
+    else:
+        graph.add_edge(record.source, record.target, record.attrs)
+
+
+def add_node(graph: "nx.MultiDiGraph", node_name: str, parent: str,
+             node_attrs: Dict[str, Any]) -> None:
+    for record in node_records(node_name, parent, node_attrs):
+        add_record(graph, record)
+
+
+def dot_leaf(value: Any) -> Tuple[str, str]:
+    """
+    Returns the id segment and the display label of a key or scalar value.
+    Colons are not allowed in DOT ids, so they are swapped for HANDLE_COLON in the id
+    and the label is quoted instead.
+    """
+    leaf = f"{value}"
+    if ":" in leaf:
+        return leaf.replace(":", HANDLE_COLON), f'"{leaf}"'
+    return leaf, leaf
+
+
+def _raw_leaf(value: Any) -> Tuple[str, str]:
+    # The text of a key or scalar value as it is, for outputs other than DOT
+    leaf = f"{value}"
+    return leaf, leaf
+
+
+def _edge_records(source: str, source_label: str, target: str,
+                  edge_attrs: Dict[str, Any],
+                  seen: Set[str]) -> Iterator[GraphRecord]:
+    if source not in seen:
+        # Document roots and skipped blank keys have no node of their own;
+        # emit a bare one so the edge has a labelled source.
+        seen.add(source)
+        yield NodeRecord(source, source_label, None, {})
+    yield EdgeRecord(source, target, edge_attrs)
+
+
+def subtree_size(data: Any) -> int:
+    """
+    Counts the nodes the traversal emits below a mapping or list: one per key, per scalar value and
+    per scalar list item. Nodes that merge because they share a path are counted each time, so
+    this is an upper bound. Nothing is stringified.
+    """
+    size = 0
+    stack = [data]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            for value in current.values():
+                size += 1
+                if isinstance(value, (dict, list)):
+                    stack.append(value)
+                else:
+                    size += 1
+        elif isinstance(current, list):
+            for item in current:
+                if isinstance(item, (dict, list)):
+                    stack.append(item)
+                else:
+                    size += 1
+    return size
+
+
+# Stands in for the hidden scalar items of a long list, see _list_window
+_MORE: Final = object()
+
+
+def _list_window(items: List[Any], max_items: int) -> Tuple[List[Any], int]:
+    # Returns the items of a list in traversal (reversed) order, keeping the first and last few
+    # of its scalar items and putting _MORE in place of the others, and how many were hidden.
+    # Hidden items are skipped without being stringified. Mappings and lists in the list are
+    # always kept, since their keys merge into the parent.
+    scalars = sum(1 for item in items if not isinstance(item, (dict, list)))
+    if scalars <= max_items:
+        return items[::-1], 0
+    head = (max_items + 1) // 2
+    tail = max_items // 2
+    hidden = scalars - head - tail
+    if scalars == len(items):
+        return items[len(items) - tail:][::-1] + [_MORE
+                                                 ] + items[:head][::-1], hidden
+    window = []
+    rank = scalars
+    for item in reversed(items):
+        if isinstance(item, (dict, list)):
+            window.append(item)
+            continue
+        rank -= 1
+        if rank < head or rank >= scalars - tail:
+            window.append(item)
+        elif rank == scalars - tail - 1:
+            window.append(_MORE)
+    return window, hidden
+
+
+def depth_for_node_budget(documents: Iterable[Any],
+                          max_nodes: int,
+                          max_list_items: Optional[int] = None) -> Optional[int]:
+    """
+    Finds the deepest key level at which the documents can be cut so that the rendered graph,
+    including one summary node per collapsed subtree, has at most max_nodes nodes.
+
+    Levels are counted breadth first, as the traversal visits them, and counting stops as soon
+    as the budget is exceeded, so the cost is bounded by the budget rather than by the input.
+
+    Parameters:
+    - documents (Iterable[Any]): The documents to render.
+    - max_nodes (int): The node budget.
+    - max_list_items (int, optional): Count long lists as collapsed by iter_bfs_records.
+
+    Returns:
+    - Optional[int]: The max_depth to render with (0 collapses every document into one summary
+      node), or None if the documents fit the budget entirely.
+    """
+    # Each entry of a level is a mapping or list whose contents make up the next level
+    frontier = [document for document in documents
+                if isinstance(document, (dict, list))]
+    total = 0
+    depth = 0
+    while frontier:
+        level_nodes = 0
+        next_frontier = []
+        pending = list(frontier)
+        while pending:
+            current = pending.pop()
+            if isinstance(current, dict):
+                for value in current.values():
+                    level_nodes += 1
+                    if isinstance(value, (dict, list)):
+                        if value:
+                            next_frontier.append(value)
+                    else:
+                        level_nodes += 1
+            else:
+                scalars = 0
+                for item in current:
+                    if isinstance(item, (dict, list)):
+                        # Items of a list hang from the list's parent, on the same level
+                        pending.append(item)
+                    else:
+                        scalars += 1
+                if max_list_items is not None and scalars > max_list_items:
+                    # The kept items and the node standing in for the others
+                    scalars = max_list_items + 1
+                level_nodes += scalars
+            if total + level_nodes + len(next_frontier) > max_nodes:
+                return depth
+        total += level_nodes
+        depth += 1
+        frontier = next_frontier
+    return None
+
+
+def _summary_records(parent_id: str, parent_label: str, data: Any,
+                     node_attrs: Dict[str, Any], edge_attrs: Dict[str, Any],
+                     seen: Set[str]) -> Iterator[GraphRecord]:
+    summary_id = f"{parent_id}{SEPARATOR}{SUMMARY_ID}"
+    # An empty mapping or list renders nothing, so there is nothing to summarize
+    if not data or summary_id in seen:
+        return
+    seen.add(summary_id)
+    yield NodeRecord(summary_id, SUMMARY_LABEL.format(count=subtree_size(data)),
+                     parent_id, {
+                         **node_attrs,
+                         **SUMMARY_NODE_ATTRS
+                     })
+    yield from _edge_records(parent_id, parent_label, summary_id, edge_attrs,
+                             seen)
+
+
+def iter_bfs_records(data: Any,
                      node_attrs: Dict[str, Any],
                      file_num=0,
                      multi_view=False,
-                     first_level=False) -> None:
-    if multi_view:
-        node = [(data, "", None)]
+                     first_level=False,
+                     seen: Optional[Set[str]] = None,
+                     edge_attrs: Dict[str, Any] = EDGE_ATTRS,
+                     shared: Optional[SharedSubtrees] = None,
+                     parent: Optional[Tuple[str, str]] = None,
+                     max_depth: Optional[int] = None,
+                     max_list_items: Optional[int] = None,
+                     counters: Optional[Dict[str, int]] = None,
+                     raw_labels: bool = False) -> Iterator[GraphRecord]:
+    """
+    Traverses a single document breadth first and yields its node and edge records.
+
+    Nothing is accumulated apart from the BFS queue and the set of visited node ids, so callers
+    can write records out as they arrive instead of building a graph. Labels are final when a
+    record is created: each queue entry carries the id and label of its parent node, and a child
+    id is built with a single concatenation onto the parent id.
+
+    Parameters:
+    - data (Any): The document to traverse.
+    - node_attrs (Dict[str, Any]): Attributes attached to every node record.
+    - file_num (int, optional): Document index used to prefix node ids. Ignored in multi_view.
+    - multi_view (bool, optional): Do not prefix node ids with the document index.
+    - first_level (bool, optional): Reverse the items of the first mapping that is visited.
+    - seen (Set[str], optional): Node ids already emitted, shared between documents. Updated in place.
+    - edge_attrs (Dict[str, Any], optional): Attributes attached to every edge record.
+    - shared (SharedSubtrees, optional): Render in DAG mode. Below the document root, a key whose
+      value is a mapping or list is identified by its content instead of its path, so identical
+      subtrees are rendered once and every further parent only gets an edge to the shared node.
+      Call shared.index_document(data) first.
+    - parent (Tuple[str, str], optional): The id and label of the node that data hangs from, to
+      traverse a part of a document. Defaults to the document root.
+    - max_depth (int, optional): Deepest key level to render; keys of the document root are level 1.
+      The mapping or list value of a key on that level is not traversed but replaced by a single
+      summary node labelled with the number of nodes it holds. 0 collapses the whole document.
+    - max_list_items (int, optional): Lists with more scalar items than this only show the first
+      and last few of them, and one "… N more" node in place of the rest, which are never
+      stringified.
+    - counters (Dict[str, int], optional): Receives the number of paths that led to a node
+      already emitted and were skipped, under 'duplicate_paths', once the traversal is done.
+    - raw_labels (bool, optional): Use the text of keys and values as it is in ids and labels.
+      By default colons are replaced by HANDLE_COLON in ids and labels holding one are quoted,
+      as DOT needs.
+
+    Returns:
+    - Iterator[GraphRecord]: Node and edge records in insertion order.
+    """
+    if seen is None:
+        seen = set()
+    leaf = _raw_leaf if raw_labels else dot_leaf
+    root_id = "" if multi_view else str(file_num)
+    if max_depth is not None and max_depth <= 0 and parent is None:
+        # Root keys are not linked to anything, and neither is the summary of the whole document
+        summary_id = f"{root_id}{SEPARATOR}{SUMMARY_ID}"
+        if summary_id not in seen:
+            seen.add(summary_id)
+            yield NodeRecord(summary_id,
+                             SUMMARY_LABEL.format(count=subtree_size(data)),
+                             None, {
+                                 **node_attrs,
+                                 **SUMMARY_NODE_ATTRS
+                             })
+        return
+    # Queue entries are (data, parent id, parent label, is_root, key level of the parent)
+    if parent is None:
+        queue = deque([(data, root_id, root_id, True, 0)])
     else:
-        node = [(data, str(file_num), None)]
-    queue = deque(node)  # Initialize with the root data
+        queue = deque([(data, parent[0], parent[1], False, 0)])
 
+    duplicates = 0
     while queue:
-        current_data, parent_path, parent_node = queue.popleft()
+        current_data, parent_id, parent_label, is_root, depth = queue.popleft()
 
         if isinstance(current_data, dict):
             if first_level:
@@ -64,97 +376,543 @@ def process_data_bfs(data: Any,
             else:
                 items = current_data.items()
             for key, value in items:
-                child_path = f"{parent_path}{SEPARATOR}{key}" if parent_path else key
-                if not graph.has_node(child_path):
-                    add_node(graph, child_path, parent_node, node_attrs)
+                key_id, key_label = leaf(key)
+                if shared is not None and not is_root and isinstance(
+                        value, (dict, list)):
+                    child_id = f"{key_id}{SEPARATOR}#{shared.ids[id(value)]}"
+                    link = (parent_id, child_id)
+                    if child_id in seen:
+                        # An identical subtree was rendered already: link to it, don't expand it
+                        duplicates += 1
+                        if link not in shared.links:
+                            shared.links.add(link)
+                            yield from _edge_records(parent_id, parent_label,
+                                                     child_id, edge_attrs,
+                                                     seen)
+                        continue
+                    shared.links.add(link)
+                else:
+                    child_id = f"{parent_id}{SEPARATOR}{key_id}" if parent_id else key_id
+                if child_id not in seen and (parent_id or child_id.strip()):
+                    seen.add(child_id)
+                    # Keys of the document root are not linked to anything
+                    yield NodeRecord(child_id, key_label,
+                                     None if is_root else parent_id,
+                                     node_attrs)
+                    if not is_root:
+                        yield from _edge_records(parent_id, parent_label,
+                                                 child_id, edge_attrs, seen)
+                elif child_id in seen:
+                    duplicates += 1
 
                 # Process the value
                 if isinstance(value, (dict, list)):
-                    queue.append((value, child_path, child_path))
+                    if max_depth is not None and depth + 1 >= max_depth:
+                        yield from _summary_records(child_id, key_label, value,
+                                                    node_attrs, edge_attrs,
+                                                    seen)
+                    else:
+                        queue.append(
+                            (value, child_id, key_label, False, depth + 1))
                 else:
-                    value_path = f"{child_path}{SEPARATOR}{value}"
-                    if not graph.has_node(value_path):
-                        add_node(graph, value_path, child_path, node_attrs)
+                    value_id, value_label = leaf(value)
+                    value_id = f"{child_id}{SEPARATOR}{value_id}"
+                    if value_id not in seen:
+                        seen.add(value_id)
+                        yield NodeRecord(value_id, value_label, child_id,
+                                         node_attrs)
+                        yield from _edge_records(child_id, key_label,
+                                                 value_id, edge_attrs, seen)
+                    else:
+                        duplicates += 1
 
         elif isinstance(current_data, list):
-            for item in current_data[::-1]:
-                if isinstance(item, (dict, list)):
-                    # Enqueue the item for processing without creating a separate node for the index
-                    item_path = f"{parent_path}{SEPARATOR}{item}"  # Unique path for each item
-                    if not graph.has_node(item_path):
-                        queue.append((item, parent_path, parent_path))
+            items = current_data[::-1]
+            hidden = 0
+            if max_list_items is not None and len(
+                    current_data) > max_list_items:
+                items, hidden = _list_window(current_data, max_list_items)
+            for item in items:
+                if item is _MORE:
+                    more_id = f"{parent_id}{SEPARATOR}{MORE_ID}"
+                    if more_id not in seen:
+                        seen.add(more_id)
+                        yield NodeRecord(more_id,
+                                         MORE_LABEL.format(count=hidden),
+                                         parent_id, {
+                                             **node_attrs,
+                                             **SUMMARY_NODE_ATTRS
+                                         })
+                        yield from _edge_records(parent_id, parent_label,
+                                                 more_id, edge_attrs, seen)
+                elif isinstance(item, (dict, list)):
+                    # Enqueue the item for processing without creating a separate node for the index.
+                    # Each queue entry is identified by its position in the list, so the subtree is
+                    # never stringified to build a lookup key.
+                    queue.append(
+                        (item, parent_id, parent_label, False, depth))
                 else:
                     # Process simple list items as values directly under the parent
-                    value_path = f"{parent_path}{SEPARATOR}{item}"
-                    if not graph.has_node(value_path):
-                        add_node(graph, value_path, parent_path, node_attrs)
+                    value_id, value_label = leaf(item)
+                    value_id = f"{parent_id}{SEPARATOR}{value_id}"
+                    if value_id not in seen:
+                        seen.add(value_id)
+                        yield NodeRecord(value_id, value_label, parent_id,
+                                         node_attrs)
+                        yield from _edge_records(parent_id, parent_label,
+                                                 value_id, edge_attrs, seen)
+                    else:
+                        duplicates += 1
+
+    if counters is not None:
+        counters["duplicate_paths"] = counters.get("duplicate_paths",
+                                                   0) + duplicates
+
+
+def process_data_bfs(data: Any,
+                     graph: "nx.MultiDiGraph",
+                     node_attrs: Dict[str, Any],
+                     file_num=0,
+                     multi_view=False,
+                     first_level=False,
+                     seen: Optional[Set[str]] = None) -> None:
+    if seen is None:
+        seen = set(graph.nodes)
+    for record in iter_bfs_records(data,
+                                   node_attrs,
+                                   file_num=file_num,
+                                   multi_view=multi_view,
+                                   first_level=first_level,
+                                   seen=seen):
+        add_record(graph, record)
 
 
-def rename_nodes_for_rendering(graph: nx.MultiDiGraph) -> None:
+def base_node_attrs(user_node_attrs: Optional[Dict[str, Any]],
+                    shape: str) -> Dict[str, Any]:
     """
-    Renames nodes for rendering by using only the last part of the path as the label.
+    Returns the default node attributes with the given shape, overridden by user_node_attrs.
     """
-    for node in graph.nodes:
-        # Use only the last part of the path as the label
-        new_label = node.split(SEPARATOR)[-1]
-        if "---" in new_label:
-            new_label = new_label.replace(HANDLE_COLON, ":")
-            new_label = f'"{new_label}"'
-        graph.nodes[node]['label'] = new_label
+    default_node_attrs = {
+        "fontname": "Fira Mono",
+        "fontsize": "10",
+        "margin": "0.3,0.1",
+        "fillcolor": "#fafafa",
+        "penwidth": 2.0,
+        "style": "rounded",
+        "shape": shape
+    }
+    return {**default_node_attrs, **(user_node_attrs or {})}
+
+
+def _document_node_attrs(node_attrs: Dict[str, Any], index: int,
+                         round_robin: bool) -> Dict[str, Any]:
+    # Select shape in a round-robin fashion from the shapes list
+    if round_robin:
+        shape = ROUND_ROBIN_SHAPES[index % len(ROUND_ROBIN_SHAPES)]
+        # Update node attributes with the selected shape for this document
+        return {**node_attrs, "shape": shape}
+    return node_attrs
+
+
+def _without_defaults(attrs: Dict[str, Any],
+                      defaults: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: value
+        for key, value in attrs.items()
+        if key not in defaults or defaults[key] != value
+    }
+
+
+def _is_single_document(data: Any) -> bool:
+    return isinstance(data, (dict, str, bytes)) or not isinstance(
+        data, Iterable)
+
+
+def iter_documents(data: Any,
+                   document_order: str = "reversed") -> Iterator[Tuple[int, Any]]:
+    """
+    Yields (file_num, document) pairs in rendering order.
+
+    Parameters:
+    - data (Any): A single document (e.g. a dict), a list of documents, or any iterable of documents
+      such as a generator over a multi-document YAML stream.
+    - document_order (str, optional): 'reversed' (default) renders the last document first as
+      file 0 and has to materialize the iterable; 'forward' renders documents in input order and
+      consumes the iterable lazily, so only one document needs to be alive at a time.
+
+    Returns:
+    - Iterator[Tuple[int, Any]]: The document number used in node ids, and the document.
+    """
+    if document_order not in DOCUMENT_ORDERS:
+        raise ValueError(
+            f"Unknown document order: {document_order}. Supported orders: {', '.join(DOCUMENT_ORDERS)}"
+        )
+    if _is_single_document(data):
+        data = [data]
+    if document_order == "forward":
+        return enumerate(data)
+    documents = data if isinstance(data, list) else list(data)
+    return enumerate(reversed(documents))
+
+
+def graph_defaults(data: Iterable[Any],
+                   user_node_attrs: Dict[str, Any] = None,
+                   multi_view=False,
+                   round_robin=False,
+                   shape="rounded") -> Dict[str, Dict[str, Any]]:
+    """
+    Computes the node and edge attributes shared by every element of the rendered graph.
+
+    Attributes that differ between documents (the shape, when round robin is enabled and there
+    is more than one document) are left out so that they are written on each node instead.
+
+    Parameters:
+    - data (Iterable[Any]): The documents to render, as accepted by iter_documents. The data is
+      not consumed; when its length is unknown it is assumed to hold several documents.
+    - user_node_attrs (Dict[str, Any], optional): User-defined attributes for each node.
+    - multi_view (bool, optional): Flag to indicate multiple YAML document rendering. Disables round robin style.
+    - round_robin (bool,optional): Flag to indicate if the library will assign node shapes automatically
+    - shape (str,optional): User specified custom shape for nodes. This option is ignored if round_robin is True.
+
+    Returns:
+    - Dict[str, Dict[str, Any]]: The shared attributes under the 'node' and 'edge' keys.
+    """
+    if _is_single_document(data):
+        document_count = 1
+    elif isinstance(data, Sized):
+        document_count = len(data)
+    else:
+        document_count = len(ROUND_ROBIN_SHAPES)
+    node_attrs = base_node_attrs(user_node_attrs, shape)
+    if multi_view:
+        round_robin = False
+
+    document_attrs = [
+        _document_node_attrs(node_attrs, index, round_robin)
+        for index in range(min(document_count, len(ROUND_ROBIN_SHAPES)))
+    ] or [node_attrs]
+    shared_node_attrs = {
+        key: value
+        for key, value in document_attrs[0].items()
+        if all(key in attrs and attrs[key] == value
+               for attrs in document_attrs[1:])
+    }
+    return {"node": shared_node_attrs, "edge": dict(EDGE_ATTRS)}
+
+
+def _document_records(index: int, document: Any, node_attrs: Dict[str, Any],
+                      round_robin: bool,
+                      defaults: Optional[Dict[str, Dict[str, Any]]],
+                      edge_attrs: Dict[str, Any],
+                      multi_view: bool,
+                      seen: Set[str],
+                      shared: Optional[SharedSubtrees] = None,
+                      max_depth: Optional[int] = None,
+                      max_list_items: Optional[int] = None,
+                      counters: Optional[Dict[str, int]] = None,
+                      raw_labels: bool = False) -> Iterator[GraphRecord]:
+    if counters is not None:
+        counters["documents"] = counters.get("documents", 0) + 1
+    document_node_attrs = _document_node_attrs(node_attrs, index, round_robin)
+    if defaults:
+        document_node_attrs = _without_defaults(document_node_attrs,
+                                                defaults.get("node", {}))
+    if shared is not None:
+        shared.index_document(document)
+    return iter_bfs_records(document,
+                            document_node_attrs,
+                            file_num=index,
+                            multi_view=multi_view,
+                            first_level=True,
+                            seen=seen,
+                            edge_attrs=edge_attrs,
+                            shared=shared,
+                            max_depth=max_depth,
+                            max_list_items=max_list_items,
+                            counters=counters,
+                            raw_labels=raw_labels)
+
+
+def _render_document_batch(documents: List[Tuple[int, Any]],
+                           node_attrs: Dict[str, Any], round_robin: bool,
+                           defaults: Optional[Dict[str, Dict[str, Any]]],
+                           edge_attrs: Dict[str, Any],
+                           max_depth: Optional[int] = None,
+                           max_list_items: Optional[int] = None,
+                           raw_labels: bool = False
+                           ) -> Tuple[List[GraphRecord], Dict[str, int]]:
+    # Runs in a worker process. Documents rendered without multi_view never share nodes, so each
+    # one gets its own visited set exactly as in the serial loop.
+    records: List[GraphRecord] = []
+    counters: Dict[str, int] = {}
+    for index, document in documents:
+        records.extend(
+            _document_records(index, document, node_attrs, round_robin,
+                              defaults, edge_attrs, False, set(),
+                              max_depth=max_depth,
+                              max_list_items=max_list_items,
+                              counters=counters,
+                              raw_labels=raw_labels))
+    return records, counters
+
+
+def _iter_parallel_records(documents: Iterator[Tuple[int, Any]], workers: int,
+                           node_attrs: Dict[str, Any], round_robin: bool,
+                           defaults: Optional[Dict[str, Dict[str, Any]]],
+                           edge_attrs: Dict[str, Any],
+                           max_depth: Optional[int] = None,
+                           max_list_items: Optional[int] = None,
+                           counters: Optional[Dict[str, int]] = None,
+                           raw_labels: bool = False) -> Iterator[GraphRecord]:
+    # Batches are submitted in document order and their results yielded in the same order, so
+    # the merged records match the serial traversal. At most two batches per worker are in
+    # flight, which keeps a lazily read input streaming instead of loading it all up front.
+    from concurrent.futures import ProcessPoolExecutor
+    pending: deque = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = list(islice(documents, PARALLEL_BATCH_SIZE))
+            if not batch:
+                break
+            pending.append(
+                executor.submit(_render_document_batch, batch, node_attrs,
+                                round_robin, defaults, edge_attrs,
+                                max_depth, max_list_items, raw_labels))
+            if len(pending) >= 2 * workers:
+                yield from _batch_records(pending.popleft(), counters)
+        while pending:
+            yield from _batch_records(pending.popleft(), counters)
+
+
+def _batch_records(future: "Future",
+                   counters: Optional[Dict[str, int]]) -> List[GraphRecord]:
+    records, batch_counters = future.result()
+    if counters is not None:
+        for name, count in batch_counters.items():
+            counters[name] = counters.get(name, 0) + count
+    return records
+
+
+def _edge_attrs(defaults: Optional[Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    if defaults:
+        return _without_defaults(EDGE_ATTRS, defaults.get("edge", {}))
+    return EDGE_ATTRS
 
 
-def render(data: List[Dict[str, Any]],
+def iter_document_records(
+        document: Any,
+        file_num: int,
+        user_node_attrs: Dict[str, Any] = None,
+        round_robin=False,
+        shape="rounded",
+        defaults: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_depth: Optional[int] = None,
+        max_list_items: Optional[int] = None) -> Iterator[GraphRecord]:
+    """
+    Yields the records of a single document of a multi-document input, exactly as
+    iter_render_records yields them for document file_num when multi_view and dag are off.
+
+    Documents are independent then, so callers can render and cache them separately.
+
+    Parameters:
+    - document (Any): The document to traverse.
+    - file_num (int): The document number, as given by iter_documents.
+    - user_node_attrs (Dict[str, Any], optional): User-defined attributes for each node.
+    - round_robin (bool,optional): Flag to indicate if the library will assign node shapes automatically
+    - shape (str,optional): User specified custom shape for nodes. This option is ignored if round_robin is True.
+    - defaults (Dict[str, Dict[str, Any]], optional): Shared attributes from graph_defaults().
+    - max_depth (int, optional): Deepest key level to render, see iter_bfs_records.
+    - max_list_items (int, optional): Scalar items shown per list, see iter_bfs_records.
+
+    Returns:
+    - Iterator[GraphRecord]: Node and edge records of the document.
+    """
+    return _document_records(file_num, document,
+                             base_node_attrs(user_node_attrs, shape),
+                             round_robin, defaults, _edge_attrs(defaults),
+                             False, set(), max_depth=max_depth,
+                             max_list_items=max_list_items)
+
+
+def iter_render_records(
+        data: Iterable[Any],
+        user_node_attrs: Dict[str, Any] = None,
+        multi_view=False,
+        round_robin=False,
+        shape="rounded",
+        defaults: Optional[Dict[str, Dict[str, Any]]] = None,
+        document_order: str = "reversed",
+        workers: int = 1,
+        dag: bool = False,
+        max_depth: Optional[int] = None,
+        max_nodes: Optional[int] = None,
+        max_list_items: Optional[int] = None,
+        counters: Optional[Dict[str, int]] = None,
+        raw_labels: bool = False) -> Iterator[GraphRecord]:
+    """
+    Traverses a list of Python dictionaries (from YAML documents) and yields node and edge records
+    in the order render() inserts them, without building a graph.
+
+    Parameters:
+    - data (Iterable[Any]): The documents to render, as accepted by iter_documents.
+    - user_node_attrs (Dict[str, Any], optional): User-defined attributes for each node.
+    - multi_view (bool, optional): Flag to indicate multiple YAML document rendering. Disables round robin style.
+    - round_robin (bool,optional): Flag to indicate if the library will assign node shapes automatically
+    - shape (str,optional): User specified custom shape for nodes. This option is ignored if round_robin is True.
+    - defaults (Dict[str, Dict[str, Any]], optional): Shared attributes from graph_defaults(). Records
+      then only carry the attributes that differ from these defaults.
+    - document_order (str, optional): 'reversed' (default) or 'forward', see iter_documents.
+    - workers (int, optional): Number of processes rendering documents in parallel. Documents are
+      independent unless multi_view is set, which always renders serially. The records are
+      identical and in the same order as with a single worker (the default).
+    - dag (bool, optional): Share identical subtrees within and across documents instead of
+      repeating them, see iter_bfs_records. DAG mode always renders serially.
+    - max_depth (int, optional): Deepest key level to render, see iter_bfs_records. Deeper
+      subtrees are replaced by a summary node each.
+    - max_nodes (int, optional): Node budget. The documents are cut at the deepest level that
+      keeps the graph within the budget, see depth_for_node_budget, so the shallowest levels are
+      the ones shown. This reads all documents before the first record is yielded.
+    - max_list_items (int, optional): Scalar items shown per list; the rest of a longer list is
+      replaced by one "… N more" node, see iter_bfs_records.
+    - counters (Dict[str, int], optional): Receives the number of 'documents' traversed, of
+      'duplicate_paths' skipped, see iter_bfs_records, and of the 'nodes' and 'edges' records
+      yielded. Updated in place.
+    - raw_labels (bool, optional): Keep the text of keys and values unescaped in ids and labels,
+      for outputs other than DOT, see iter_bfs_records.
+
+    Returns:
+    - Iterator[GraphRecord]: Node and edge records for every document.
+    """
+    node_attrs = base_node_attrs(user_node_attrs, shape)
+    edge_attrs = _edge_attrs(defaults)
+    if multi_view:
+        round_robin = False
+
+    documents = iter_documents(data, document_order)
+    if max_nodes is not None:
+        documents = list(documents)
+        budget_depth = depth_for_node_budget(
+            (document for _, document in documents), max_nodes,
+            max_list_items)
+        if budget_depth is not None and (max_depth is None
+                                         or budget_depth < max_depth):
+            max_depth = budget_depth
+        documents = iter(documents)
+    if workers > 1 and not multi_view and not dag and not _is_single_document(
+            data):
+        records = _iter_parallel_records(documents, workers, node_attrs,
+                                         round_robin, defaults, edge_attrs,
+                                         max_depth, max_list_items, counters,
+                                         raw_labels)
+    else:
+        records = _iter_serial_records(documents, node_attrs, round_robin,
+                                       defaults, edge_attrs, multi_view, dag,
+                                       max_depth, max_list_items, counters,
+                                       raw_labels)
+    if counters is None:
+        yield from records
+        return
+    # Every record is inserted once, so these match the nodes and edges of the rendered graph
+    for record in records:
+        name = "nodes" if isinstance(record, NodeRecord) else "edges"
+        counters[name] = counters.get(name, 0) + 1
+        yield record
+
+
+def _iter_serial_records(documents: Iterator[Tuple[int, Any]],
+                         node_attrs: Dict[str, Any], round_robin: bool,
+                         defaults: Optional[Dict[str, Dict[str, Any]]],
+                         edge_attrs: Dict[str, Any], multi_view: bool,
+                         dag: bool, max_depth: Optional[int],
+                         max_list_items: Optional[int],
+                         counters: Optional[Dict[str, int]],
+                         raw_labels: bool) -> Iterator[GraphRecord]:
+    shared = SharedSubtrees() if dag else None
+    seen: Set[str] = set()
+    for index, document in documents:
+        if not multi_view and not dag:
+            # Node ids are prefixed with the document number, so documents cannot share nodes
+            # and the visited set only needs to cover the current one.
+            seen = set()
+        yield from _document_records(index, document, node_attrs, round_robin,
+                                     defaults, edge_attrs, multi_view, seen,
+                                     shared, max_depth, max_list_items,
+                                     counters, raw_labels)
+
+
+def render(data: Iterable[Any],
            user_node_attrs: Dict[str, Any] = None,
            rankdir: str = "LR",
            multi_view=False,
            round_robin=False,
-           shape="rounded") -> nx.MultiDiGraph:
+           shape="rounded",
+           compact=False,
+           shared_defaults=False,
+           document_order="reversed",
+           workers: int = 1,
+           dag: bool = False,
+           max_depth: Optional[int] = None,
+           max_nodes: Optional[int] = None,
+           max_list_items: Optional[int] = None,
+           counters: Optional[Dict[str, int]] = None
+           ) -> Union["nx.MultiDiGraph", CompactGraph]:
     """
     Renders a list of Python dictionaries (from YAML documents) into a directed graph using NetworkX.
 
     Parameters:
-    - data (List[Dict[str, Any]]): The list of Python dictionaries to render, each representing a YAML document.
+    - data (Iterable[Any]): The documents to render, each representing a YAML document, as accepted
+      by iter_documents. With document_order='forward' a generator is consumed one document at a time.
     - user_node_attrs (Dict[str, Any], optional): User-defined attributes for each node.
     - rankdir (str, optional): The direction of the graph layout. Defaults to "LR" (left to right).
     - multi_view (bool, optional): Flag to indicate multiple YAML document rendering. Disables round robin style.
     - round_robin (bool,optional): Flag to indicate if the library will assign node shapes automatically
     - shape (str,optional): User specified custom shape for nodes. This option is ignored if round_robin is True.
+    - compact (bool, optional): Build an array-backed CompactGraph instead of a networkx graph.
+      Use CompactGraph.to_networkx() to convert it when networkx is needed.
+    - shared_defaults (bool, optional): Store attributes shared by all nodes and edges once as graph
+      defaults (graph.graph['node'] and graph.graph['edge']) and keep only overrides on each element.
+    - document_order (str, optional): 'reversed' (default) or 'forward', see iter_documents.
+    - workers (int, optional): Number of processes rendering documents in parallel, see
+      iter_render_records. The graph is the same as with a single worker (the default).
+    - dag (bool, optional): Render identical subtrees once, with an edge from each of their
+      parents, see iter_render_records.
+    - max_depth (int, optional): Deepest key level to render, see iter_render_records.
+    - max_nodes (int, optional): Node budget, see iter_render_records.
+    - max_list_items (int, optional): Scalar items shown per list, see iter_render_records.
+    - counters (Dict[str, int], optional): Receives traversal counts, see iter_render_records.
 
     Returns:
-    - nx.MultiDiGraph: The resulting directed graph.
+    - Union[nx.MultiDiGraph, CompactGraph]: The resulting directed graph.
     """
-    graph = create_graph(rankdir)
-
-    # Define default node attributes if not provided by the user
-    default_node_attrs = {
-        "fontname": "Fira Mono",
-        "fontsize": "10",
-        "margin": "0.3,0.1",
-        "fillcolor": "#fafafa",
-        "penwidth": 2.0,
-        "style": "rounded",
-        "shape": shape
-    }
-    data = [data] if not isinstance(data, list) else data
-    node_attrs = {**default_node_attrs, **(user_node_attrs or {})}
-    if multi_view:
-        round_robin = False
+    defaults = None
+    if shared_defaults:
+        defaults = graph_defaults(data,
+                                  user_node_attrs=user_node_attrs,
+                                  multi_view=multi_view,
+                                  round_robin=round_robin,
+                                  shape=shape)
+    records = iter_render_records(data,
+                                  user_node_attrs=user_node_attrs,
+                                  multi_view=multi_view,
+                                  round_robin=round_robin,
+                                  shape=shape,
+                                  defaults=defaults,
+                                  document_order=document_order,
+                                  workers=workers,
+                                  dag=dag,
+                                  max_depth=max_depth,
+                                  max_nodes=max_nodes,
+                                  max_list_items=max_list_items,
+                                  counters=counters)
+    if compact:
+        compact_graph = CompactGraph(rankdir)
+        compact_graph.graph.update(defaults or {})
+        for record in records:
+            add_compact_record(compact_graph, record)
+        return compact_graph
 
-    shapes = ["rounded", "ellipse"]
-    for index, document in enumerate(reversed(data)):
-        # Select shape in a round-robin fashion from the shapes list
-        if round_robin:
-            shape = shapes[index % len(shapes)]
-            # Update node attributes with the selected shape for this document
-            document_node_attrs = {**node_attrs, "shape": shape}
-        else:
-            document_node_attrs = node_attrs
-        process_data_bfs(document,
-                         graph,
-                         document_node_attrs,
-                         file_num=index,
-                         multi_view=multi_view,
-                         first_level=True)
-
-    rename_nodes_for_rendering(graph)
+    graph = create_graph(rankdir)
+    graph.graph.update(defaults or {})
+    for record in records:
+        add_record(graph, record)
     return graph
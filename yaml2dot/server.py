@@ -0,0 +1,586 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import (Any, Callable, Dict, Final, List, NamedTuple, Optional,
+                    Tuple)
+from urllib.parse import parse_qs, urlsplit
+
+import yaml
+
+from yaml2dot.converter import convert_yaml_or_json_to_format
+from yaml2dot.data_loader import JSONStreamError, parse_yaml_or_json_bytes
+from yaml2dot.export import EXPORT_FORMATS
+from yaml2dot.renderer import DOCUMENT_ORDERS
+
+DEFAULT_HOST: Final = "127.0.0.1"
+DEFAULT_PORT: Final = 8080
+DEFAULT_TIMEOUT: Final = 30.0
+DEFAULT_RESULT_CACHE_SIZE: Final = 64 * 1024 * 1024
+DEFAULT_MAX_BODY_SIZE: Final = 16 * 1024 * 1024
+# Requests waiting for a worker beyond this many per worker are turned away with 503
+DEFAULT_QUEUE_PER_WORKER: Final = 16
+MAX_HEADER_SIZE: Final = 64 * 1024
+# A Content-Length is only digits; int() would also take signs, spaces and underscores
+_CONTENT_LENGTH: Final = re.compile(r"[0-9]+")
+# Upper bounds in seconds of the request latency histogram
+LATENCY_BUCKETS: Final = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                          5.0, 10.0, 30.0)
+
+OUTPUT_FORMATS: Final = ("dot", "json") + EXPORT_FORMATS
+CONTENT_TYPES: Final = {
+    "dot": "text/vnd.graphviz; charset=utf-8",
+    "json": "application/json",
+    "npz": "application/octet-stream",
+    "tsv": "text/tab-separated-values; charset=utf-8",
+    "graphml": "application/xml",
+}
+# Input format of a request body by the subtype of its Content-Type
+INPUT_FORMATS: Final = {
+    "json": "json",
+    "x-ndjson": "jsonl",
+    "jsonl": "jsonl",
+    "x-yaml": "yaml",
+    "yaml": "yaml",
+}
+_FLAG_OPTIONS: Final = ("multi_view", "round_robin", "shared_defaults", "dag",
+                        "compact_json")
+_LIMIT_OPTIONS: Final = ("max_depth", "max_nodes", "max_list_items")
+_REASONS: Final = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    417: "Expectation Failed",
+    422: "Unprocessable Entity",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class RequestError(Exception):
+    """A request that is answered with an HTTP error status and message."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Response(NamedTuple):
+    """The status, content type and body of an HTTP response."""
+    status: int
+    content_type: str
+    body: bytes
+
+
+def render_options(query: str) -> Dict[str, Any]:
+    """
+    Reads the render options of a request from its query string.
+
+    Parameters:
+    - query (str): The query string, e.g. 'output_format=json&rankdir=TB&max_depth=3'.
+
+    Returns:
+    - Dict[str, Any]: Keyword arguments of converter.convert_yaml_or_json_to_format, with
+      every option set so that equal requests give equal cache keys.
+
+    Raises:
+    - RequestError: If an option is unknown or has an invalid value.
+    """
+    options: Dict[str, Any] = {
+        "output_format": "dot",
+        "rankdir": "LR",
+        "shape": "rounded",
+        "document_order": "reversed",
+        **{name: False
+           for name in _FLAG_OPTIONS},
+        **{name: None
+           for name in _LIMIT_OPTIONS},
+    }
+    for name, values in parse_qs(query, keep_blank_values=True).items():
+        value = values[-1]
+        if name not in options:
+            raise RequestError(400, f"Unknown option: {name}")
+        if name in _FLAG_OPTIONS:
+            if value not in ("", "1", "true", "0", "false"):
+                raise RequestError(400, f"{name} must be true or false")
+            options[name] = value in ("", "1", "true")
+        elif name in _LIMIT_OPTIONS:
+            if not value.isdigit():
+                raise RequestError(400, f"{name} must be a non-negative integer")
+            options[name] = int(value)
+        else:
+            options[name] = value
+    if options["output_format"] not in OUTPUT_FORMATS:
+        raise RequestError(
+            400, f"output_format must be one of {', '.join(OUTPUT_FORMATS)}")
+    if options["rankdir"] not in ("LR", "TB"):
+        raise RequestError(400, "rankdir must be LR or TB")
+    if options["document_order"] not in DOCUMENT_ORDERS:
+        raise RequestError(
+            400, f"document_order must be one of {', '.join(DOCUMENT_ORDERS)}")
+    return options
+
+
+def input_format(content_type: str) -> str:
+    """
+    Returns the input format of a request body from its Content-Type. YAML is the default, and
+    since YAML is a superset of JSON it reads JSON bodies sent without a type as well.
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    return INPUT_FORMATS.get(media_type.rpartition("/")[2], "yaml")
+
+
+def render_body(body: bytes, data_format: str,
+                options: Dict[str, Any]) -> Response:
+    """
+    Parses and renders a request body. Runs in a worker process.
+
+    Returns:
+    - Response: The rendered graph, or a 422 response if the body cannot be parsed or holds
+      nothing to render.
+    """
+    try:
+        data, _ = parse_yaml_or_json_bytes(body, data_format)
+    except (yaml.YAMLError, JSONStreamError) as error:
+        return Response(422, "text/plain; charset=utf-8",
+                        f"Error parsing {data_format.upper()}: {error}\n".encode())
+    output = convert_yaml_or_json_to_format(data, **options)
+    if output is None:
+        return Response(422, "text/plain; charset=utf-8",
+                        b"The body holds no mapping or list to render\n")
+    if not isinstance(output, bytes):
+        output = output.encode()
+    return Response(200, CONTENT_TYPES[options["output_format"]], output)
+
+
+class ResultCache:
+    """
+    In-memory LRU of rendered responses, bounded by the total size of their bodies.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_RESULT_CACHE_SIZE):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Response]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Response]:
+        response = self._entries.get(key)
+        if response is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def put(self, key: str, response: Response) -> None:
+        if len(response.body) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = response
+        self.size += len(response.body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted.body)
+            self.evictions += 1
+
+
+class Metrics:
+    """
+    Counters of a running server, written in the Prometheus text format by /metrics.
+    """
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, int], int] = {}
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.render_seconds = 0.0
+        self.renders = 0
+        self.timeouts = 0
+        self.rejected = 0
+        # Requests waiting for a worker, and requests being rendered by one
+        self.queued = 0
+        self.in_flight = 0
+
+    def observe(self, path: str, status: int, seconds: float) -> None:
+        self.requests[(path, status)] = self.requests.get((path, status), 0) + 1
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.latency_sum += seconds
+
+    def lines(self, cache: ResultCache) -> List[str]:
+        lines = [
+            "# TYPE yaml2dot_requests_total counter",
+            *(f'yaml2dot_requests_total{{path="{path}",status="{status}"}} {count}'
+              for (path, status), count in sorted(self.requests.items())),
+            "# TYPE yaml2dot_request_duration_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, "+Inf"),
+                                self.latency_buckets):
+            cumulative += count
+            lines.append(
+                f'yaml2dot_request_duration_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines += [
+            f"yaml2dot_request_duration_seconds_sum {self.latency_sum:.6f}",
+            f"yaml2dot_request_duration_seconds_count {cumulative}",
+            "# TYPE yaml2dot_render_seconds_total counter",
+            f"yaml2dot_render_seconds_total {self.render_seconds:.6f}",
+            "# TYPE yaml2dot_renders_total counter",
+            f"yaml2dot_renders_total {self.renders}",
+            "# TYPE yaml2dot_timeouts_total counter",
+            f"yaml2dot_timeouts_total {self.timeouts}",
+            "# TYPE yaml2dot_rejected_total counter",
+            f"yaml2dot_rejected_total {self.rejected}",
+            "# TYPE yaml2dot_queue_depth gauge",
+            f"yaml2dot_queue_depth {self.queued}",
+            "# TYPE yaml2dot_in_flight gauge",
+            f"yaml2dot_in_flight {self.in_flight}",
+            "# TYPE yaml2dot_cache_hits_total counter",
+            f"yaml2dot_cache_hits_total {cache.hits}",
+            "# TYPE yaml2dot_cache_misses_total counter",
+            f"yaml2dot_cache_misses_total {cache.misses}",
+            "# TYPE yaml2dot_cache_evictions_total counter",
+            f"yaml2dot_cache_evictions_total {cache.evictions}",
+            "# TYPE yaml2dot_cache_entries gauge",
+            f"yaml2dot_cache_entries {len(cache)}",
+            "# TYPE yaml2dot_cache_bytes gauge",
+            f"yaml2dot_cache_bytes {cache.size}",
+        ]
+        return lines
+
+
+def _warm_up() -> None:
+    # Runs once in every worker process so that the first request does not pay for the imports
+    # and first-call costs of the rendering stack
+    render_body(b"a: [b]\n", "yaml", render_options(""))
+
+
+def _new_worker() -> ProcessPoolExecutor:
+    # One executor per worker, so that a worker can be killed without failing the renders of the
+    # others. Where available, workers are forked from a fork server: forked from the server
+    # itself, a worker replaced while connections are open would inherit their sockets and keep
+    # them open after the response.
+    context = (multiprocessing.get_context("forkserver")
+               if "forkserver" in multiprocessing.get_all_start_methods() else None)
+    return ProcessPoolExecutor(max_workers=1,
+                               mp_context=context,
+                               initializer=_warm_up)
+
+
+def _kill_worker(executor: ProcessPoolExecutor) -> None:
+    # A running task cannot be cancelled, so its process is killed
+    for process in list(executor._processes.values()):
+        process.kill()
+    executor.shutdown(wait=False)
+
+
+class RenderServer:
+    """
+    Asyncio HTTP server that renders YAML and JSON request bodies on a pool of worker processes.
+
+    Endpoints:
+    - POST /render: renders the body. The Content-Type selects the input format (application/json,
+      application/x-ndjson, or YAML by default) and the query string the render options, e.g.
+      /render?output_format=json&max_depth=3.
+    - GET /metrics: request, latency, queue and cache counters in the Prometheus text format.
+    - GET /health: answers 'ok'.
+
+    At most one render per worker runs at a time and the others wait in a queue; requests beyond
+    the queue limit are answered with 503. A request that is not answered within the timeout,
+    waiting included, gets 504. A render that started late still completes in the background and
+    is cached, but one that runs longer than the timeout itself is stopped by killing its worker
+    process, which is replaced, as is a worker that dies. Identical concurrent requests share one
+    render, and recent results are kept in a ResultCache.
+    """
+
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 cache_size: int = DEFAULT_RESULT_CACHE_SIZE,
+                 max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+                 max_queue: Optional[int] = None):
+        """
+        Parameters:
+        - workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        - timeout (float, optional): Seconds before a request is answered with 504.
+        - cache_size (int, optional): Size limit of the result cache in bytes.
+        - max_body_size (int, optional): Largest accepted request body in bytes.
+        - max_queue (int, optional): Requests that may wait for a worker. Defaults to
+          DEFAULT_QUEUE_PER_WORKER per worker.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_body_size = max_body_size
+        self.max_queue = (max_queue if max_queue is not None else
+                          DEFAULT_QUEUE_PER_WORKER * self.workers)
+        self.cache = ResultCache(cache_size)
+        self.metrics = Metrics()
+        self._workers: List[ProcessPoolExecutor] = []
+        self._idle: Optional["asyncio.Queue[ProcessPoolExecutor]"] = None
+        self._pending: Dict[str, "asyncio.Future[Response]"] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = DEFAULT_HOST,
+                    port: int = DEFAULT_PORT) -> Tuple[str, int]:
+        """
+        Starts the worker pool and begins accepting connections.
+
+        Returns:
+        - Tuple[str, int]: The address the server is bound to. Port 0 binds a free port.
+        """
+        self._idle = asyncio.Queue()
+        self._workers = [_new_worker() for _ in range(self.workers)]
+        # Starts the workers before accepting connections, so the first requests do not wait
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(worker, _warm_up)
+                               for worker in self._workers))
+        for worker in self._workers:
+            self._idle.put_nowait(worker)
+        self._server = await asyncio.start_server(self._handle_connection,
+                                                  host,
+                                                  port,
+                                                  limit=MAX_HEADER_SIZE)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self) -> None:
+        assert self._server is not None
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """
+        Stops accepting connections and shuts the worker pool down.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for worker in self._workers:
+            worker.shutdown(wait=True)
+
+    async def render(self, body: bytes, data_format: str,
+                     options: Dict[str, Any]) -> Response:
+        """
+        Renders a body through the cache and the worker pool.
+
+        Raises:
+        - RequestError: 503 if the queue is full, 504 if the timeout expires.
+        """
+        key = hashlib.sha256(
+            json.dumps([data_format, options], sort_keys=True).encode() +
+            b"\0" + body).hexdigest()
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+        future = self._pending.get(key)
+        if future is None:
+            if self.metrics.queued >= self.max_queue:
+                self.metrics.rejected += 1
+                raise RequestError(503, "Too many requests are waiting")
+            future = asyncio.ensure_future(
+                self._render_in_worker(key, body, data_format, options))
+            self._pending[key] = future
+            future.add_done_callback(
+                lambda done: self._forget(key, done))
+        try:
+            # Shielded so that a timed out request leaves the render running for the others
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            raise RequestError(504, f"Rendering took longer than {self.timeout}s")
+
+    def _forget(self, key: str, future: "asyncio.Future[Response]") -> None:
+        del self._pending[key]
+        # Retrieved here so that a failure seen only by timed out requests is not reported as
+        # never retrieved; the waiting requests still get it
+        if not future.cancelled():
+            future.exception()
+
+    def _replace_worker(self, worker: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        _kill_worker(worker)
+        replacement = _new_worker()
+        self._workers[self._workers.index(worker)] = replacement
+        return replacement
+
+    async def _render_in_worker(self, key: str, body: bytes, data_format: str,
+                                options: Dict[str, Any]) -> Response:
+        assert self._idle is not None
+        self.metrics.queued += 1
+        try:
+            worker = await self._idle.get()
+        finally:
+            self.metrics.queued -= 1
+        self.metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                asyncio.get_running_loop().run_in_executor(
+                    worker, render_body, body, data_format, options),
+                self.timeout)
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            # The render would hold its worker past the timeout, or the worker died
+            worker = self._replace_worker(worker)
+            await asyncio.get_running_loop().run_in_executor(worker, _warm_up)
+            raise
+        finally:
+            self.metrics.in_flight -= 1
+            self._idle.put_nowait(worker)
+            self.metrics.render_seconds += time.perf_counter() - start
+            self.metrics.renders += 1
+        if response.status == 200:
+            self.cache.put(key, response)
+        return response
+
+    async def respond(self, method: str, target: str, headers: Dict[str, str],
+                      body: bytes) -> Response:
+        """
+        Answers one parsed HTTP request.
+        """
+        url = urlsplit(target)
+        if url.path == "/render":
+            if method != "POST":
+                raise RequestError(405, "Use POST to render a body")
+            return await self.render(body,
+                                     input_format(headers.get("content-type", "")),
+                                     render_options(url.query))
+        if url.path == "/metrics":
+            text = "\n".join(self.metrics.lines(self.cache)) + "\n"
+            return Response(200, "text/plain; version=0.0.4; charset=utf-8",
+                            text.encode())
+        if url.path == "/health":
+            return Response(200, "text/plain; charset=utf-8", b"ok\n")
+        raise RequestError(404, f"No such endpoint: {url.path}")
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> Optional[Tuple[str, str, str, Dict[str, str], bytes]]:
+        # Returns the method, target, HTTP version, headers and body of the next request, or None
+        # if the client closed the connection
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            # The client closed the connection between two requests
+            return None
+        except asyncio.LimitOverrunError:
+            raise RequestError(431, "The request headers are too large")
+        request_line, *header_lines = head.decode("latin1").split("\r\n")
+        try:
+            method, target, version = request_line.split(" ")
+        except ValueError:
+            raise RequestError(400, "Malformed request line")
+        headers: Dict[str, str] = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise RequestError(411, "Send the body with a Content-Length")
+        content_length = headers.get("content-length", "0")
+        if not _CONTENT_LENGTH.fullmatch(content_length):
+            raise RequestError(400, "Invalid Content-Length")
+        length = int(content_length)
+        if length > self.max_body_size:
+            raise RequestError(413, f"The body is larger than {self.max_body_size} bytes")
+        expect = headers.get("expect", "").lower()
+        if expect:
+            if expect != "100-continue":
+                raise RequestError(417, f"Unsupported expectation: {expect}")
+            if version != "HTTP/1.0":
+                # The client waits for this before sending the body
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                await writer.drain()
+        body = await reader.readexactly(length) if length else b""
+        return method, target, version, headers, body
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                start = time.perf_counter()
+                path = ""
+                keep_alive = True
+                try:
+                    request = await self._read_request(reader, writer)
+                    if request is None:
+                        break
+                    method, target, version, headers, body = request
+                    path = urlsplit(target).path
+                    connection = {
+                        option.strip()
+                        for option in headers.get("connection", "").lower().split(",")
+                    }
+                    # HTTP/1.0 connections close after each response unless asked otherwise
+                    keep_alive = ("keep-alive" in connection if version == "HTTP/1.0"
+                                  else "close" not in connection)
+                    response = await self.respond(method, target, headers, body)
+                except RequestError as error:
+                    response = Response(error.status,
+                                        "text/plain; charset=utf-8",
+                                        f"{error}\n".encode())
+                    # The rest of a rejected request may still be unread
+                    keep_alive = keep_alive and error.status not in (400, 411,
+                                                                     413, 417,
+                                                                     431)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as error:
+                    # A render failed, e.g. its worker process was killed
+                    response = Response(500, "text/plain; charset=utf-8",
+                                        f"{type(error).__name__}: {error}\n".encode())
+                self.metrics.observe(path if path in ("/render", "/metrics",
+                                                      "/health") else "other",
+                                     response.status,
+                                     time.perf_counter() - start)
+                writer.write(
+                    (f"HTTP/1.1 {response.status} {_REASONS.get(response.status, '')}\r\n"
+                     f"Content-Type: {response.content_type}\r\n"
+                     f"Content-Length: {len(response.body)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                     "\r\n").encode("latin1") + response.body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host: str = DEFAULT_HOST,
+                port: int = DEFAULT_PORT,
+                on_start: Optional[Callable[[Tuple[str, int]], None]] = None,
+                **server_options: Any) -> None:
+    """
+    Runs a RenderServer until cancelled.
+
+    Parameters:
+    - host (str, optional): The address to listen on.
+    - port (int, optional): The port to listen on.
+    - on_start (Callable[[Tuple[str, int]], None], optional): Called with the bound address.
+    - server_options: Keyword arguments of RenderServer.
+
+    Returns:
+    - None
+    """
+    server = RenderServer(**server_options)
+    address = await server.start(host, port)
+    if on_start is not None:
+        on_start(address)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
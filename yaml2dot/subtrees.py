@@ -0,0 +1,94 @@
+from typing import Any, Dict, Final, List, Set, Tuple
+
+# Stands in for the id of a collection that contains itself through a YAML alias
+_CYCLE: Final = -1
+
+
+class SubtreeTable:
+    """
+    Interns the mappings and lists of documents bottom-up (hash-consing), giving equal subtrees
+    equal ids.
+
+    A collection is keyed by its type and the sequence of its keys, its scalar values as the
+    renderer displays them (f"{value}") and the ids of its nested collections, so two subtrees
+    get the same id exactly when they render the same. Each key is built from the ids of the
+    children, which keeps interning linear in the size of the document, and ids are stable
+    across all the documents interned into one table.
+    """
+
+    def __init__(self):
+        self._ids: Dict[Tuple, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def index(self, document: Any) -> Dict[int, int]:
+        """
+        Interns every mapping and list of a document.
+
+        Parameters:
+        - document (Any): The document to intern.
+
+        Returns:
+        - Dict[int, int]: Subtree ids keyed by the id() of each mapping and list. The keys are
+          only meaningful while the document is alive.
+        """
+        ids: Dict[int, int] = {}
+        in_progress: Set[int] = set()
+        # Entries are (collection, children interned)
+        stack: List[Tuple[Any, bool]] = [(document, False)]
+
+        while stack:
+            value, expanded = stack.pop()
+            if not isinstance(value, (dict, list)) or id(value) in ids:
+                continue
+            if not expanded:
+                if id(value) in in_progress:
+                    continue
+                in_progress.add(id(value))
+                stack.append((value, True))
+                children = value.values() if isinstance(value,
+                                                        dict) else value
+                stack.extend((child, False) for child in children
+                             if isinstance(child, (dict, list)))
+                continue
+
+            if isinstance(value, dict):
+                key: Tuple = (dict, ) + tuple(
+                    (f"{item_key}", self._child_key(child, ids))
+                    for item_key, child in value.items())
+            else:
+                key = (list, ) + tuple(
+                    self._child_key(child, ids) for child in value)
+            ids[id(value)] = self._ids.setdefault(key, len(self._ids))
+            in_progress.discard(id(value))
+        return ids
+
+    @staticmethod
+    def _child_key(child: Any, ids: Dict[int, int]) -> Any:
+        # Nested collections are represented by their int id, scalars by their str form
+        if isinstance(child, (dict, list)):
+            return ids.get(id(child), _CYCLE)
+        return f"{child}"
+
+
+class SharedSubtrees:
+    """
+    State of a rendering that shares identical subtrees (DAG mode) across the documents of an input.
+
+    Holds the table of interned subtrees, the subtree ids of the document being rendered, and
+    the (parent, shared node) edges emitted so far, so that a parent is linked to a shared
+    node once.
+    """
+
+    def __init__(self):
+        self.table = SubtreeTable()
+        self.ids: Dict[int, int] = {}
+        self.links: Set[Tuple[str, str]] = set()
+
+    def index_document(self, document: Any) -> None:
+        """
+        Interns the subtrees of the next document. The ids of the previous document are dropped,
+        since the object ids they are keyed by may be reused once it is released.
+        """
+        self.ids = self.table.index(document)